@@ -0,0 +1,255 @@
+"""
+Checkpoint binario del motor (no importa Qt)
+
+Guarda todo lo necesario para seguir la partida bit a bit sin pasar por el CSV ni SQLite:
+el DataFrame del mundo por columnas, el estado en arrays (y el paso adaptativo de rk45), el
+grafo de fronteras, las máscaras y matrices de transporte, el día, el primer país, el estado
+de los generadores aleatorios (y del árbol de semillas), el registro de contagios, los
+totales de cada día y las opciones escalares.
+
+    motor.guardar_checkpoint("partida.ppck")
+    motor = Engine.desde_checkpoint("partida.ppck")
+
+Formato (versión 1), todo en little endian:
+
+    8 bytes   número mágico b"PPCKPT\\0\\0"
+    8 bytes   largo de la cabecera JSON (uint64)
+    JSON      meta de la partida + {"arrays": {nombre: [dtype, forma, desplazamiento]}}
+    arrays    uno tras otro, cada uno alineado a 64 bytes
+
+Cargar es una sola lectura del archivo y vistas de NumPy sobre ese búfer: no se interpreta
+texto ni se recalculan máscaras, grafo o matrices. Las columnas de texto van en UTF-8
+separadas por NUL (un array de bytes por columna).
+"""
+from backend.options_base import HeadlessOptions
+from backend.world_state import WorldState
+from backend.grafo_vecinos import GrafoVecinos
+from backend.movilidad import MatrizMovilidad
+import json
+import os
+import struct
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+
+MAGICO: bytes = b"PPCKPT\0\0"
+VERSION: int = 1
+ALINEACION: int = 64
+
+# Columnas del DataFrame que salen del estado (siempre más nuevas que las del DataFrame)
+_COLUMNAS_ESTADO = WorldState.COLUMNAS_COMPARTIMENTOS + WorldState.COLUMNAS_COOLDOWN + WorldState.COLUMNAS_TASAS
+_CANALES_REGISTRO = ("dia", "origen", "destino", "canal")
+
+
+def _opciones_escalares(opt) -> Dict[str, Any]:
+    """Opciones numéricas, de texto o booleanas (sin rutas: son de la máquina que guardó)"""
+    valores: Dict[str, Any] = {}
+    for nombre in dir(HeadlessOptions()):
+        if nombre.startswith("_") or nombre.startswith("RUTA") or not hasattr(opt, nombre): continue
+        valor = getattr(opt, nombre)
+        if valor is None or isinstance(valor, (bool, int, float, str)):
+            valores[nombre] = valor
+    return valores
+
+
+def _alinear(posicion: int) -> int:
+    return -(-posicion // ALINEACION) * ALINEACION
+
+
+def guardar_checkpoint(motor, ruta: str) -> str:
+    """
+    Escribe el estado completo del motor en `ruta` (se escribe aparte y se renombra, así
+    que un corte a medias nunca deja un checkpoint roto)
+
+    Returns:
+        Ruta absoluta del checkpoint
+    """
+    arrays: Dict[str, np.ndarray] = {}
+
+    # DataFrame del mundo, columna a columna
+    columnas: List[str] = [str(c) for c in motor.dataframe.columns]
+    textos: List[str] = []
+    nulos: List[str] = []
+    for col in columnas:
+        if col in _COLUMNAS_ESTADO:
+            arrays[f"df/{col}"] = getattr(motor.estado, col)
+            continue
+        serie: pd.Series = motor.dataframe[col]
+        if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+            if serie.isna().any():
+                arrays[f"nulo/{col}"] = serie.isna().to_numpy()
+                nulos.append(col)
+            valores: List[str] = serie.fillna("").astype(str).tolist()
+            texto: str = "\0".join(valores)
+            if texto.count("\0") != max(len(valores) - 1, 0):
+                raise ValueError(f"La columna {col} tiene caracteres NUL y no se puede guardar")
+            arrays[f"df/{col}"] = np.frombuffer(texto.encode("utf-8"), dtype=np.uint8)
+            textos.append(col)
+        else:
+            arrays[f"df/{col}"] = serie.to_numpy()
+
+    # Estructuras ya compiladas del mundo
+    arrays["grafo/indptr"] = motor.sir.grafo.indptr
+    arrays["grafo/indices"] = motor.sir.grafo.indices
+    arrays["mascara/vuelos"] = motor.sir._mascara_vuelos
+    arrays["mascara/puertos"] = motor.sir._mascara_puertos
+    if motor.sir.movilidad is not None:
+        for tipo, matriz in motor.sir.movilidad.items():
+            for campo, valores in matriz.arrays().items():
+                arrays[f"movilidad/{tipo}/{campo}"] = valores
+
+    arrays["indices_vecinos_zona_cero"] = np.asarray(motor.indices_vecinos_zona_cero, dtype=np.int64)
+    for col, valores in motor.registro.columnas().items():
+        arrays[f"registro/{col}"] = valores
+    arrays["totales/dia"], arrays["totales/valores"] = motor.totales.columnas()
+    # rk45 arrastra el paso adaptativo de cada país al día siguiente: sin él no sería bit a bit
+    paso_rk45 = motor.sir._buferes.paso_rk45() if motor.sir._buferes is not None else None
+    if paso_rk45 is not None:
+        arrays["rk45/h"] = paso_rk45
+
+    semillas: np.random.SeedSequence = motor.semillas
+    meta: Dict[str, Any] = {
+        "version": VERSION,
+        "filas": len(motor.dataframe),
+        "columnas": columnas,
+        "textos": textos,
+        "nulos": nulos,
+        "dia_simulacion": int(motor.dia_simulacion),
+        "dias_consecutivos_cero": int(motor.dias_consecutivos_cero),
+        "primer_pais": motor.primer_pais,
+        "db": bool(motor.db),
+        "semillas": {
+            # entropy puede ser un entero de más de 64 bits: viaja como texto
+            "entropy": str(semillas.entropy) if not isinstance(semillas.entropy, (list, tuple)) else [str(e) for e in semillas.entropy],
+            "spawn_key": list(semillas.spawn_key),
+            "n_children_spawned": semillas.n_children_spawned,
+        },
+        "rng": motor.rng.bit_generator.state,
+        "rng_noticias": motor.rng_noticias.bit_generator.state,
+        "opciones": _opciones_escalares(motor.opt),
+    }
+
+    # Desplazamientos relativos al final de la cabecera (así no dependen de su largo)
+    contiguos: Dict[str, np.ndarray] = {nombre: np.ascontiguousarray(a) for nombre, a in arrays.items()}
+    tabla: Dict[str, list] = {}
+    posicion: int = 0
+    for nombre, a in contiguos.items():
+        posicion = _alinear(posicion)
+        tabla[nombre] = [a.dtype.newbyteorder("<").str, list(a.shape), posicion]
+        posicion += a.nbytes
+    cabecera: bytes = json.dumps({**meta, "arrays": tabla}).encode("utf-8")
+    inicio: int = _alinear(16 + len(cabecera))
+
+    ruta = os.path.abspath(ruta)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal: str = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(MAGICO + struct.pack("<Q", len(cabecera)) + cabecera)
+        for nombre, a in contiguos.items():
+            f.seek(inicio + tabla[nombre][2])
+            f.write(a.astype(tabla[nombre][0], copy=False).tobytes())
+        f.truncate(inicio + posicion)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+class Checkpoint:
+    """
+    Checkpoint leído de disco. Hace de `mundo` para Engine (dataframe(), grafo, máscaras
+    y movilidad ya compilados) y luego restaura el estado dinámico con restaurar()
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        self.arrays: Dict[str, np.ndarray] = arrays
+        self.meta: Dict[str, Any] = meta
+
+        self.grafo: GrafoVecinos = GrafoVecinos(arrays["grafo/indptr"], arrays["grafo/indices"])
+        self.mascara_vuelos: np.ndarray = arrays["mascara/vuelos"]
+        self.mascara_puertos: np.ndarray = arrays["mascara/puertos"]
+
+        self.movilidad: Optional[Dict[str, MatrizMovilidad]] = None
+        if "movilidad/vuelo/origen" in arrays:
+            n: int = meta["filas"]
+            self.movilidad = {
+                tipo: MatrizMovilidad.desde_arrays(n, {campo: arrays[f"movilidad/{tipo}/{campo}"] for campo in ("origen", "tasa", "destinos", "inicio")})
+                for tipo in ("vuelo", "puerto")
+            }
+
+        # El motor vuelve a llamar a spawn(2) al crearse: se le deja el contador justo antes
+        datos: Dict[str, Any] = meta["semillas"]
+        entropia = [int(e) for e in datos["entropy"]] if isinstance(datos["entropy"], list) else int(datos["entropy"])
+        self.semillas: np.random.SeedSequence = np.random.SeedSequence(
+            entropia, spawn_key=tuple(datos["spawn_key"]), n_children_spawned=max(0, datos["n_children_spawned"] - 2))
+
+
+    @classmethod
+    def abrir(cls, ruta: str) -> "Checkpoint":
+        """Lee el archivo entero de una vez; los arrays son vistas (escribibles) sobre ese búfer"""
+        with open(ruta, "rb") as f:
+            inicio: bytes = f.read(16)
+            if len(inicio) < 16 or inicio[:8] != MAGICO:
+                raise ValueError(f"{ruta} no es un checkpoint de PaperPandemic")
+            largo: int = struct.unpack("<Q", inicio[8:])[0]
+            meta: Dict[str, Any] = json.loads(f.read(largo).decode("utf-8"))
+            if meta.get("version") != VERSION:
+                raise ValueError(f"Versión de checkpoint no soportada: {meta.get('version')} (se esperaba {VERSION})")
+
+            f.seek(_alinear(16 + largo))
+            bufer: bytearray = bytearray(os.fstat(f.fileno()).st_size - f.tell())
+            f.readinto(bufer)
+
+        arrays: Dict[str, np.ndarray] = {}
+        for nombre, (tipo, forma, posicion) in meta.pop("arrays").items():
+            dtype: np.dtype = np.dtype(tipo)
+            cantidad: int = int(np.prod(forma, dtype=np.int64))
+            arrays[nombre] = np.frombuffer(bufer, dtype=dtype, count=cantidad, offset=posicion).reshape(forma)
+        return cls(arrays, meta)
+
+
+    def opciones(self) -> HeadlessOptions:
+        """Opciones con las que se guardó la partida (sin persistencia en SQLite)"""
+        opt: HeadlessOptions = HeadlessOptions()
+        for nombre, valor in self.meta["opciones"].items():
+            if hasattr(opt, nombre): setattr(opt, nombre, valor)
+        opt.PERSISTIR = False
+        return opt
+
+
+    def dataframe(self) -> pd.DataFrame:
+        """DataFrame del mundo tal como estaba al guardar (con el estado ya volcado)"""
+        columnas: Dict[str, Any] = {}
+        for col in self.meta["columnas"]:
+            valores: np.ndarray = self.arrays[f"df/{col}"]
+            if col in self.meta["textos"]:
+                columnas[col] = valores.tobytes().decode("utf-8").split("\0") if self.meta["filas"] else []
+            else:
+                columnas[col] = valores
+        df: pd.DataFrame = pd.DataFrame(columnas)
+        for col in self.meta["nulos"]:
+            df.loc[self.arrays[f"nulo/{col}"], col] = None
+        return df
+
+
+    def restaurar(self, motor) -> None:
+        """Devuelve al motor (recién creado con este checkpoint como mundo) su estado dinámico"""
+        motor.dia_simulacion = self.meta["dia_simulacion"]
+        motor.dias_consecutivos_cero = self.meta["dias_consecutivos_cero"]
+        motor.primer_pais = self.meta["primer_pais"]
+        motor.db = self.meta["db"]
+        motor.indices_vecinos_zona_cero = self.arrays["indices_vecinos_zona_cero"]
+        motor.rng.bit_generator.state = self.meta["rng"]
+        motor.rng_noticias.bit_generator.state = self.meta["rng_noticias"]
+        motor.registro.truncar(0)
+        motor.registro.extender({col: self.arrays[f"registro/{col}"] for col in _CANALES_REGISTRO})
+        if "rk45/h" in self.arrays and motor.sir._buferes is not None:
+            motor.sir._buferes.fijar_paso_rk45(self.arrays["rk45/h"])
+        motor.totales.truncar(0)
+        if "totales/dia" in self.arrays:
+            motor.totales.extender({"dia": self.arrays["totales/dia"], "valores": self.arrays["totales/valores"]})
+        else:
+            motor.totales.registrar(motor.dia_simulacion, motor.estado)
+        # La grabación que empezó el constructor lleva el día 1: vuelve a empezar en el día restaurado
+        if motor.repeticion is not None:
+            motor.repeticion.truncar(0)
+            motor.repeticion.grabar(motor.dia_simulacion, motor.estado)
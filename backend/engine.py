@@ -1,21 +1,62 @@
 from backend.sir_model import SIR
 from backend.loader import Loader
+from backend.escritor import EscritorAsincrono
+from backend.series import SeriesPaises
+from backend.checkpoint import Checkpoint, guardar_checkpoint
+from backend.repeticion import Repeticion
+from backend.totales import TotalesDiarios
 import numpy as np
+import pandas as pd
+import time
+from typing import Dict
 
 
 class Engine:
-    def __init__(self, opciones_instancia):
+    def __init__(self, opciones_instancia, mundo=None, semilla=None):
+        """
+        Args:
+            opciones_instancia: Options, HeadlessOptions o cualquier objeto con los mismos atributos
+            mundo: Datos estáticos ya interpretados (ver montecarlo.MundoCompartido y
+                checkpoint.Checkpoint). Si se indica, no se lee el CSV ni se toca SQLite
+            semilla: Entero o SeedSequence; si no se indica se usa opt.SEMILLA
+        """
         self.opt = opciones_instancia
         self.csv = Loader(self.opt)
 
-        # Intentar crear/conectar DB
+        # Árbol de semillas: un flujo para la simulación y otro para lo que solo es
+        # presentación (noticias), así la interfaz nunca altera la trayectoria
+        if semilla is None: semilla = self.opt.SEMILLA
+        self.semillas = semilla if isinstance(semilla, np.random.SeedSequence) else np.random.SeedSequence(semilla)
+        semilla_sim, semilla_noticias = self.semillas.spawn(2)
+        self.rng = np.random.default_rng(semilla_sim)
+        self.rng_noticias = np.random.default_rng(semilla_noticias)
+
+        # Intentar crear/conectar DB (solo si se persiste; en modo headless no hay SQLite)
         # self.db devuelve True si es NUEVA, False si ya EXISTÍA
-        self.db = self.csv.crear_db()
+        self.persistir = self.opt.PERSISTIR and mundo is None
+        self.db = self.csv.crear_db() if self.persistir else True
         self.dia_simulacion = 1
         self.dias_consecutivos_cero = 0
 
+        # Tiempo acumulado (segundos) de cada fase de avanzar_dia
+        self.tiempos: Dict[str, float] = dict.fromkeys(
+            ["fronteras", "logistica", "sird", "volcado", "guardado"], 0.0
+        )
+
         # --- LÓGICA DE CARGA SEGURA ---
-        if self.db:
+        if mundo is not None:
+            # CASO M: Mundo ya interpretado en otro proceso (sin CSV ni SQLite)
+            self.dataframe = mundo.dataframe()
+            self.historial = pd.DataFrame()
+            self.primer_pais = None
+
+        elif not self.persistir:
+            # CASO 0: Sin persistencia, siempre partida nueva desde el CSV
+            self.dataframe = self.csv.cargar_df()
+            self.historial = pd.DataFrame()
+            self.primer_pais = None
+
+        elif self.db:
             # CASO A: Partida Nueva (Acabas de borrar la DB o es la primera vez)
             self.dataframe = self.csv.cargar_df()
 
@@ -53,7 +94,44 @@ class Engine:
 
         # Cargar mapa y modelo...
         self.mapa = self.csv.cargar_mapa(self.dataframe)
-        self.sir = SIR(mapa_mundo=self.mapa, df=self.dataframe, opt=self.opt)
+        if mundo is not None:
+            self.sir = SIR(mapa_mundo=self.mapa, df=self.dataframe, opt=self.opt, grafo=mundo.grafo,
+                           mascaras=(mundo.mascara_vuelos, mundo.mascara_puertos), rng=self.rng,
+                           movilidad=mundo.movilidad)
+        else:
+            self.sir = SIR(mapa_mundo=self.mapa, df=self.dataframe, opt=self.opt, rng=self.rng)
+        self.estado = self.sir.estado
+        self.registro = self.sir.registro
+
+        # El día cargado se registra una sola vez. En un mundo virgen el día 1 lo registra el
+        # primer tick (con el Paciente Cero); registrarlo aquí y otra vez allí truncaría los
+        # totales y la gráfica tendría que pedir la curva entera
+        virgen = self.estado.I.sum() == 0 and self.estado.R.sum() + self.estado.M.sum() == 0
+
+        # Totales mundiales de cada día para la gráfica (en una partida cargada, los de la DB)
+        self.totales = TotalesDiarios()
+        self.totales.cargar(self.historial)
+        if not virgen and self.totales.ultimo_dia != self.dia_simulacion:
+            self.totales.registrar(self.dia_simulacion, self.estado)
+
+        # Grabación de cada día para volver atrás desde la interfaz (empieza en el día cargado)
+        self.repeticion = None
+        if self.opt.GRABAR_REPETICION:
+            self.repeticion = Repeticion(self.estado.n, self.opt.REPETICION_CADA_KEYFRAME)
+            if not virgen: self.repeticion.grabar(self.dia_simulacion, self.estado)
+
+        # Series por país y día (junto a la DB). En una partida cargada se descartan los días
+        # posteriores al último guardado en SQLite (si el programa se cerró entre ambos)
+        self.series = None
+        if self.persistir and self.opt.GUARDAR_SERIES:
+            self.series = SeriesPaises(self.csv.ruta_series, len(self.dataframe))
+            self.series.rebobinar(0 if self.db else self.dia_simulacion + 1)
+
+        # Hilo escritor de SQLite (solo si se persiste en modo asíncrono)
+        self.escritor = None
+        if self.persistir and self.opt.GUARDADO_ASINCRONO:
+            self.escritor = EscritorAsincrono(self.csv, self.dataframe, self.opt.GUARDAR_CADA_DIAS, self.opt.GUARDAR_CADA_S,
+                                              series=self.series)
 
         # Precarga de vecinos (igual que antes)
         if self.primer_pais and self.primer_pais != "Desconocido":
@@ -64,15 +142,20 @@ class Engine:
         else:
             self.indices_vecinos_zona_cero = np.array([])
 
-    def avanzar_dia(self):
+    def _paso(self) -> str:
+        """
+        Avanza un día trabajando solo sobre los arrays del estado (sin DataFrame ni disco)
+
+        Returns:
+            "Jugando" si la simulación sigue, o el motivo del fin de partida
+        """
         # 1. AUMENTAR DÍA
         self.dia_simulacion += 1
 
         # Calculamos totales actuales para tomar decisiones
-        infectados_totales = self.dataframe["I"].sum()
-        sanos_totales = self.dataframe["S"].sum()
-        historia_pandemia = self.dataframe["R"].sum() + self.dataframe["M"].sum()
-        poblacion_total = sanos_totales + infectados_totales + historia_pandemia
+        infectados_totales = self.estado.I.sum()
+        sanos_totales = self.estado.S.sum()
+        historia_pandemia = self.estado.R.sum() + self.estado.M.sum()
 
         # =================================================================
         # 2. LÓGICA DE INICIO (Paciente Cero)
@@ -80,13 +163,13 @@ class Engine:
         # Si no hay infectados Y NADIE ha muerto ni se ha recuperado (Inicio virgen)
         if infectados_totales == 0 and historia_pandemia == 0:
             print("☣️ Paciente Cero detectado.")
-            self.sir.infectar_primera_vez()
+            self.sir.infectar_primera_vez(dia_actual=1)
             self.primer_pais = self.opt.PAIS_INICIO
 
             self.dia_simulacion = 1
             self.db = False
 
-            infectados_totales = self.dataframe["I"].sum()
+            infectados_totales = self.estado.I.sum()
 
         # =================================================================
         # 3. VERIFICAR ESTADO DEL JUEGO
@@ -106,50 +189,175 @@ class Engine:
         elif self.dias_consecutivos_cero >= 3:
             status = "Virus Erradicado"  # Fin normal
 
+        # Si el juego terminó no se simula nada más
+        if status != "Jugando":
+            return status
+
+        t0 = time.perf_counter()
+        self.sir.procesar_fronteras_inteligente(dia_actual=self.dia_simulacion)
+        self.sir.actualizar_cooldowns()
+        t1 = time.perf_counter()
+
+        if self.sir._mascara_vuelos.any():
+            self.sir.procesar_logistica(tipo_transporte="vuelo", dia_actual=self.dia_simulacion)
+
+        if self.sir._mascara_puertos.any():
+            self.sir.procesar_logistica(tipo_transporte="puerto", dia_actual=self.dia_simulacion)
+        t2 = time.perf_counter()
+
+        # =================================================================
+        # 5. MATEMÁTICAS SIRD (Pasando el día actual para la regla del día 15)
+        # =================================================================
+        self.sir.ejecutar(dia_actual=self.dia_simulacion)
+        t3 = time.perf_counter()
+        self.totales.registrar(self.dia_simulacion, self.estado)
+        if self.repeticion is not None: self.repeticion.grabar(self.dia_simulacion, self.estado)
+
+        self.tiempos["fronteras"] += t1 - t0
+        self.tiempos["logistica"] += t2 - t1
+        self.tiempos["sird"] += t3 - t2
+        return status
+
+    def avanzar_dia(self):
+        status = self._paso()
+
         # Si el juego terminó, devolvemos resultado final inmediatamente
         if status != "Jugando":
+            self.estado.volcar_en_df(self.dataframe)
             return {
                 "status": status,
                 "dia": str(self.dia_simulacion),
                 "datos": self.dataframe.to_dict(orient="records"),
-                "totales": {
-                    "S": int(self.dataframe["S"].sum()),
-                    "I": int(self.dataframe["I"].sum()),
-                    "R": int(self.dataframe["R"].sum()),
-                    "M": int(self.dataframe["M"].sum()),
-                },
+                "totales": self._totales_enteros(),
             }
 
-        self.sir.procesar_fronteras_inteligente()
-        self.sir.actualizar_cooldowns()
+        # El DataFrame solo se actualiza aquí, para guardar y para la interfaz
+        t3 = time.perf_counter()
+        resultado = self.estado.volcar_en_df(self.dataframe)
+        t4 = time.perf_counter()
 
-        if "vuelo" in self.dataframe.columns:
-            self.sir.procesar_logistica(tipo_transporte="vuelo")
+        if self.persistir:
+            self._guardar(resultado)
+        t5 = time.perf_counter()
 
-        if "puerto" in self.dataframe.columns:
-            self.sir.procesar_logistica(tipo_transporte="puerto")
+        salida = {
+            "status": "PLAYING",
+            "dia": str(self.dia_simulacion),
+            "totales": self._totales_enteros(),
+            "datos": resultado.to_dict(orient="records"),
+        }
 
-        # =================================================================
-        # 5. MATEMÁTICAS SIRD (Pasando el día actual para la regla del día 15)
-        # =================================================================
-        resultado = self.sir.ejecutar(dia_actual=self.dia_simulacion)
+        self.tiempos["volcado"] += (t4 - t3) + (time.perf_counter() - t5)
+        self.tiempos["guardado"] += t5 - t4
+        return salida
+
+    def avanzar_dias(self, n: int, sample_every: int = 1, incluir_datos: bool = True) -> Dict:
+        """
+        Avanza hasta `n` días seguidos sin guardar ni construir registros por día.
+        Respeta el fin de partida: si el virus se erradica o no queda nadie, se detiene ahí.
+
+        Args:
+            n: Cantidad máxima de días a simular
+            sample_every: Cada cuántos días se guarda una muestra de los totales
+                (el último día simulado siempre se incluye)
+            incluir_datos: Si es False no se construyen los registros por país ("datos")
+
+        Returns:
+            Mismo formato que avanzar_dia, más "muestras": arrays con los totales
+            diezmados {"dia", "S", "I", "R", "M", "paises_infectados"}
+        """
+        sample_every = max(1, int(sample_every))
+        columnas = ["dia", "S", "I", "R", "M", "paises_infectados"]
+        muestras: Dict[str, list] = {col: [] for col in columnas}
+
+        def muestrear() -> None:
+            muestras["dia"].append(self.dia_simulacion)
+            for col in ("S", "I", "R", "M"):
+                muestras[col].append(float(getattr(self.estado, col).sum()))
+            muestras["paises_infectados"].append(int((self.estado.I > 0).sum()))
+
+        status = "Jugando"
+        for k in range(1, n + 1):
+            status = self._paso()
+            if status != "Jugando": break
+            if k % sample_every == 0: muestrear()
+
+        if not muestras["dia"] or muestras["dia"][-1] != self.dia_simulacion:
+            muestrear()
+
+        # Un único volcado y guardado al final del salto
+        t3 = time.perf_counter()
+        resultado = self.estado.volcar_en_df(self.dataframe)
+        t4 = time.perf_counter()
+
+        if self.persistir and status == "Jugando":
+            self._guardar(resultado, dia=self.dia_simulacion)
+        t5 = time.perf_counter()
+
+        salida = {
+            "status": "PLAYING" if status == "Jugando" else status,
+            "dia": str(self.dia_simulacion),
+            "totales": self._totales_enteros(),
+            "muestras": {col: np.asarray(valores) for col, valores in muestras.items()},
+            "datos": resultado.to_dict(orient="records") if incluir_datos else [],
+        }
+
+        self.tiempos["volcado"] += (t4 - t3) + (time.perf_counter() - t5)
+        self.tiempos["guardado"] += t5 - t4
+        return salida
 
+    def guardar_checkpoint(self, ruta):
+        """Guarda el estado completo en un checkpoint binario (ver backend/checkpoint.py)"""
+        return guardar_checkpoint(self, ruta)
+
+    @classmethod
+    def desde_checkpoint(cls, ruta, opciones_instancia=None):
+        """
+        Motor listo para seguir la partida guardada en `ruta`, sin CSV ni SQLite
+
+        Args:
+            ruta: Archivo escrito por guardar_checkpoint
+            opciones_instancia: Opciones a usar; por defecto las guardadas en el checkpoint
+                (con otras opciones la continuación ya no es la misma bit a bit)
+        """
+        checkpoint = Checkpoint.abrir(ruta)
+        motor = cls(opciones_instancia or checkpoint.opciones(), mundo=checkpoint, semilla=checkpoint.semillas)
+        checkpoint.restaurar(motor)
+        return motor
+
+    def _guardar(self, resultado, dia=None):
+        """Guarda el día: al hilo escritor si lo hay (sin esperar al disco) o en el momento"""
         try:
-            self.csv.guardar_estados(resultado, self.primer_pais)
+            if self.escritor is not None:
+                columnas = {col: getattr(self.estado, col).copy() for col in Loader.COLUMNAS_DINAMICAS}
+                fila = Loader.fila_historial(columnas, self.primer_pais, self.dia_simulacion if dia is None else dia)
+                self.escritor.encolar(fila, columnas)
+            else:
+                self.csv.guardar_estados(resultado, self.primer_pais, dia=dia)
+                if self.series is not None:
+                    self.series.anadir(self.dia_simulacion if dia is None else dia,
+                                      {col: getattr(self.estado, col) for col in SeriesPaises.COLUMNAS})
+                    self.series.confirmar()
         except Exception as e:
             print(e)
 
-        return {
-            "status": "PLAYING",
-            "dia": str(self.dia_simulacion),
-            "totales": {
-                "S": int(resultado["S"].sum()),
-                "I": int(resultado["I"].sum()),
-                "R": int(resultado["R"].sum()),
-                "M": int(resultado["M"].sum()),
-            },
-            "datos": resultado.to_dict(orient="records"),
-        }
+    def vaciar_guardado(self):
+        """Espera a que la DB tenga todos los días simulados (al pausar)"""
+        if self.escritor is not None: self.escritor.vaciar()
+
+    def cerrar(self):
+        """Guarda lo pendiente, termina el hilo escritor y cierra la conexión (al reiniciar o salir)"""
+        if self.escritor is not None:
+            self.escritor.cerrar()
+            self.escritor = None
+        if self.series is not None:
+            self.series.cerrar()
+            self.series = None
+        self.csv.cerrar()
+
+    def _totales_enteros(self):
+        """Totales mundiales de cada compartimento, en enteros para la interfaz"""
+        return {col: int(valor) for col, valor in self.estado.totales().items()}
 
     def cheat_fin_rapido(self):
         """
@@ -157,45 +365,33 @@ class Engine:
         Usa float64 para los cálculos intermedios para evitar el límite de 32 bits.
         """
 
-        # 1. Convertimos a NUMPY ARRAYS de tipo FLOAT64 (Decimales de alta precisión)
-        # Esto evita que Pandas intente usar enteros de 32 bits.
-        sanos = self.dataframe["S"].to_numpy(dtype=np.float64)
-        infectados = self.dataframe["I"].to_numpy(dtype=np.float64)
-        recuperados = self.dataframe["R"].to_numpy(dtype=np.float64)
-        muertos = self.dataframe["M"].to_numpy(dtype=np.float64)
+        # 1. Trabajamos directamente sobre los arrays FLOAT64 del estado
+        sanos = self.estado.S
+        infectados = self.estado.I
+        recuperados = self.estado.R
+        muertos = self.estado.M
 
         # 2. Generamos aleatoriedad
-        rng = np.random.default_rng()
-        factores_suerte = rng.random(len(sanos))  # Array de 0.0 a 1.0
+        factores_suerte = self.rng.random(len(sanos))  # Array de 0.0 a 1.0
 
         # 3. Cálculo Seguro (Matemática de Flotantes)
         nuevos_r_float = sanos * factores_suerte
         nuevos_m_float = sanos - nuevos_r_float
 
-        # 4. Convertimos a INT64 (Enteros Gigantes) explícitamente
-        # np.floor redondea hacia abajo para evitar decimales sueltos
-        nuevos_r = np.floor(nuevos_r_float).astype(np.int64)
-        nuevos_m = np.floor(nuevos_m_float).astype(np.int64)
-
-        # Sumamos los infectados a los muertos (convertidos a int64)
-        nuevos_m += infectados.astype(np.int64)
-
-        # 5. Escribimos de vuelta al DataFrame forzando el tipo
-        self.dataframe["S"] = 0
-        self.dataframe["I"] = 0
-
-        # Suma final segura
-        total_r = recuperados.astype(np.int64) + nuevos_r
-        total_m = muertos.astype(np.int64) + nuevos_m
+        # 4. np.floor redondea hacia abajo para evitar decimales sueltos
+        nuevos_r = np.floor(nuevos_r_float)
+        nuevos_m = np.floor(nuevos_m_float)
 
-        self.dataframe["R"] = total_r
-        self.dataframe["M"] = total_m
+        # Sumamos los infectados a los muertos
+        nuevos_m += np.floor(infectados)
 
-        # Aseguramos que las columnas en Pandas sean int64
-        self.dataframe["R"] = self.dataframe["R"].astype("int64")
-        self.dataframe["M"] = self.dataframe["M"].astype("int64")
+        # 5. Escribimos de vuelta al estado
+        recuperados += nuevos_r
+        muertos += nuevos_m
+        sanos.fill(0)
+        infectados.fill(0)
 
         # Fin del juego
         self.dias_consecutivos_cero = 5
 
-        return self.dataframe
+        return self.estado.volcar_en_df(self.dataframe)
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+from backend.sir_model import SIR
+from backend import kernels
+
+
+class Ensemble:
+    """
+    Ensamble de realizaciones estocásticas del modelo SIRD avanzando a la vez
+
+    El estado es una matriz (corridas, países) y cada día se resuelve con las mismas
+    operaciones de kernels.py que usa el motor normal, solo que sobre todas las corridas
+    juntas. Cada corrida tiene su propio flujo aleatorio (un hijo del SeedSequence, como en
+    montecarlo.py) y, opcionalmente, sus propias tasas: la corrida k da lo mismo en un lote
+    de mil que sola con su semilla (`semillas[k]`).
+    """
+
+    COMPARTIMENTOS: List[str] = ["S", "I", "R", "M"]
+
+    def __init__(self, sir: SIR, opt, corridas: int, semilla=None,
+                 beta=None, gamma=None, mu=None, dia: int = 1) -> None:
+        """
+        Args:
+            sir: Modelo del que se copian el estado actual, el grafo y las máscaras de transporte
+            opt: Opciones (umbrales, cooldowns y tasas por defecto)
+            corridas: Cantidad de realizaciones
+            semilla: Entero o SeedSequence raíz (cada corrida recibe un hijo) o una lista con
+                el SeedSequence de cada corrida (para repetir corridas sueltas)
+            beta, gamma, mu: Escalar o array de longitud `corridas`. Si es None se usa el de opt
+            dia: Día actual de la simulación de origen
+        """
+        self.opt = opt
+        self.corridas: int = corridas
+        self.dia: int = dia
+        if isinstance(semilla, (list, tuple)):
+            if len(semilla) != corridas:
+                raise ValueError(f"Se esperaban {corridas} semillas y llegaron {len(semilla)}")
+            self.semillas: List[np.random.SeedSequence] = list(semilla)
+        else:
+            raiz = semilla if isinstance(semilla, np.random.SeedSequence) else np.random.SeedSequence(semilla)
+            self.semillas = raiz.spawn(corridas)
+        # Mismo flujo que la simulación de Engine(semilla=semillas[k]) (primer hijo de su árbol),
+        # derivado sin tocar el contador de la semilla
+        self.rng: kernels.GeneradoresCorridas = kernels.GeneradoresCorridas(
+            np.random.default_rng(np.random.SeedSequence(s.entropy, spawn_key=s.spawn_key + (s.n_children_spawned,),
+                                                         pool_size=s.pool_size))
+            for s in self.semillas
+        )
+
+        # Datos estáticos compartidos por todas las corridas
+        self.poblacion: np.ndarray = sir.estado.poblacion
+        self.grafo = sir.grafo
+        self.mascara_vuelos: np.ndarray = sir._mascara_vuelos
+        self.mascara_puertos: np.ndarray = sir._mascara_puertos
+        self.movilidad = sir.movilidad
+
+        # Estado (corridas, países), copiado del modelo de origen
+        for col in self.COMPARTIMENTOS + ["cooldown_vuelo", "cooldown_puerto", "cooldown_frontera"]:
+            setattr(self, col, np.tile(getattr(sir.estado, col), (corridas, 1)))
+
+        self._buferes: kernels.BuferesSIRD = kernels.BuferesSIRD(self.S.shape)
+
+        self.beta: np.ndarray = self._tasa(beta, opt.beta)
+        self.gamma: np.ndarray = self._tasa(gamma, opt.gamma)
+        self.mu: np.ndarray = self._tasa(mu, opt.mu)
+
+        # Totales por día de cada corrida
+        self.muestras: Dict[str, List] = {col: [] for col in ["dia"] + self.COMPARTIMENTOS}
+
+        # Paciente Cero en todas las corridas si el mundo está virgen. Como en Engine._paso, el
+        # día 1 ya se simula con él (fronteras, transporte y SIRD) antes de registrarlo
+        if self.I.sum() == 0 and self.R.sum() + self.M.sum() == 0:
+            idx: int = sir.mapa_mundo.get(opt.PAIS_INICIO, 0)
+            self.I[:, idx] = np.minimum(opt.INFECTADOS_INICIALES, self.poblacion[idx])
+            self.S[:, idx] -= self.I[:, idx]
+            self.dia = 0
+            self.paso()
+        else:
+            self._muestrear()
+
+
+    @classmethod
+    def desde_engine(cls, motor, corridas: int, **kwargs) -> "Ensemble":
+        """
+        Crea un ensamble que parte del estado actual de un Engine. Si no se indica semilla,
+        se deriva una rama nueva del árbol de semillas del motor (reproducible con opt.SEMILLA)
+        """
+        kwargs.setdefault("semilla", motor.semillas.spawn(1)[0])
+        return cls(motor.sir, motor.opt, corridas, dia=motor.dia_simulacion, **kwargs)
+
+
+    def _tasa(self, valor, defecto: float) -> np.ndarray:
+        """Convierte una tasa en escalar o en columna (corridas, 1) para difundir contra el estado"""
+        tasa: np.ndarray = np.asarray(defecto if valor is None else valor, dtype=np.float64)
+        if tasa.ndim == 0: return tasa
+        if tasa.shape != (self.corridas,):
+            raise ValueError(f"Se esperaban {self.corridas} tasas y llegaron {tasa.shape}")
+        return tasa.reshape(-1, 1)
+
+
+    def _muestrear(self) -> None:
+        self.muestras["dia"].append(self.dia)
+        for col in self.COMPARTIMENTOS:
+            self.muestras[col].append(getattr(self, col).sum(axis=1))
+
+
+    def paso(self) -> None:
+        """Avanza un día en todas las corridas (mismo orden de fases que Engine)"""
+        self.dia += 1
+        opt = self.opt
+
+        corridas, _, victimas = kernels.contagio_fronteras(
+            self.S, self.I, self.poblacion, self.cooldown_frontera, self.grafo,
+            opt.UMBRAL_PCT_FRONTERA, opt.DIAS_COOLDOWN_FRONTERA, self.rng
+        )
+        kernels.infectar(self.S, self.I, corridas, victimas, opt.INFECTADOS_INICIALES_VECINOS)
+        kernels.actualizar_cooldowns(self.cooldown_vuelo, self.cooldown_puerto, self.cooldown_frontera)
+
+        # Transporte: matriz de gravedad (sin cooldowns) o conexión global
+        if self.movilidad is not None:
+            for mascara, tipo in ((self.mascara_vuelos, "vuelo"), (self.mascara_puertos, "puerto")):
+                if not mascara.any(): continue
+                corridas, _, victimas, cantidades = kernels.contagio_movilidad(
+                    self.S, self.I, self.poblacion, self.movilidad[tipo], self.rng
+                )
+                kernels.infectar(self.S, self.I, corridas, victimas, cantidades)
+
+        else:
+            for mascara, cooldown in ((self.mascara_vuelos, self.cooldown_vuelo), (self.mascara_puertos, self.cooldown_puerto)):
+                corridas, _, victimas = kernels.contagio_logistica(
+                    self.S, self.I, self.poblacion, cooldown, mascara,
+                    opt.UMBRAL_PCT_TRANSPORTE, opt.PROBABILIDAD_INFECTAR_VUELO, opt.DIAS_COOLDOWN_TRANSPORTE, self.rng
+                )
+                kernels.infectar(self.S, self.I, corridas, victimas, opt.INFECTADOS_INICIALES_VECINOS)
+
+        # Primeros días sin recuperaciones ni muertes (igual que SIR.ejecutar)
+        gamma, mu = (0.0, 0.0) if self.dia <= 4 else (self.gamma, self.mu)
+        kernels.paso_sird(self.S, self.I, self.R, self.M, self.poblacion, self.beta, gamma, mu,
+                          self.dia, opt.UMBRAL_ERRADICACION, self._buferes,
+                          opt.INTEGRADOR, opt.SUBPASOS_RK4, opt.TOLERANCIA_RK45, self.rng)
+        self._muestrear()
+
+
+    def avanzar(self, dias: int) -> None:
+        """Avanza hasta `dias` días; se detiene antes si el virus desapareció en todas las corridas"""
+        for _ in range(dias):
+            self.paso()
+            if not self.I.any(): break
+
+
+    def totales(self) -> Dict[str, np.ndarray]:
+        """Matriz (días, corridas) con los totales mundiales de cada compartimento"""
+        return {col: np.vstack(self.muestras[col]) for col in self.COMPARTIMENTOS}
+
+
+    def resumen(self, cuantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> pd.DataFrame:
+        """
+        Media y bandas de cuantiles por día de cada compartimento
+
+        Returns:
+            DataFrame con columnas dia, S_media, S_q05, S_q50, S_q95, I_media, ...
+        """
+        columnas: Dict[str, np.ndarray] = {"dia": np.asarray(self.muestras["dia"])}
+        for col, matriz in self.totales().items():
+            columnas[f"{col}_media"] = matriz.mean(axis=1)
+            bandas: np.ndarray = np.quantile(matriz, cuantiles, axis=1)
+            for q, banda in zip(cuantiles, bandas):
+                columnas[f"{col}_q{round(q * 100):02d}"] = banda
+        return pd.DataFrame(columnas)
@@ -0,0 +1,151 @@
+"""
+Guardado en SQLite fuera del hilo de la simulación (no importa Qt)
+
+El motor deja cada día en una cola acotada y sigue; un hilo escritor junta los días
+pendientes y los guarda en una sola transacción (commit en grupo) cada GUARDAR_CADA_DIAS
+días o GUARDAR_CADA_S segundos, lo que llegue antes. Los estados intermedios se funden:
+del lote solo se escribe el estado del último día (más una fila de historial por día), así
+que la DB siempre queda en un día completo, nunca a medias. Las series por país, en cambio,
+reciben todos los días y se confirman junto con cada commit.
+"""
+from backend.loader import Loader
+from backend.series import SeriesPaises
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+class EscritorAsincrono:
+    """
+    Hilo escritor de un Loader. El motor llama a encolar() por día, y a vaciar() o cerrar()
+    cuando la DB tiene que estar al día (pausa, salida, reinicio)
+    """
+
+    # Marcas de control en la cola (además de los días)
+    _SALIR = object()
+
+    def __init__(self, loader: Loader, base: pd.DataFrame, cada_dias: int = 10, cada_s: float = 2.0,
+                 capacidad: int = 256, series: Optional[SeriesPaises] = None) -> None:
+        """
+        Args:
+            loader: Loader con la conexión de la partida (desde aquí solo lo usa este hilo para escribir)
+            base: DataFrame del mundo; se copia una vez para las columnas estáticas
+            cada_dias: Días pendientes que fuerzan un commit
+            cada_s: Segundos máximos que un día puede esperar en memoria antes del commit
+            capacidad: Días que caben en la cola. Si el disco no da abasto el motor espera aquí,
+                no en cada fsync
+            series: Almacén de series por país donde se añade cada día (opcional)
+        """
+        self.loader: Loader = loader
+        self.cada_dias: int = max(1, int(cada_dias))
+        self.cada_s: float = cada_s
+        self.series: Optional[SeriesPaises] = series
+        self.ultimo_dia_guardado: Optional[int] = None
+
+        self._datos: pd.DataFrame = base.copy()
+        self._cola: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._hilo: threading.Thread = threading.Thread(target=self._bucle, name="EscritorSQLite", daemon=True)
+        self._hilo.start()
+
+
+    def encolar(self, fila: tuple, columnas: Dict[str, np.ndarray]) -> None:
+        """
+        Entrega un día al escritor. Si el hilo ya no existe el día se guarda aquí mismo,
+        así la simulación nunca se queda esperando a una cola que nadie vacía
+
+        Args:
+            fila: Fila de historial del día (Loader.fila_historial)
+            columnas: Copia de las columnas dinámicas del estado (el escritor se queda con ellas)
+        """
+        if self._poner((fila, columnas)): return
+        if self.series is not None: self.series.anadir(fila[4], columnas)
+        self._guardar([fila], columnas)
+
+
+    def _poner(self, elemento) -> bool:
+        """Mete un elemento en la cola esperando sitio mientras el hilo siga vivo. False si murió"""
+        while self._hilo.is_alive():
+            try:
+                self._cola.put(elemento, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+    def vaciar(self, espera_s: Optional[float] = None) -> bool:
+        """Espera a que todo lo encolado hasta ahora esté guardado. False si se agotó la espera"""
+        listo: threading.Event = threading.Event()
+        if not self._poner(listo): return True
+        limite: Optional[float] = None if espera_s is None else time.monotonic() + espera_s
+        while not listo.wait(0.5):
+            if not self._hilo.is_alive(): return True
+            if limite is not None and time.monotonic() >= limite: return False
+        return True
+
+
+    def cerrar(self) -> None:
+        """Guarda lo pendiente y termina el hilo"""
+        if not self._hilo.is_alive(): return
+        self._cola.put(self._SALIR)
+        self._hilo.join()
+
+
+    def _guardar(self, filas: List[tuple], columnas: Optional[Dict[str, np.ndarray]]) -> None:
+        if not filas: return
+        for col, valores in columnas.items():
+            self._datos[col] = valores
+        if self.loader.guardar_lote(filas, self._datos):
+            self.ultimo_dia_guardado = filas[-1][4]
+            if self.series is not None: self.series.confirmar()
+        elif self.series is not None:
+            # SQLite deshizo el lote: las series tampoco se quedan con esos días
+            self.series.rebobinar(filas[0][4])
+
+
+    def _bucle(self) -> None:
+        filas: List[tuple] = []
+        columnas: Optional[Dict[str, np.ndarray]] = None
+        limite: float = 0.0
+
+        while True:
+            espera: Optional[float] = max(0.0, limite - time.monotonic()) if filas else None
+            try:
+                elemento = self._cola.get(timeout=espera)
+            except queue.Empty:
+                elemento = None
+
+            # Un fallo (disco lleno al crecer las series, por ejemplo) pierde ese lote, no el hilo:
+            # si el hilo muriera, el motor se quedaría esperando sitio en la cola
+            try:
+                if elemento is None:
+                    # Se cumplió GUARDAR_CADA_S con días pendientes
+                    self._guardar(filas, columnas)
+                    filas = []
+                elif elemento is self._SALIR:
+                    self._guardar(filas, columnas)
+                    return
+                elif isinstance(elemento, threading.Event):
+                    self._guardar(filas, columnas)
+                    filas = []
+                else:
+                    fila, columnas = elemento
+                    if self.series is not None: self.series.anadir(fila[4], columnas)
+                    if not filas: limite = time.monotonic() + self.cada_s
+                    filas.append(fila)
+                    if len(filas) >= self.cada_dias:
+                        self._guardar(filas, columnas)
+                        filas = []
+            except Exception as e:
+                print(f"⚠️ Error en el hilo escritor, se descartan {len(filas)} días sin guardar: {e}")
+                try:
+                    if filas and self.series is not None: self.series.rebobinar(filas[0][4])
+                except Exception:
+                    pass
+                filas = []
+                if elemento is self._SALIR: return
+            finally:
+                if isinstance(elemento, threading.Event): elemento.set()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+
+class GrafoVecinos:
+    """
+    Grafo de fronteras terrestres en formato CSR (Compressed Sparse Row)
+
+    Los vecinos del país i son indices[indptr[i]:indptr[i+1]]. La columna de texto
+    "vecinos" se interpreta una sola vez al cargar el mundo; durante la simulación
+    solo se trabaja con estos arrays.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray) -> None:
+        self.indptr: np.ndarray = indptr
+        self.indices: np.ndarray = indices
+        self.n: int = len(indptr) - 1
+
+        # Fila (país emisor) de cada arista, para poder filtrar aristas con máscaras
+        self.grado: np.ndarray = np.diff(indptr)
+        self.fila_de_arista: np.ndarray = np.repeat(np.arange(self.n, dtype=np.int64), self.grado)
+
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, mapa_mundo: Dict[str, int]) -> "GrafoVecinos":
+        """
+        Interpreta la columna "vecinos" ("China, Rusia, Mongolia") y resuelve cada nombre
+        a su índice. Los nombres que no existen en el mundo se reportan una sola vez.
+        """
+        n: int = len(df)
+        indptr: np.ndarray = np.zeros(n + 1, dtype=np.int64)
+        indices: List[int] = []
+        no_resueltos: set = set()
+
+        columna = df["vecinos"].astype(str).tolist() if "vecinos" in df.columns else ["No"] * n
+
+        for i, vecinos_str in enumerate(columna):
+            if vecinos_str and vecinos_str != "No":
+                for nombre in vecinos_str.split(","):
+                    nombre = nombre.strip()
+
+                    # Ignorar si dice "Ninguno" o "No"
+                    if not nombre or "Ninguno" in nombre or nombre == "No": continue
+
+                    idx = mapa_mundo.get(nombre)
+                    if idx is None:
+                        no_resueltos.add(nombre)
+                        continue
+                    indices.append(idx)
+            indptr[i + 1] = len(indices)
+
+        if no_resueltos:
+            print(f"⚠️ {len(no_resueltos)} vecinos sin país en la base de datos: {', '.join(sorted(no_resueltos))}")
+
+        return cls(indptr, np.array(indices, dtype=np.int64))
+
+
+    def vecinos_de(self, idx: int) -> np.ndarray:
+        """Índices de los vecinos de un país"""
+        return self.indices[self.indptr[idx]:self.indptr[idx + 1]]
@@ -0,0 +1,639 @@
+"""
+Núcleos numéricos del modelo SIRD en formato por lotes
+
+Todos los arrays de estado tienen forma (corridas, países). El motor normal trabaja con
+una sola corrida (vistas de forma (1, N) sobre los arrays de WorldState) y el Ensemble
+con miles a la vez; la lógica es exactamente la misma en ambos casos.
+"""
+import numpy as np
+import warnings
+from typing import Optional, Tuple
+from backend.grafo_vecinos import GrafoVecinos
+from backend.movilidad import MatrizMovilidad
+
+
+_VACIO: np.ndarray = np.zeros(0, dtype=np.int64)
+
+
+class GeneradoresCorridas:
+    """
+    Un Generator por corrida para los núcleos por lotes. Cada corrida tira de su propio flujo
+    y en el mismo orden que si fuera la única del lote, así su trayectoria no depende de
+    cuántas corridas haya ni de su posición (se puede repetir sola con su semilla).
+
+    Tiene lo que los núcleos le piden a un Generator: uniformes (ver _uniformes), poisson y
+    binomial por filas (la primera dimensión es la corrida).
+    """
+
+    def __init__(self, generadores) -> None:
+        self.generadores: list = list(generadores)
+
+
+    def uniformes(self, corridas: np.ndarray, columnas: Optional[int] = None) -> np.ndarray:
+        if columnas is not None:
+            salida: np.ndarray = np.empty((len(corridas), columnas))
+            for fila, k in enumerate(corridas.tolist()):
+                salida[fila] = self.generadores[k].random(columnas)
+            return salida
+
+        # `corridas` viene en orden de corrida: cada una toma un tramo seguido
+        salida = np.empty(len(corridas))
+        cortes: np.ndarray = np.searchsorted(corridas, np.arange(len(self.generadores) + 1))
+        for k in np.flatnonzero(np.diff(cortes)).tolist():
+            salida[cortes[k]:cortes[k + 1]] = self.generadores[k].random(cortes[k + 1] - cortes[k])
+        return salida
+
+
+    def poisson(self, lam: np.ndarray) -> np.ndarray:
+        return np.stack([g.poisson(fila) for g, fila in zip(self.generadores, lam)])
+
+
+    def binomial(self, n: np.ndarray, p) -> np.ndarray:
+        p = np.broadcast_to(p, n.shape)
+        return np.stack([g.binomial(filas_n, filas_p) for g, filas_n, filas_p in zip(self.generadores, n, p)])
+
+
+def _uniformes(rng, corridas: np.ndarray, columnas: Optional[int] = None) -> np.ndarray:
+    """
+    Uniformes en [0, 1): uno por elemento de `corridas` (en orden de corrida) o, con
+    `columnas`, una fila de `columnas` por cada corrida indicada. Con GeneradoresCorridas
+    cada corrida tira de su propio flujo
+    """
+    if isinstance(rng, GeneradoresCorridas): return rng.uniformes(corridas, columnas)
+    return rng.random(len(corridas) if columnas is None else (len(corridas), columnas))
+
+
+def contagio_fronteras(S: np.ndarray, I: np.ndarray, poblacion: np.ndarray, cooldown: np.ndarray,
+                       grafo: GrafoVecinos, umbral_pct: float, dias_cooldown: int,
+                       rng) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contagio vecinal: cada emisor (pct infectados >= umbral, cooldown 0, con vecinos) elige
+    UN vecino sano al azar y queda en cooldown.
+
+    Returns:
+        (corridas, emisores, victimas): un elemento por contagio
+    """
+    pct_infectados: np.ndarray = I / np.maximum(poblacion, 1)
+    emisores: np.ndarray = (pct_infectados >= umbral_pct) & (cooldown == 0) & (grafo.grado > 0)
+    if not emisores.any(): return _VACIO, _VACIO, _VACIO
+
+    # Aristas candidatas: salen de un emisor y llegan a un vecino SANO
+    validas: np.ndarray = emisores[:, grafo.fila_de_arista] & (S[:, grafo.indices] > 0)
+    corridas, aristas = np.nonzero(validas)
+    if len(aristas) == 0: return _VACIO, _VACIO, _VACIO
+
+    # Segmentos (corrida, emisor): np.nonzero recorre en orden de fila, y dentro de cada
+    # corrida las aristas siguen ordenadas por emisor gracias al CSR
+    filas: np.ndarray = grafo.fila_de_arista[aristas]
+    clave: np.ndarray = corridas * S.shape[1] + filas
+    inicio: np.ndarray = np.flatnonzero(np.r_[True, clave[1:] != clave[:-1]])
+    cantidad: np.ndarray = np.diff(np.r_[inicio, len(clave)])
+
+    # DADO: un vecino al azar dentro de cada segmento
+    elegidas: np.ndarray = inicio + (_uniformes(rng, corridas[inicio]) * cantidad).astype(np.int64)
+
+    corridas_emisoras: np.ndarray = corridas[inicio]
+    emisores_idx: np.ndarray = filas[inicio]
+    cooldown[corridas_emisoras, emisores_idx] = dias_cooldown
+
+    return corridas_emisoras, emisores_idx, grafo.indices[aristas[elegidas]]
+
+
+def contagio_logistica(S: np.ndarray, I: np.ndarray, poblacion: np.ndarray, cooldown: np.ndarray,
+                       mascara_conexion: np.ndarray, umbral_pct: float, probabilidad: float,
+                       dias_cooldown: int, rng) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contagio por vuelos/puertos con "conexión global": cada emisor con éxito en su tirada
+    infecta a una víctima conectada distinta (nadie recibe dos viajes el mismo día).
+
+    Returns:
+        (corridas, emisores, victimas): un elemento por contagio
+    """
+    pct_infectados: np.ndarray = I / np.maximum(poblacion, 1)
+    emisores: np.ndarray = mascara_conexion & (pct_infectados >= umbral_pct) & (cooldown == 0) & (I > 0)
+    if not emisores.any(): return _VACIO, _VACIO, _VACIO
+
+    victimas: np.ndarray = mascara_conexion & (I == 0) & (S > 0)
+    n_victimas: np.ndarray = victimas.sum(axis=1)
+    if not n_victimas.any(): return _VACIO, _VACIO, _VACIO
+
+    # LANZAR LOS DADOS (una tirada por emisor, todas a la vez). Las corridas sin víctimas no
+    # tiran, igual que si estuvieran solas
+    corridas_e, emisores_e = np.nonzero(emisores)
+    con_victimas: np.ndarray = n_victimas[corridas_e] > 0
+    corridas_e, emisores_e = corridas_e[con_victimas], emisores_e[con_victimas]
+    exito: np.ndarray = _uniformes(rng, corridas_e) < probabilidad
+    corridas_e, emisores_e = corridas_e[exito], emisores_e[exito]
+
+    # Si en una corrida hay más éxitos que víctimas, los últimos emisores se quedan sin
+    # víctima (y sin cooldown)
+    inicio_corrida: np.ndarray = np.searchsorted(corridas_e, np.arange(S.shape[0]))
+    rango: np.ndarray = np.arange(len(corridas_e)) - inicio_corrida[corridas_e]
+    con_victima: np.ndarray = rango < n_victimas[corridas_e]
+    corridas_e, emisores_e = corridas_e[con_victima], emisores_e[con_victima]
+    if len(corridas_e) == 0: return _VACIO, _VACIO, _VACIO
+
+    # Baraja víctimas (claves aleatorias, los no elegibles al final) y toma tantas como
+    # emisores con éxito tenga cada corrida
+    por_corrida: np.ndarray = np.bincount(corridas_e, minlength=S.shape[0])
+    filas: np.ndarray = np.flatnonzero(por_corrida)
+    claves: np.ndarray = np.full(victimas.shape, np.inf)
+    claves[filas] = np.where(victimas[filas], _uniformes(rng, filas, S.shape[1]), np.inf)
+    orden: np.ndarray = np.argsort(claves, axis=1)
+    tomar: np.ndarray = np.arange(S.shape[1]) < por_corrida[:, None]
+    corridas_v, posiciones = np.nonzero(tomar)
+    victimas_idx: np.ndarray = orden[corridas_v, posiciones]
+
+    cooldown[corridas_e, emisores_e] = dias_cooldown
+
+    # Ambos lados están en orden de corrida con la misma cantidad por corrida
+    return corridas_e, emisores_e, victimas_idx
+
+
+def contagio_movilidad(S: np.ndarray, I: np.ndarray, poblacion: np.ndarray, movilidad: MatrizMovilidad,
+                       rng) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Importaciones por una matriz de movilidad (modelo de gravedad, ver backend/movilidad.py)
+
+    Los viajeros infectados que llegan a cada destino salen de un solo producto matriz
+    dispersa x prevalencia; de ellos se contagian tantos como indica una tirada de Poisson
+    con media llegadas * fracción de sanos del destino. Sin umbrales ni cooldowns: un país
+    con poca prevalencia exporta poco, pero exporta.
+
+    Returns:
+        (corridas, emisores, victimas, cantidades): un elemento por (corrida, destino) con
+        al menos una importación; el emisor es la ruta de origen sorteada según su aporte
+    """
+    if movilidad.nnz == 0: return _VACIO, _VACIO, _VACIO, _VACIO
+
+    prevalencia: np.ndarray = I / np.maximum(poblacion, 1)
+    aportes: np.ndarray = movilidad.aportes(prevalencia)
+    destinos: np.ndarray = movilidad.destinos
+    sanos_pct: np.ndarray = S[:, destinos] / np.maximum(poblacion[destinos], 1)
+    llegadas: np.ndarray = rng.poisson(movilidad.llegadas(aportes) * sanos_pct)
+
+    corridas, k = np.nonzero(llegadas)
+    if len(corridas) == 0: return _VACIO, _VACIO, _VACIO, _VACIO
+
+    emisores: np.ndarray = movilidad.origen_de(aportes, corridas, k, _uniformes(rng, corridas))
+    return corridas, emisores, destinos[k], llegadas[corridas, k]
+
+
+def infectar(S: np.ndarray, I: np.ndarray, corridas: np.ndarray, victimas: np.ndarray, cantidad) -> None:
+    """
+    Mueve `cantidad` sanos a infectados en cada (corrida, víctima), sin pasar de los sanos
+    disponibles. `cantidad` es un escalar o un array con un valor por víctima
+    """
+    if len(victimas) == 0: return
+    infectados_reales: np.ndarray = np.minimum(cantidad, S[corridas, victimas])
+    S[corridas, victimas] -= infectados_reales
+    I[corridas, victimas] += infectados_reales
+
+
+def actualizar_cooldowns(*cooldowns: np.ndarray) -> None:
+    """Resta 1 día a cada contador de espera, sin bajar de 0 (en el mismo array)"""
+    for cooldown in cooldowns:
+        np.subtract(cooldown, 1, out=cooldown)
+        np.maximum(cooldown, 0, out=cooldown)
+
+
+INTEGRADORES: Tuple[str, ...] = ("euler", "rk4", "rk45", "binomial")
+
+# Tablero de Dormand-Prince 5(4). La última fila de _DP_A es la solución de orden 5, así que
+# la pendiente de la etapa 7 es la primera del paso siguiente (FSAL)
+_DP_A: Tuple[Tuple[float, ...], ...] = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Diferencia entre los pesos de orden 5 y de orden 4 (estimación del error local)
+_DP_E: Tuple[float, ...] = (
+    35 / 384 - 5179 / 57600, 0.0, 500 / 1113 - 7571 / 16695, 125 / 192 - 393 / 640,
+    -2187 / 6784 + 92097 / 339200, 11 / 84 - 187 / 2100, -1 / 40,
+)
+_RK45_MAX_ITERACIONES: int = 10000
+# Pasos fijos de rk4 con los que se termina el día si rk45 agota sus iteraciones
+_RK45_PASOS_RESCATE: int = 16
+# Por debajo de este tamaño no compensa copiar los países pendientes a arrays compactos
+_RK45_MINIMO_COMPACTAR: int = 4096
+
+
+class BuferesSIRD:
+    """
+    Arrays de trabajo de paso_sird. Se crean una vez con la forma del estado y se reutilizan
+    en cada tick, así un día del modelo no pide memoria nueva.
+    """
+
+    def __init__(self, forma: Tuple[int, ...]) -> None:
+        self.forma: Tuple[int, ...] = tuple(forma)
+        self.contagios: np.ndarray = np.empty(forma)
+        self.recuperados: np.ndarray = np.empty(forma)
+        self.muertos: np.ndarray = np.empty(forma)
+        self.salidas: np.ndarray = np.empty(forma)
+        self.factor: np.ndarray = np.empty(forma)
+        self.mascara: np.ndarray = np.empty(forma, dtype=bool)
+        self.erradicacion: np.ndarray = np.empty(forma, dtype=bool)
+        # La población es por país (última dimensión), igual en todas las corridas
+        self.poblacion_mas_uno: np.ndarray = np.empty(forma[-1])
+
+        # Evaluaciones de las derivadas por país acumuladas (para comparar integradores)
+        self.evaluaciones: int = 0
+        # Días-país que rk45 no completó en _RK45_MAX_ITERACIONES y terminó con rk4 de paso fijo
+        self.rescates_rk45: int = 0
+        # Arrays de Runge-Kutta: se crean la primera vez que se usa rk4/rk45
+        self._rk: Optional[dict] = None
+        # Conteos enteros (sanos, infectados) del modo binomial: se crean la primera vez que se usa
+        self._enteros: Optional[np.ndarray] = None
+
+
+    def rk(self, etapas: int) -> dict:
+        """
+        Arrays de Runge-Kutta: "y" (estado apilado S, I, R, M), "tmp", "aux", "escala",
+        "k" (pendientes de cada etapa) y, para rk45, tiempo "t", paso "h" (se conserva de
+        un día a otro) y el error "err" de cada país
+        """
+        forma_y: Tuple[int, ...] = (4,) + self.forma
+        if self._rk is None or self._rk["k"].shape[0] < etapas:
+            h_previo: Optional[np.ndarray] = self._rk["h"] if self._rk is not None else None
+            self._rk = {
+                "y": np.empty(forma_y), "tmp": np.empty(forma_y), "aux": np.empty(forma_y),
+                "escala": np.empty(forma_y), "k": np.empty((etapas,) + forma_y),
+                "t": np.empty(self.forma), "h": h_previo if h_previo is not None else np.full(self.forma, 0.5),
+                "h_efectivo": np.empty(self.forma), "err": np.empty(self.forma),
+                "activo": np.empty(self.forma, dtype=bool), "acepta": np.empty(self.forma, dtype=bool),
+            }
+        return self._rk
+
+
+    def paso_rk45(self) -> Optional[np.ndarray]:
+        """Paso adaptativo de cada país que rk45 arrastra de un día a otro (None si aún no se usó)"""
+        return self._rk["h"] if self._rk is not None else None
+
+
+    def fijar_paso_rk45(self, h: np.ndarray) -> None:
+        """Restaura el paso adaptativo guardado (checkpoint): será el primer intento del día siguiente"""
+        self.rk(len(_DP_A))["h"][:] = h
+
+
+    def enteros(self) -> np.ndarray:
+        """Array int64 (2, ...) para los conteos de sanos e infectados que recibe Generator.binomial"""
+        if self._enteros is None:
+            self._enteros = np.empty((2,) + self.forma, dtype=np.int64)
+        return self._enteros
+
+
+def _derivadas(Y: np.ndarray, poblacion_mas_uno: np.ndarray, beta, gamma, mu,
+               salida: np.ndarray, contagios: np.ndarray) -> None:
+    """dS, dI, dR, dM del modelo SIRD continuo, escritas en `salida` (misma forma que Y)"""
+    S, I = Y[0], Y[1]
+    np.multiply(beta, S, out=contagios)
+    np.multiply(contagios, I, out=contagios)
+    np.divide(contagios, poblacion_mas_uno, out=contagios)
+
+    np.negative(contagios, out=salida[0])
+    np.multiply(I, gamma, out=salida[2])
+    np.multiply(I, mu, out=salida[3])
+    np.subtract(contagios, salida[2], out=salida[1])
+    np.subtract(salida[1], salida[3], out=salida[1])
+
+
+def _euler(S: np.ndarray, I: np.ndarray, R: np.ndarray, M: np.ndarray,
+           beta, gamma, mu, b: BuferesSIRD) -> None:
+    """Un día de Euler, con recortes para que ningún compartimento quede negativo"""
+    contagios, recuperados, muertos = b.contagios, b.recuperados, b.muertos
+
+    # Cálculos SIRD Vectorizados: beta * S * I / (poblacion + 1), sin pasar de S
+    np.multiply(beta, S, out=contagios)
+    np.multiply(contagios, I, out=contagios)
+    np.divide(contagios, b.poblacion_mas_uno, out=contagios)
+    np.minimum(contagios, S, out=contagios)
+
+    np.multiply(I, gamma, out=recuperados)
+    np.multiply(I, mu, out=muertos)
+
+    # Si las salidas superan a los infectados se reescalan (donde no, el factor sería 1)
+    np.add(recuperados, muertos, out=b.salidas)
+    np.greater(b.salidas, I, out=b.mascara)
+    if b.mascara.any():
+        np.add(b.salidas, 1e-9, out=b.factor)
+        np.divide(I, b.factor, out=b.factor)
+        np.multiply(recuperados, b.factor, out=recuperados, where=b.mascara)
+        np.multiply(muertos, b.factor, out=muertos, where=b.mascara)
+
+    S -= contagios
+    np.subtract(contagios, recuperados, out=contagios)
+    np.subtract(contagios, muertos, out=contagios)
+    I += contagios
+    R += recuperados
+    M += muertos
+    b.evaluaciones += S.size
+
+
+def _binomial(S: np.ndarray, I: np.ndarray, R: np.ndarray, M: np.ndarray,
+              beta, gamma, mu, rng, b: BuferesSIRD) -> None:
+    """
+    Un día estocástico (tau-leaping con tau = 1 día) sobre personas enteras.
+
+    Cada sano se contagia con probabilidad 1 - exp(-beta * I / (poblacion + 1)) y cada
+    infectado sale con probabilidad 1 - exp(-(gamma + mu)); las salidas se reparten entre
+    muertos y recuperados en proporción mu / (gamma + mu). Cada reparto es UNA llamada a
+    Generator.binomial sobre todo el lote, nunca un bucle por país.
+    """
+    sanos, infectados = b.enteros()
+
+    # Conteos enteros de partida (por si el estado venía de un integrador continuo)
+    np.rint(S, out=b.contagios)
+    np.copyto(sanos, b.contagios, casting="unsafe")
+    np.rint(I, out=b.contagios)
+    np.copyto(infectados, b.contagios, casting="unsafe")
+    np.rint(R, out=R)
+    np.rint(M, out=M)
+
+    # Probabilidad de contagio por sano (b.contagios guarda ahora los infectados redondeados):
+    # -expm1(-x) = 1 - exp(-x) sin perder precisión con x pequeño
+    np.multiply(beta, b.contagios, out=b.factor)
+    np.divide(b.factor, b.poblacion_mas_uno, out=b.factor)
+    np.negative(b.factor, out=b.factor)
+    np.expm1(b.factor, out=b.factor)
+    np.negative(b.factor, out=b.factor)
+    contagios: np.ndarray = rng.binomial(sanos, b.factor)
+
+    # Salidas de infectados y su reparto entre muertos y recuperados
+    tasa_salida_total: np.ndarray = b.salidas
+    np.add(gamma, mu, out=tasa_salida_total)
+    np.negative(tasa_salida_total, out=b.factor)
+    np.expm1(b.factor, out=b.factor)
+    np.negative(b.factor, out=b.factor)
+    salidas: np.ndarray = rng.binomial(infectados, b.factor)
+
+    np.greater(tasa_salida_total, 0, out=b.mascara)
+    b.factor.fill(0.0)
+    np.divide(mu, tasa_salida_total, out=b.factor, where=b.mascara)
+    muertos: np.ndarray = rng.binomial(salidas, b.factor)
+
+    np.subtract(sanos, contagios, out=S)
+    np.add(infectados, contagios, out=I)
+    I -= salidas
+    R += salidas
+    R -= muertos
+    M += muertos
+    b.evaluaciones += S.size
+
+
+def _rk4(Y: np.ndarray, beta, gamma, mu, subpasos: int, b: BuferesSIRD) -> None:
+    """Un día de Runge-Kutta clásico en `subpasos` pasos iguales"""
+    rk: dict = b.rk(4)
+    K, tmp = rk["k"], rk["tmp"]
+    h: float = 1.0 / subpasos
+
+    for _ in range(subpasos):
+        _derivadas(Y, b.poblacion_mas_uno, beta, gamma, mu, K[0], b.contagios)
+        for etapa, avance in ((1, h / 2), (2, h / 2), (3, h)):
+            np.multiply(K[etapa - 1], avance, out=tmp)
+            tmp += Y
+            _derivadas(tmp, b.poblacion_mas_uno, beta, gamma, mu, K[etapa], b.contagios)
+
+        # Y += h/6 * (k1 + 2 k2 + 2 k3 + k4)
+        np.add(K[1], K[2], out=tmp)
+        tmp *= 2
+        tmp += K[0]
+        tmp += K[3]
+        tmp *= h / 6
+        Y += tmp
+    b.evaluaciones += 4 * subpasos * Y[0].size
+
+
+def _rk45(Y: np.ndarray, beta, gamma, mu, tolerancia: float, b: BuferesSIRD) -> None:
+    """
+    Un día de Dormand-Prince 5(4) con paso adaptativo POR PAÍS: cada país avanza con su
+    propio paso (grande en fases tranquilas, pequeño cerca del pico) hasta completar el día.
+    El paso final de cada día se usa como primer intento del siguiente.
+    """
+    rk: dict = b.rk(len(_DP_A))
+    rk["t"].fill(0.0)
+    _derivadas(Y, b.poblacion_mas_uno, beta, gamma, mu, rk["k"][0], b.contagios)
+    b.evaluaciones += Y[0].size
+    _rk45_bucle(Y, rk, b.poblacion_mas_uno, beta, gamma, mu, tolerancia, b)
+
+
+def _rk45_bucle(Y: np.ndarray, rk: dict, poblacion_mas_uno: np.ndarray, beta, gamma, mu,
+                tolerancia: float, b: BuferesSIRD) -> None:
+    """Pasos de Dormand-Prince hasta que todos los países lleguen a t = 1"""
+    K, tmp, aux, escala = rk["k"], rk["tmp"], rk["aux"], rk["escala"]
+    t, h, h_efectivo, err = rk["t"], rk["h"], rk["h_efectivo"], rk["err"]
+    activo, acepta = rk["activo"], rk["acepta"]
+
+    for _ in range(_RK45_MAX_ITERACIONES):
+        np.less(t, 1.0 - 1e-12, out=activo)
+        n_activos: int = int(np.count_nonzero(activo))
+        if n_activos == 0: return
+
+        # Si ya terminaron casi todos, se sigue solo con los que faltan
+        if n_activos <= activo.size // 4 and activo.size >= _RK45_MINIMO_COMPACTAR:
+            _rk45_compactar(Y, rk, poblacion_mas_uno, beta, gamma, mu, tolerancia, b)
+            return
+
+        # Paso efectivo: sin pasar del final del día, y 0 en los países que ya terminaron
+        np.subtract(1.0, t, out=h_efectivo)
+        np.minimum(h_efectivo, h, out=h_efectivo)
+        np.multiply(h_efectivo, activo, out=h_efectivo)
+
+        # Etapas 2..7: tmp = Y + h * sum(a_ij * k_j)
+        for etapa in range(1, len(_DP_A)):
+            np.copyto(tmp, Y)
+            for j, a in enumerate(_DP_A[etapa]):
+                if a == 0.0: continue
+                np.multiply(K[j], h_efectivo, out=aux)
+                aux *= a
+                tmp += aux
+            _derivadas(tmp, poblacion_mas_uno, beta, gamma, mu, K[etapa], b.contagios)
+        b.evaluaciones += 6 * n_activos
+
+        # Error local = h * sum(e_j * k_j), relativo a tolerancia * (1 + |y|)
+        escala.fill(0.0)
+        for j, e in enumerate(_DP_E):
+            if e == 0.0: continue
+            np.multiply(K[j], e, out=aux)
+            escala += aux
+        np.multiply(escala, h_efectivo, out=escala)
+        np.abs(escala, out=escala)
+        np.abs(Y, out=aux)
+        np.maximum(aux, np.abs(tmp, out=K[1]), out=aux)  # K[1] ya no se usa en este paso
+        aux += 1.0
+        aux *= tolerancia
+        np.divide(escala, aux, out=escala)
+        np.max(escala, axis=0, out=err)
+
+        # Aceptar: la etapa 7 es la solución de orden 5 y su pendiente arranca el paso siguiente
+        np.less_equal(err, 1.0, out=acepta)
+        np.logical_and(acepta, activo, out=acepta)
+        np.copyto(Y, tmp, where=acepta)
+        np.copyto(K[0], K[len(_DP_A) - 1], where=acepta)
+        np.add(t, h_efectivo, out=t, where=acepta)
+
+        # Nuevo paso (aceptados y rechazados): h * 0.9 * err^(-1/5), entre x0.2 y x5
+        np.maximum(err, 1e-10, out=err)
+        np.power(err, -0.2, out=err)
+        err *= 0.9
+        np.clip(err, 0.2, 5.0, out=err)
+        np.multiply(h_efectivo, err, out=err)
+        np.maximum(err, 1e-8, out=err)
+        np.copyto(h, err, where=activo)
+
+    else:
+        # Sin converger en _RK45_MAX_ITERACIONES: el día se termina igual, con rk4 de paso fijo
+        np.less(t, 1.0 - 1e-12, out=activo)
+        if activo.any(): _rk45_rescate(Y, rk, poblacion_mas_uno, beta, gamma, mu, b)
+
+
+def _rk45_rescate(Y: np.ndarray, rk: dict, poblacion_mas_uno: np.ndarray, beta, gamma, mu,
+                  b: BuferesSIRD) -> None:
+    """
+    Completa lo que le falta del día a cada país activo (1 - t) en _RK45_PASOS_RESCATE pasos
+    iguales de rk4: el día queda entero, aunque sin el control de error de rk45. Se cuenta en
+    b.rescates_rk45 y se avisa con warnings (una vez por proceso, no en cada tick ni corrida)
+    """
+    K, tmp, t, activo = rk["k"], rk["tmp"], rk["t"], rk["activo"]
+    n_activos: int = int(np.count_nonzero(activo))
+    b.rescates_rk45 += n_activos
+    warnings.warn(f"⚠️ rk45 no completó el día en {_RK45_MAX_ITERACIONES} iteraciones: "
+                  f"los países que faltan lo terminan con {_RK45_PASOS_RESCATE} pasos fijos de rk4", RuntimeWarning)
+
+    # Paso de cada país (0 en los que ya terminaron, que así no cambian)
+    h: np.ndarray = rk["h_efectivo"]
+    np.subtract(1.0, t, out=h)
+    np.multiply(h, activo, out=h)
+    h /= _RK45_PASOS_RESCATE
+    mitad: np.ndarray = h / 2
+
+    for _ in range(_RK45_PASOS_RESCATE):
+        _derivadas(Y, poblacion_mas_uno, beta, gamma, mu, K[0], b.contagios)
+        for etapa, avance in ((1, mitad), (2, mitad), (3, h)):
+            np.multiply(K[etapa - 1], avance, out=tmp)
+            tmp += Y
+            _derivadas(tmp, poblacion_mas_uno, beta, gamma, mu, K[etapa], b.contagios)
+
+        np.add(K[1], K[2], out=tmp)
+        tmp *= 2
+        tmp += K[0]
+        tmp += K[3]
+        tmp *= h / 6
+        Y += tmp
+    b.evaluaciones += 4 * _RK45_PASOS_RESCATE * n_activos
+    t.fill(1.0)
+
+
+def _rk45_compactar(Y: np.ndarray, rk: dict, poblacion_mas_uno: np.ndarray, beta, gamma, mu,
+                    tolerancia: float, b: BuferesSIRD) -> None:
+    """
+    Copia los países que no han terminado el día a arrays compactos, los termina ahí y
+    devuelve el resultado. Así los últimos pasos (cerca de los picos) no recorren el mundo entero
+    """
+    forma: Tuple[int, ...] = rk["t"].shape
+    idx: np.ndarray = np.flatnonzero(rk["activo"])
+
+    def plano(x):
+        # Tasas escalares se quedan igual; arrays se difunden a la forma del estado y se filtran
+        return x if np.ndim(x) == 0 else np.broadcast_to(x, forma).reshape(-1)[idx]
+
+    sub: BuferesSIRD = BuferesSIRD((len(idx),))
+    sub_rk: dict = sub.rk(len(_DP_A))
+    sub_rk["y"][:] = Y.reshape(4, -1)[:, idx]
+    sub_rk["k"][0] = rk["k"][0].reshape(4, -1)[:, idx]
+    sub_rk["t"][:] = rk["t"].reshape(-1)[idx]
+    sub_rk["h"][:] = rk["h"].reshape(-1)[idx]
+
+    _rk45_bucle(sub_rk["y"], sub_rk, plano(poblacion_mas_uno), plano(beta), plano(gamma), plano(mu), tolerancia, sub)
+
+    Y.reshape(4, -1)[:, idx] = sub_rk["y"]
+    rk["h"].reshape(-1)[idx] = sub_rk["h"]
+    rk["t"].fill(1.0)
+    b.evaluaciones += sub.evaluaciones
+    b.rescates_rk45 += sub.rescates_rk45
+
+
+def _erradicar(I: np.ndarray, R: np.ndarray, M: np.ndarray, gamma, mu,
+               umbral_erradicacion: float, b: BuferesSIRD) -> None:
+    """Barre los residuos de infectados (menos de `umbral_erradicacion`) hacia R y M"""
+    recuperados, muertos = b.recuperados, b.muertos
+    tasa_salida_total: np.ndarray = b.salidas
+    np.add(gamma, mu, out=tasa_salida_total)
+
+    # Solo limpia si hay MENOS de 1 infectado (residuos decimales 0.005, etc)
+    erradicacion: np.ndarray = b.erradicacion
+    np.greater(I, 0, out=erradicacion)
+    np.less(I, umbral_erradicacion, out=b.mascara)
+    np.logical_and(erradicacion, b.mascara, out=erradicacion)
+    np.greater(tasa_salida_total, 0, out=b.mascara)
+    np.logical_and(erradicacion, b.mascara, out=erradicacion)
+
+    if erradicacion.any():
+        # Evitar división por cero (b.mascara sigue siendo tasa_salida_total > 0)
+        prop_recuperacion: np.ndarray = b.factor
+        prop_recuperacion.fill(0.0)
+        np.divide(gamma, tasa_salida_total, out=prop_recuperacion, where=b.mascara)
+
+        np.multiply(I, prop_recuperacion, out=recuperados)
+        np.round(recuperados, 0, out=recuperados)
+        np.subtract(I, recuperados, out=muertos)
+
+        np.add(M, muertos, out=M, where=erradicacion)
+        np.add(R, recuperados, out=R, where=erradicacion)
+        np.copyto(I, 0.0, where=erradicacion)
+
+
+def paso_sird(S: np.ndarray, I: np.ndarray, R: np.ndarray, M: np.ndarray, poblacion: np.ndarray,
+              beta: np.ndarray, gamma: np.ndarray, mu: np.ndarray,
+              dia_actual: int, umbral_erradicacion: float,
+              buferes: Optional[BuferesSIRD] = None, integrador: str = "euler",
+              subpasos: int = 4, tolerancia: float = 1e-6, rng=None) -> None:
+    """
+    Un día del modelo SIRD, modificando S, I, R y M en el mismo array.
+    Las tasas pueden ser escalares o arrays que se difundan contra la forma del estado.
+
+    Integradores:
+        "euler": un paso de un día, con recortes para no pasar de S ni de I (el original)
+        "rk4": Runge-Kutta clásico con `subpasos` pasos fijos por día
+        "rk45": Dormand-Prince con paso adaptativo por país y error relativo `tolerancia`
+        "binomial": tau-leaping estocástico sobre personas enteras, con tiradas de `rng`
+    Los dos de Runge-Kutta no necesitan los recortes: con beta alto siguen siendo estables.
+    El binomial tampoco barre residuos con `umbral_erradicacion`: los países se quedan sin
+    infectados cuando el azar los lleva a 0, así que las islas pequeñas se extinguen solas.
+
+    Todas las operaciones escriben con out= en `buferes`; si no se pasan se crean para
+    esta llamada (mismo resultado, pero pidiendo memoria en cada tick).
+    """
+    b: BuferesSIRD = buferes if buferes is not None else BuferesSIRD(S.shape)
+    np.add(poblacion, 1, out=b.poblacion_mas_uno)
+
+    if integrador == "euler":
+        _euler(S, I, R, M, beta, gamma, mu, b)
+    elif integrador in ("rk4", "rk45"):
+        Y: np.ndarray = b.rk(4 if integrador == "rk4" else len(_DP_A))["y"]
+        for k, compartimento in enumerate((S, I, R, M)):
+            np.copyto(Y[k], compartimento)
+
+        if integrador == "rk4": _rk4(Y, beta, gamma, mu, max(1, int(subpasos)), b)
+        else: _rk45(Y, beta, gamma, mu, tolerancia, b)
+
+        for k, compartimento in enumerate((S, I, R, M)):
+            np.copyto(compartimento, Y[k])
+    elif integrador == "binomial":
+        if rng is None: raise ValueError("El integrador binomial necesita un generador aleatorio (rng)")
+        _binomial(S, I, R, M, beta, gamma, mu, rng, b)
+    else:
+        raise ValueError(f"Integrador desconocido: {integrador} (opciones: {', '.join(INTEGRADORES)})")
+
+    # =============================================================
+    # LIMPIEZA AUTOMÁTICA (Solo aplica DESPUÉS del día 15)
+    # =============================================================
+    if dia_actual > 15 and integrador != "binomial":
+        _erradicar(I, R, M, gamma, mu, umbral_erradicacion, b)
+
+    # Redondeo seguro para visualización
+    for compartimento in (S, I, R, M):
+        np.maximum(compartimento, 0, out=compartimento)
@@ -1,19 +1,87 @@
+import numpy as np
 import pandas as pd
 import sqlite3 as sql
 import os
-from typing import List, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional
+from backend.world_state import WorldState
+from backend.series import SeriesPaises
 
 class Loader():
     """
         Encargada de todas las operaciones de carga, guardado y manejo de datos del Programa
 
+        Usa una sola conexión SQLite durante toda la partida (modo WAL, sin reconectar por
+        tick). La conexión se puede usar desde el hilo de la interfaz y desde el de la
+        simulación; un cerrojo evita que dos hilos la usen a la vez.
     """
 
+    # Ajustes de la conexión: WAL deja leer mientras se escribe y con synchronous=NORMAL
+    # solo se hace fsync al pasar el WAL a la base (checkpoint), no en cada commit
+    PRAGMAS: List[str] = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
     def __init__(self, opt_instance) -> None:
         self.opt = opt_instance  # Carga de Configuraciones desde clase Options
-        
+        self._conexion: Optional[sql.Connection] = None
+        self._cerrojo: threading.RLock = threading.RLock()
+
+        # Contador de días del historial en memoria (None = aún no se leyó de la DB)
+        self._ultimo_dia: Optional[int] = None
+        # Columnas de estado_actual tal como están en la DB (para el INSERT preparado)
+        self._columnas_estado: Optional[List[str]] = None
+        # Últimos valores guardados de las columnas que cambian por tick, por posición del
+        # país (rowid = posición + 1). None = no se sabe qué hay en la DB: toca escribir todo
+        self._guardado: Optional[Dict[str, np.ndarray]] = None
+
+
+    @property
+    def ruta_series(self) -> str:
+        """Carpeta de las series por país de la partida (junto a la DB)"""
+        return os.path.splitext(self.opt.RUTA_DB_CREADA)[0] + "_series"
+
+
+    def _conectar(self) -> sql.Connection:
+        """Conexión de la partida (se abre la primera vez que se usa)"""
+        if self._conexion is None:
+            # isolation_level=None: las transacciones se abren y cierran a mano (ver _transaccion)
+            self._conexion = sql.connect(self.opt.RUTA_DB_CREADA, isolation_level=None, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                self._conexion.execute(pragma)
+        return self._conexion
+
 
-    def _reparar_columnas(self, df: pd.Dataframe) -> pd.Dataframe:
+    @contextmanager
+    def _transaccion(self) -> Iterator[sql.Connection]:
+        """BEGIN ... COMMIT explícito (ROLLBACK si algo falla): o se guarda todo el día o nada"""
+        with self._cerrojo:
+            conn: sql.Connection = self._conectar()
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+    def cerrar(self) -> None:
+        """Cierra la conexión (se vuelve a abrir sola si se usa otra vez)"""
+        with self._cerrojo:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+            self._ultimo_dia = None
+            self._columnas_estado = None
+            self._guardado = None
+
+
+    def _reparar_columnas(self, df: pd.DataFrame) -> pd.DataFrame:
         """Asegura que existan las columnas críticas en el DataFrame"""
         
         columnas_texto: List[str] = ["vuelo", "puerto", "vecinos", "Country Code", "Country Name"]
@@ -31,16 +99,16 @@ class Loader():
 
 
         
-    def cargar_mapa(self, df: pd.Dataframe) -> Dict[str,int]:
+    def cargar_mapa(self, df: pd.DataFrame) -> Dict[str,int]:
         """Toma como parámetro el Dataframe para retornar un Diccionario con los nombres de los
            Países y sus índices mejorando la velocidad de operaciones y búsqueda de los datos
         """
         if "Country Name" not in df.columns: return {}
-        return dict(zip(df["Country Name"], df.index))
+        return dict(zip(df["Country Name"].tolist(), df.index.tolist()))
 
 
     
-    def cargar_df(self) -> pd.Dataframe:
+    def cargar_df(self) -> pd.DataFrame:
         """Carga el archivo csv ubicado en la carpeta backend/data para generar los datos del mundo
         para la simulación"""
         # Intentar cargar CSV
@@ -49,7 +117,7 @@ class Loader():
             return pd.DataFrame(columns=["Country Name", "poblacion", "vuelo", "puerto", "vecinos", "S", "I", "R", "M", "beta", "gamma", "mu"])
 
         try:
-            df: pd.Dataframe = pd.read_csv(self.opt.RUTA_CSV)
+            df: pd.DataFrame = pd.read_csv(self.opt.RUTA_CSV)
         except Exception as e:
             print(f"❌ ERROR leyendo CSV: {e}")
             return pd.DataFrame()
@@ -59,12 +127,13 @@ class Loader():
             if df["poblacion"].dtype == 'object':
                 df["poblacion"]: pd.Series = df["poblacion"].astype(str).str.replace(",", "")
             df["poblacion"]: pd.Series = pd.to_numeric(df["poblacion"], errors='coerce').fillna(0).astype('int64')
-            df : pd.Dataframe = df[df["poblacion"] > 0] # Eliminar países sin gente
+            df : pd.DataFrame = df[df["poblacion"] > 0] # Eliminar países sin gente
         
         if "Country Name" in df.columns:
-            df: pd.Dataframe = df.dropna(subset=["Country Name"])
+            df: pd.DataFrame = df.dropna(subset=["Country Name"])
 
-        df: pd.Dataframe = self._reparar_columnas(df)
+        # Índice posicional: el motor usa la posición de cada país en sus arrays
+        df: pd.DataFrame = self._reparar_columnas(df.reset_index(drop=True))
 
         # Inicialización de Modelo
         df["S"]: pd.Series = df["poblacion"].astype("int64")
@@ -83,16 +152,17 @@ class Loader():
         
         return df
 
-    def cargar_db(self) -> pd.Dataframe:
+    def cargar_db(self) -> pd.DataFrame:
         """Carga base de datos existente"""
         try:
-            conn: sql.Connection = sql.connect(self.opt.RUTA_DB_CREADA)
-            df: pd.Dataframe = pd.read_sql("SELECT * FROM estado_actual", conn)
-            conn.close()
+            with self._cerrojo:
+                df: pd.DataFrame = pd.read_sql("SELECT * FROM estado_actual ORDER BY rowid", self._conectar())
             
             if df.empty: raise Exception("DB Vacía")
+            # Lo que hay en la DB es la referencia para guardar solo los cambios
+            self._recordar(df)
             
-            df: pd.Dataframe = self._reparar_columnas(df)
+            df: pd.DataFrame = self._reparar_columnas(df)
             # Actualizar tasas con los sliders actuales
             df["beta"]: pd.Series = self.opt.beta
             df["gamma"]: pd.Series = self.opt.gamma
@@ -102,15 +172,13 @@ class Loader():
             print("⚠️ DB vacía o corrupta. Recargando desde CSV...")
             return self.cargar_df() # Fallback al CSV
 
-    def historial(self) -> pd.dataframe:
+    def historial(self) -> pd.DataFrame:
         """Carga el Historial desde la Base de datos cargando la tabla historial
             donde tienen los registros de lo que pasó en la simulación ejecutada 
         """
         try:
-            conn: sql.Connect = sql.connect(self.opt.RUTA_DB_CREADA)
-            df: pd.Dataframe = pd.read_sql("SELECT * FROM historial", conn)
-            conn.close()
-            return df
+            with self._cerrojo:
+                return pd.read_sql("SELECT * FROM historial", self._conectar())
         except Exception as e:
             print(e)
             return pd.DataFrame()
@@ -119,88 +187,205 @@ class Loader():
         """Crea la db y la rellena inmediatamente con los datos dentro del archivo CSV"""
         os.makedirs(os.path.dirname(self.opt.RUTA_DB_CREADA), exist_ok=True)
 
-        conn: sql.Connect = sql.connect(self.opt.RUTA_DB_CREADA)
-        cursor: sql.Cursor = conn.cursor()
-        
-        # 1. Crear Tablas
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS estado_actual (
-                'Country Name' TEXT, 'Country Code' TEXT, 'poblacion' INTEGER,
-                'vuelo' TEXT, 'puerto' TEXT, 'vecinos' TEXT,
-                'S' INTEGER, 'I' INTEGER, 'R' INTEGER, 'M' INTEGER,
-                'beta' REAL, 'gamma' REAL, 'mu' REAL
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS historial( 
-                dia TEXT, total_I INTEGER, total_S INTEGER, 
-                total_R INTEGER, total_M INTEGER, 
-                Primer_pais TEXT, Paises_Infectados INTEGER
-            )
-        """)
-        
-        # 2. VERIFICAR SI ESTÁ VACÍA Y LLENARLA
-        cursor.execute("SELECT count(*) FROM estado_actual")
-        count: Optional[tuple] = cursor.fetchone()[0]
-        
-        exito = False
-        if count == 0:
-            df: pd.Dataframe = self.cargar_df()
-            if not df.empty:
-                df.to_sql("estado_actual", conn, if_exists="replace", index=False)
-                exito = True
+        with self._transaccion() as conn:
+            cursor: sql.Cursor = conn.cursor()
+
+            # 1. Crear Tablas
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS estado_actual (
+                    'Country Name' TEXT, 'Country Code' TEXT, 'poblacion' INTEGER,
+                    'vuelo' TEXT, 'puerto' TEXT, 'vecinos' TEXT,
+                    'S' INTEGER, 'I' INTEGER, 'R' INTEGER, 'M' INTEGER,
+                    'beta' REAL, 'gamma' REAL, 'mu' REAL
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS historial( 
+                    dia TEXT, total_I INTEGER, total_S INTEGER, 
+                    total_R INTEGER, total_M INTEGER, 
+                    Primer_pais TEXT, Paises_Infectados INTEGER
+                )
+            """)
+
+            # 2. VERIFICAR SI ESTÁ VACÍA Y LLENARLA
+            cursor.execute("SELECT count(*) FROM estado_actual")
+            count: Optional[tuple] = cursor.fetchone()[0]
+
+            exito = False
+            if count == 0:
+                df: pd.DataFrame = self.cargar_df()
+                if not df.empty:
+                    self._escribir_estado(conn, df)
+                    exito = True
+                else:
+                    print("❌ FATAL: El CSV está vacío o no se pudo leer.")
             else:
-                print("❌ FATAL: El CSV está vacío o no se pudo leer.")
-        else:
-            exito = False # Ya existía
+                exito = False # Ya existía
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            cursor.close()
         return exito
 
 
+    @staticmethod
+    def _tipo_sql(serie: pd.Series) -> str:
+        """Tipo de columna SQLite equivalente al dtype (los mismos que elegía DataFrame.to_sql)"""
+        if serie.dtype.kind in "iub": return "INTEGER"
+        if serie.dtype.kind == "f": return "REAL"
+        return "TEXT"
+
+
+    # Columnas de estado_actual que cambian durante la partida (las demás no se reescriben)
+    COLUMNAS_DINAMICAS: List[str] = WorldState.COLUMNAS_COMPARTIMENTOS + WorldState.COLUMNAS_COOLDOWN + WorldState.COLUMNAS_TASAS
+
+    def _recordar(self, datos: pd.DataFrame) -> None:
+        """Copia (en float64, para comparar sin perder decimales) de las columnas dinámicas tal como quedaron en la DB"""
+        self._guardado = {c: datos[c].to_numpy(dtype=np.float64, copy=True) for c in self.COLUMNAS_DINAMICAS if c in datos.columns}
+
+
+    def _escribir_estado(self, conn: sql.Connection, datos: pd.DataFrame) -> None:
+        """
+        Reescribe estado_actual con un INSERT preparado (executemany) dentro de la transacción
+        en curso. Si las columnas del DataFrame no coinciden con las de la tabla (primera vez,
+        o CSV con otras columnas), la tabla se recrea una sola vez con esas columnas
+        """
+        columnas: List[str] = [str(c) for c in datos.columns]
+        if self._columnas_estado is None:
+            self._columnas_estado = [fila[1] for fila in conn.execute("PRAGMA table_info(estado_actual)")]
+
+        if self._columnas_estado != columnas:
+            conn.execute("DROP TABLE IF EXISTS estado_actual")
+            definicion: str = ", ".join(f'"{c}" {self._tipo_sql(datos[c])}' for c in columnas)
+            conn.execute(f"CREATE TABLE estado_actual ({definicion})")
+            self._columnas_estado = columnas
+        else:
+            conn.execute("DELETE FROM estado_actual")
+
+        # .tolist() da tipos de Python (sqlite3 no acepta los enteros de NumPy). El rowid es
+        # la posición del país + 1, para poder actualizar filas sueltas después
+        valores: List[list] = [list(range(1, len(datos) + 1))] + [datos[c].tolist() for c in datos.columns]
+        marcadores: str = ", ".join("?" * (len(columnas) + 1))
+        nombres: str = ", ".join(f'"{c}"' for c in columnas)
+        conn.executemany(f"INSERT INTO estado_actual (rowid, {nombres}) VALUES ({marcadores})", zip(*valores))
+        self._recordar(datos)
+
+
+    def _actualizar_estado(self, conn: sql.Connection, datos: pd.DataFrame) -> int:
+        """
+        Guarda solo los países cuyas columnas dinámicas cambiaron desde el último guardado
+        (UPDATE ... WHERE rowid=?), dentro de la transacción en curso. Si no hay referencia
+        o la tabla no tiene las mismas columnas, reescribe la tabla entera
+
+        Returns:
+            Filas escritas
+        """
+        columnas: List[str] = [str(c) for c in datos.columns]
+        if self._columnas_estado is None:
+            self._columnas_estado = [fila[1] for fila in conn.execute("PRAGMA table_info(estado_actual)")]
+        anterior: Optional[Dict[str, np.ndarray]] = self._guardado
+        if (anterior is None or self._columnas_estado != columnas
+                or any(len(v) != len(datos) for v in anterior.values())
+                or set(anterior) != {c for c in self.COLUMNAS_DINAMICAS if c in datos.columns}):
+            self._escribir_estado(conn, datos)
+            return len(datos)
+
+        # Filas con algún cambio; en el UPDATE entran solo las columnas que cambiaron en alguna
+        nuevos: Dict[str, np.ndarray] = {}
+        cambiadas: np.ndarray = np.zeros(len(datos), dtype=bool)
+        for c in anterior:
+            valores: np.ndarray = datos[c].to_numpy(dtype=np.float64)
+            distintas: np.ndarray = valores != anterior[c]
+            if distintas.any():
+                nuevos[c] = valores
+                cambiadas |= distintas
+        filas: np.ndarray = np.flatnonzero(cambiadas)
+        if len(filas) == 0: return 0
+
+        asignaciones: str = ", ".join(f'"{c}" = ?' for c in nuevos)
+        valores: List[list] = [nuevos[c][filas].tolist() for c in nuevos] + [(filas + 1).tolist()]
+        conn.executemany(f"UPDATE estado_actual SET {asignaciones} WHERE rowid = ?", zip(*valores))
+        for c, columna in nuevos.items():
+            anterior[c][filas] = columna[filas]
+        return len(filas)
+
 
-    def guardar_estados(self, datos: pd.Dataframe , pais: str) -> None:
+
+    @staticmethod
+    def fila_historial(datos, pais: str, dia: Optional[int] = None) -> tuple:
         """
-        Guarda todos los datos en la base de datos
+        Fila de la tabla historial para un día
+
+        Args:
+            datos: DataFrame del mundo o diccionario de arrays con al menos S, I, R y M
+            pais: Primer país donde inició el virus
+            dia: Día de la fila (None = el último día guardado + 1)
+
+        Returns:
+            (total_S, total_R, total_I, total_M, dia, Primer_pais, Paises_Infectados)
+        """
+        # CONVERSIÓN EXPLÍCITA A FLOAT PARA EVITAR OVERFLOW EN 32 BITS
+        totales: List[float] = [float(np.asarray(datos[c], dtype=np.float64).sum()) for c in ("S", "R", "I", "M")]
+        return (*totales, dia, pais, int((np.asarray(datos["I"]) > 0).sum()))
+
+
+    def guardar_estados(self, datos: pd.DataFrame , pais: str, dia: Optional[int] = None) -> None:
+        """
+        Guarda el día en la base de datos: una fila de historial y, en estado_actual, solo
+        los países que cambiaron desde el último guardado
 
         Args:
             datos: 
                 Dataframe obtenido después de ejecutar la lógica del Modelo SIRD para avanzar un día
             pais:
                 String con el nombre del primer país donde inició el virus
+            dia:
+                Día que se registra en el historial. Si no se indica, se usa el último
+                día guardado + 1 (un guardado por día)
+        """
+        self.guardar_lote([self.fila_historial(datos, pais, dia)], datos)
+
+
+    def guardar_lote(self, filas: List[tuple], datos: pd.DataFrame) -> bool:
         """
+        Guarda varios días en UNA transacción: todas sus filas de historial y el estado del
+        último. Si algo falla no se guarda ninguno, así que la DB siempre queda en el último
+        día completo
+
+        Args:
+            filas: Filas de historial (ver fila_historial), en orden de día
+            datos: Estado del mundo del último día del lote
 
+        Returns:
+            True si se guardó
+        """
         try:
-            conn: sql.Connect = sql.connect(self.opt.RUTA_DB_CREADA)
-            
-            # Historial
-            ultimo_dia: int = 0
+            with self._transaccion() as conn:
+                # Historial: el último día se lee de la DB una sola vez y luego se lleva en memoria
+                if self._ultimo_dia is None and any(fila[4] is None for fila in filas):
+                    ultima: Optional[tuple] = conn.execute("SELECT dia FROM historial ORDER BY ROWID DESC LIMIT 1").fetchone()
+                    self._ultimo_dia = int(ultima[0]) if ultima else 0
 
-            try:
-                res: pd.Dataframe = pd.read_sql_query("SELECT dia FROM historial ORDER BY ROWID DESC LIMIT 1", conn)
-                if not res.empty: ultimo_dia: int = int(res.iloc[0, 0])
-            except: pass
-            
-            # CONVERSIÓN EXPLÍCITA A FLOAT PARA EVITAR OVERFLOW EN 32 BITS
-            dicc: Dict[str,float] = {
-                "total_S": float(datos["S"].astype(float).sum()), 
-                "total_R": float(datos["R"].astype(float).sum()),            
-                "total_I": float(datos["I"].astype(float).sum()), 
-                "total_M": float(datos["M"].astype(float).sum()),
-                "dia": ultimo_dia + 1, 
-                "Primer_pais": pais,
-                "Paises_Infectados": int((datos["I"] > 0).sum())
-            }
-            
-            pd.DataFrame([dicc]).to_sql("historial", conn, if_exists="append", index=False)         
-            datos.to_sql("estado_actual", conn, if_exists="replace", index=False)         
-            conn.close()
+                ultimo_dia: Optional[int] = self._ultimo_dia
+                completas: List[tuple] = []
+                for fila in filas:
+                    ultimo_dia = (ultimo_dia + 1) if fila[4] is None else int(fila[4])
+                    completas.append((*fila[:4], ultimo_dia, *fila[5:]))
+
+                conn.executemany(
+                    "INSERT INTO historial (total_S, total_R, total_I, total_M, dia, Primer_pais, Paises_Infectados) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    completas,
+                )
+                self._actualizar_estado(conn, datos)
+            self._ultimo_dia = ultimo_dia
+            return True
         except Exception as e:
-            if conn: conn.close()
+            # Tras un ROLLBACK la tabla puede no ser la que se creía: se vuelve a mirar y la
+            # próxima vez se escribe entera
+            self._columnas_estado = None
+            self._guardado = None
             print(f"Error guardando: {e}")
+            return False
 
 
 
@@ -208,7 +393,13 @@ class Loader():
         """
         Borra la base de datos al reiniciar la simulación desde el menú del programa
         """
-        
+        # Primero se suelta la conexión; con WAL también quedan los archivos -wal y -shm
+        self.cerrar()
+        SeriesPaises.borrar(self.ruta_series)
+        for extra in ("-wal", "-shm"):
+            try: os.remove(self.opt.RUTA_DB_CREADA + extra)
+            except OSError: pass
+
         if os.path.exists(self.opt.RUTA_DB_CREADA):
             try:
                 os.remove(self.opt.RUTA_DB_CREADA)
@@ -0,0 +1,253 @@
+"""
+Monte Carlo en paralelo: reparte corridas independientes del Engine entre todos los núcleos
+
+El mundo (CSV ya interpretado, grafo de fronteras y máscaras de transporte) se carga una
+sola vez en el proceso principal y se publica en memoria compartida; cada proceso trabajador
+se adjunta a esos bloques sin volver a leer ni interpretar nada.
+
+Uso:
+    python -m backend.montecarlo --corridas 1000 --procesos 32 --dias 365 --semilla 42
+"""
+from backend.options_base import HeadlessOptions
+from backend.loader import Loader
+from backend.grafo_vecinos import GrafoVecinos
+from backend.movilidad import MatrizMovilidad, matrices_gravedad
+from backend.sir_model import SIR
+from backend.engine import Engine
+from backend.kernels import INTEGRADORES
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+
+class MundoCompartido:
+    """
+    Datos estáticos del mundo publicados en bloques de memoria compartida
+
+    Los arrays numéricos viven en shared_memory (sin copias entre procesos); los nombres y
+    códigos viajan una sola vez por trabajador, en el inicializador del pool.
+    """
+
+    def __init__(self, nombres: List[str], codigos: List[str], arrays: Dict[str, np.ndarray],
+                 bloques: Dict[str, shared_memory.SharedMemory], propietario: bool) -> None:
+        self.nombres: List[str] = nombres
+        self.codigos: List[str] = codigos
+        self.arrays: Dict[str, np.ndarray] = arrays
+        self._bloques: Dict[str, shared_memory.SharedMemory] = bloques
+        self._propietario: bool = propietario
+        self._df_base: Optional[pd.DataFrame] = None
+
+        self.grafo: GrafoVecinos = GrafoVecinos(arrays["indptr"], arrays["indices"])
+        self.mascara_vuelos: np.ndarray = arrays["mascara_vuelos"]
+        self.mascara_puertos: np.ndarray = arrays["mascara_puertos"]
+
+        # Matrices de movilidad (solo si se publicaron, con MODO_LOGISTICA = "gravedad")
+        self.movilidad: Optional[Dict[str, MatrizMovilidad]] = None
+        if "vuelo_origen" in arrays:
+            n: int = len(arrays["poblacion"])
+            self.movilidad = {
+                tipo: MatrizMovilidad.desde_arrays(n, {campo: arrays[f"{tipo}_{campo}"] for campo in ("origen", "tasa", "destinos", "inicio")})
+                for tipo in ("vuelo", "puerto")
+            }
+
+
+    @classmethod
+    def crear(cls, opt) -> "MundoCompartido":
+        """Carga el CSV una vez, compila grafo y máscaras y los copia a memoria compartida"""
+        df: pd.DataFrame = Loader(opt).cargar_df()
+        mapa: Dict[str, int] = Loader(opt).cargar_mapa(df)
+        grafo: GrafoVecinos = GrafoVecinos.desde_df(df, mapa)
+
+        origen: Dict[str, np.ndarray] = {
+            "poblacion": df["poblacion"].to_numpy(dtype=np.int64),
+            "indptr": grafo.indptr,
+            "indices": grafo.indices,
+            "mascara_vuelos": SIR.mascara_transporte(df, "vuelo"),
+            "mascara_puertos": SIR.mascara_transporte(df, "puerto"),
+        }
+        if opt.MODO_LOGISTICA == "gravedad":
+            matrices: Dict[str, MatrizMovilidad] = matrices_gravedad(
+                origen["poblacion"], origen["mascara_vuelos"], origen["mascara_puertos"], opt)
+            for tipo, matriz in matrices.items():
+                origen.update({f"{tipo}_{campo}": valores for campo, valores in matriz.arrays().items()})
+
+        arrays: Dict[str, np.ndarray] = {}
+        bloques: Dict[str, shared_memory.SharedMemory] = {}
+        for campo, valores in origen.items():
+            bloque = shared_memory.SharedMemory(create=True, size=max(valores.nbytes, 1))
+            arrays[campo] = np.ndarray(valores.shape, dtype=valores.dtype, buffer=bloque.buf)
+            arrays[campo][:] = valores
+            bloques[campo] = bloque
+
+        codigos: List[str] = df["Country Code"].astype(str).tolist() if "Country Code" in df.columns else [""] * len(df)
+        return cls(df["Country Name"].astype(str).tolist(), codigos, arrays, bloques, propietario=True)
+
+
+    def descriptor(self) -> Dict:
+        """Lo mínimo para adjuntarse desde otro proceso (nombres de bloque, formas y tipos)"""
+        return {
+            "nombres": self.nombres,
+            "codigos": self.codigos,
+            "arrays": {campo: (self._bloques[campo].name, a.shape, a.dtype.str) for campo, a in self.arrays.items()},
+        }
+
+
+    @classmethod
+    def adjuntar(cls, descriptor: Dict) -> "MundoCompartido":
+        """Crea una vista de solo lectura sobre los bloques publicados por otro proceso"""
+        arrays: Dict[str, np.ndarray] = {}
+        bloques: Dict[str, shared_memory.SharedMemory] = {}
+        for campo, (nombre, forma, tipo) in descriptor["arrays"].items():
+            try:
+                bloque = shared_memory.SharedMemory(name=nombre, track=False)
+            except TypeError:
+                # Python < 3.13 no tiene track=False
+                bloque = shared_memory.SharedMemory(name=nombre)
+            arrays[campo] = np.ndarray(forma, dtype=np.dtype(tipo), buffer=bloque.buf)
+            arrays[campo].flags.writeable = False
+            bloques[campo] = bloque
+        return cls(descriptor["nombres"], descriptor["codigos"], arrays, bloques, propietario=False)
+
+
+    def dataframe(self) -> pd.DataFrame:
+        """DataFrame inicial del mundo (una copia nueva por corrida, sin tocar texto ni CSV)"""
+        if self._df_base is None:
+            poblacion: np.ndarray = np.array(self.arrays["poblacion"])
+            n: int = len(poblacion)
+            self._df_base = pd.DataFrame({
+                "Country Name": self.nombres,
+                "Country Code": self.codigos,
+                "poblacion": poblacion,
+                "S": poblacion, "I": np.zeros(n), "R": np.zeros(n), "M": np.zeros(n),
+                "cooldown_vuelo": np.zeros(n, dtype=np.int64),
+                "cooldown_puerto": np.zeros(n, dtype=np.int64),
+                "cooldown_frontera": np.zeros(n, dtype=np.int64),
+            })
+        return self._df_base.copy()
+
+
+    def cerrar(self) -> None:
+        """Suelta los bloques; el proceso que los creó además los elimina"""
+        self.arrays.clear()
+        for bloque in self._bloques.values():
+            bloque.close()
+            if self._propietario: bloque.unlink()
+        self._bloques.clear()
+
+
+# Mundo adjunto en cada proceso trabajador (se asigna en _inicializar_trabajador)
+_MUNDO: Optional[MundoCompartido] = None
+
+
+def _inicializar_trabajador(descriptor: Dict) -> None:
+    global _MUNDO
+    _MUNDO = MundoCompartido.adjuntar(descriptor)
+
+
+def _correr(tarea: Tuple[int, np.random.SeedSequence, Dict, int, int]) -> Dict:
+    """Una corrida completa dentro de un proceso trabajador"""
+    corrida, semilla, valores, dias, cada = tarea
+
+    motor: Engine = Engine(HeadlessOptions(**valores, PERSISTIR=False), mundo=_MUNDO, semilla=semilla)
+    resultado: Dict = motor.avanzar_dias(dias, sample_every=cada, incluir_datos=False)
+
+    return {
+        "corrida": corrida,
+        "status": resultado["status"],
+        "muestras": resultado["muestras"],
+        "final": {col: getattr(motor.estado, col).copy() for col in ("S", "I", "R", "M")},
+    }
+
+
+def montecarlo(corridas: int, dias: int, valores: Optional[Dict] = None, procesos: Optional[int] = None,
+               semilla: Optional[int] = None, cada: int = 1) -> Dict:
+    """
+    Ejecuta `corridas` simulaciones independientes repartidas en `procesos` procesos
+
+    Args:
+        corridas: Número de corridas
+        dias: Máximo de días por corrida
+        valores: Opciones a sobrescribir en HeadlessOptions (beta, PAIS_INICIO, ...)
+        procesos: Procesos trabajadores (por defecto, todos los núcleos)
+        semilla: Semilla raíz; cada corrida recibe un hijo independiente de su SeedSequence
+        cada: Cada cuántos días se registran los totales
+
+    Returns:
+        {"totales": DataFrame columnar (corrida, dia, S, I, R, M, paises_infectados),
+         "finales": {"S": (corridas, países), ...}, "status": [...], "nombres": [...]}
+    """
+    valores = dict(valores or {})
+    valores.pop("PERSISTIR", None)
+    valores.pop("SEMILLA", None)
+    semillas: List[np.random.SeedSequence] = np.random.SeedSequence(semilla).spawn(corridas)
+    tareas = [(i, semillas[i], valores, dias, cada) for i in range(corridas)]
+
+    mundo: MundoCompartido = MundoCompartido.crear(HeadlessOptions(**valores, PERSISTIR=False))
+    try:
+        procesos = procesos or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                 initargs=(mundo.descriptor(),)) as pool:
+            resultados: List[Dict] = list(pool.map(_correr, tareas, chunksize=max(1, corridas // (procesos * 4))))
+        nombres: List[str] = list(mundo.nombres)
+    finally:
+        mundo.cerrar()
+
+    columnas: List[str] = ["dia", "S", "I", "R", "M", "paises_infectados"]
+    totales: pd.DataFrame = pd.DataFrame({
+        "corrida": np.concatenate([np.full(len(r["muestras"]["dia"]), r["corrida"]) for r in resultados]),
+        **{col: np.concatenate([r["muestras"][col] for r in resultados]) for col in columnas},
+    })
+
+    return {
+        "totales": totales,
+        "finales": {col: np.vstack([r["final"][col] for r in resultados]) for col in ("S", "I", "R", "M")},
+        "status": [r["status"] for r in resultados],
+        "nombres": nombres,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo SIRD en paralelo")
+    parser.add_argument("--corridas", type=int, default=100)
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, todos los núcleos")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--cada", type=int, default=1, help="Registrar los totales cada N días")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--salida", default="resultados_mc")
+    parser.add_argument("--pais", default=None)
+    parser.add_argument("--beta", type=float, default=None)
+    parser.add_argument("--gamma", type=float, default=None)
+    parser.add_argument("--mu", type=float, default=None)
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--integrador", choices=INTEGRADORES, default=None)
+    parser.add_argument("--logistica", choices=("global", "gravedad"), default=None)
+    args = parser.parse_args(argv)
+
+    valores: Dict = {}
+    if args.pais: valores["PAIS_INICIO"] = args.pais
+    if args.csv: valores["RUTA_CSV"] = args.csv
+    if args.integrador: valores["INTEGRADOR"] = args.integrador
+    if args.logistica: valores["MODO_LOGISTICA"] = args.logistica
+    for tasa in ("beta", "gamma", "mu"):
+        if getattr(args, tasa) is not None: valores[tasa] = getattr(args, tasa)
+
+    t0: float = time.perf_counter()
+    resultado: Dict = montecarlo(args.corridas, args.dias, valores, args.procesos, args.semilla, args.cada)
+    duracion: float = time.perf_counter() - t0
+
+    os.makedirs(args.salida, exist_ok=True)
+    resultado["totales"].to_csv(os.path.join(args.salida, "totales.csv"), index=False, encoding="utf-8-sig")
+    np.savez_compressed(os.path.join(args.salida, "finales.npz"), nombres=np.array(resultado["nombres"]),
+                        **resultado["finales"])
+
+    print(f"🏁 {args.corridas} corridas en {duracion:.2f} s ({duracion * 1000 / max(args.corridas, 1):.1f} ms/corrida)")
+    print(f"💾 Resultados en {os.path.abspath(args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+from typing import Dict
+
+
+class MatrizMovilidad:
+    """
+    Matriz origen-destino dispersa de viajeros diarios (vuelos o barcos)
+
+    Se guarda ordenada por DESTINO: las rutas que llegan al país destinos[k] son
+    origen[inicio[k]:inicio[k+1]], con tasa[e] viajeros por día. Así las llegadas de cada
+    destino salen de una suma por segmentos y el coste de cada tick es proporcional al
+    número de rutas, no al de países.
+    """
+
+    def __init__(self, n: int, origen: np.ndarray, tasa: np.ndarray, destinos: np.ndarray, inicio: np.ndarray) -> None:
+        self.n: int = n
+        self.origen: np.ndarray = origen
+        self.tasa: np.ndarray = tasa
+        self.destinos: np.ndarray = destinos
+        self.inicio: np.ndarray = inicio
+        self.nnz: int = len(origen)
+
+        # Fin del segmento de cada destino (para buscar el origen de cada importación)
+        self.fin: np.ndarray = np.r_[inicio[1:], len(origen)].astype(np.int64)
+
+
+    @classmethod
+    def gravedad(cls, poblacion: np.ndarray, mascara: np.ndarray, rutas_por_nodo: int = 30,
+                 viajeros_pct: float = 2e-4, exponente_destino: float = 1.0, semilla: int = 0) -> "MatrizMovilidad":
+        """
+        Modelo de gravedad sin distancias (el CSV no tiene coordenadas): cada país conectado
+        envía viajeros_pct * poblacion viajeros al día, repartidos entre `rutas_por_nodo`
+        destinos conectados elegidos con probabilidad proporcional a poblacion ** exponente_destino.
+        El flujo esperado i -> j queda proporcional a P_i * P_j ** exponente_destino.
+
+        Las rutas se sortean una sola vez con `semilla`: la red es parte del mundo, no de
+        la partida, así que no consume números del generador de la simulación.
+        """
+        n: int = len(poblacion)
+        nodos: np.ndarray = np.flatnonzero(mascara & (poblacion > 0))
+        if len(nodos) < 2 or rutas_por_nodo <= 0:
+            return cls(n, *(np.zeros(0, dtype=t) for t in (np.int64, np.float64, np.int64, np.int64)))
+
+        rng: np.random.Generator = np.random.default_rng(semilla)
+        peso: np.ndarray = np.asarray(poblacion[nodos], dtype=np.float64) ** exponente_destino
+        rutas: int = min(rutas_por_nodo, len(nodos) - 1)
+
+        # Destinos con reemplazo (búsqueda en la acumulada): O(rutas * log nodos) por país
+        acumulado: np.ndarray = np.cumsum(peso)
+        sorteo: np.ndarray = rng.random((len(nodos), rutas)) * acumulado[-1]
+        destino_local: np.ndarray = np.minimum(np.searchsorted(acumulado, sorteo, side="right"), len(nodos) - 1)
+        origen_local: np.ndarray = np.repeat(np.arange(len(nodos)), rutas)
+        destino_local = destino_local.reshape(-1)
+
+        # Sin vuelos a uno mismo; las rutas repetidas se funden sumando su tráfico
+        propias: np.ndarray = origen_local != destino_local
+        origen_local, destino_local = origen_local[propias], destino_local[propias]
+        clave: np.ndarray = destino_local * len(nodos) + origen_local
+        clave, multiplicidad = np.unique(clave, return_counts=True)
+        destino_local, origen_local = np.divmod(clave, len(nodos))
+
+        viajeros: np.ndarray = viajeros_pct * np.asarray(poblacion[nodos], dtype=np.float64)
+        tasa: np.ndarray = viajeros[origen_local] * multiplicidad / rutas
+
+        # np.unique deja las rutas ordenadas por destino: cada destino es un segmento contiguo
+        destinos_local, inicio = np.unique(destino_local, return_index=True)
+        return cls(n, nodos[origen_local].astype(np.int64), tasa, nodos[destinos_local].astype(np.int64),
+                   inicio.astype(np.int64))
+
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays que definen la matriz (para publicarlos en memoria compartida)"""
+        return {"origen": self.origen, "tasa": self.tasa, "destinos": self.destinos, "inicio": self.inicio}
+
+
+    @classmethod
+    def desde_arrays(cls, n: int, arrays: Dict[str, np.ndarray]) -> "MatrizMovilidad":
+        return cls(n, arrays["origen"], arrays["tasa"], arrays["destinos"], arrays["inicio"])
+
+
+    def aportes(self, prevalencia: np.ndarray) -> np.ndarray:
+        """
+        Viajeros infectados por ruta y día (corridas, rutas): prevalencia del origen * tasa
+
+        Args:
+            prevalencia: (corridas, países) fracción de infectados de cada país
+        """
+        return prevalencia[:, self.origen] * self.tasa
+
+
+    def llegadas(self, aportes: np.ndarray) -> np.ndarray:
+        """Viajeros infectados que llegan a cada destino (corridas, destinos): matriz^T @ prevalencia"""
+        return np.add.reduceat(aportes, self.inicio, axis=1)
+
+
+    def origen_de(self, aportes: np.ndarray, corridas: np.ndarray, k: np.ndarray,
+                  azar: np.ndarray) -> np.ndarray:
+        """
+        Sortea de qué país vino cada importación (corrida, destino k), con probabilidad
+        proporcional a lo que aporta cada ruta entrante. Es una búsqueda binaria vectorizada
+        sobre el acumulado de cada segmento, así que no hay bucles por importación.
+        `azar` trae una uniforme en [0, 1) por importación.
+        """
+        acumulado: np.ndarray = np.cumsum(aportes, axis=1)
+        lo: np.ndarray = self.inicio[k].copy()
+        hi: np.ndarray = self.fin[k] - 1
+        base: np.ndarray = np.where(lo > 0, acumulado[corridas, np.maximum(lo - 1, 0)], 0.0)
+        objetivo: np.ndarray = base + azar * (acumulado[corridas, hi] - base)
+
+        # Primera ruta del segmento cuyo acumulado supera el objetivo
+        while True:
+            pendientes: np.ndarray = lo < hi
+            if not pendientes.any(): break
+            medio: np.ndarray = (lo + hi) // 2
+            derecha: np.ndarray = pendientes & (acumulado[corridas, medio] <= objetivo)
+            izquierda: np.ndarray = pendientes & ~derecha
+            lo = np.where(derecha, medio + 1, lo)
+            hi = np.where(izquierda, medio, hi)
+
+        return self.origen[lo]
+
+
+
+def matrices_gravedad(poblacion: np.ndarray, mascara_vuelos: np.ndarray, mascara_puertos: np.ndarray,
+                      opt) -> Dict[str, MatrizMovilidad]:
+    """Matrices de vuelos y de barcos según las opciones (RUTAS_POR_*, VIAJEROS_DIARIOS_*)"""
+    return {
+        "vuelo": MatrizMovilidad.gravedad(poblacion, mascara_vuelos, opt.RUTAS_POR_AEROPUERTO,
+                                          opt.VIAJEROS_DIARIOS_VUELO, semilla=0),
+        "puerto": MatrizMovilidad.gravedad(poblacion, mascara_puertos, opt.RUTAS_POR_PUERTO,
+                                           opt.VIAJEROS_DIARIOS_PUERTO, semilla=1),
+    }
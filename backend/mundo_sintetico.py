@@ -0,0 +1,239 @@
+"""
+Generador de mundos sintéticos con el mismo esquema que backend/data/poblacion.csv
+
+Sirve para modelar regiones subnacionales y para medir cómo escala el motor con miles o
+millones de regiones. El mapa se construye sobre una cuadrícula de píxeles:
+
+1. Ruido suave en tres escalas decide qué píxeles son tierra y cuáles mar, lo que da
+   continentes, costas irregulares y archipiélagos.
+2. Cada región nace en un píxel de tierra al azar y crece hacia sus vecinos a su propia
+   velocidad, así que hay regiones grandes y pequeñas.
+3. Dos regiones son vecinas si tienen píxeles contiguos. El grafo resultante es plano,
+   con muchas regiones de 2-6 vecinos y una cola de regiones grandes con muchos más, como
+   en el mapa real. Una fracción configurable de regiones queda como isla, sin fronteras.
+
+Uso:
+    python -m backend.mundo_sintetico --regiones 100000 --salida mundo_100k.csv
+    python -m backend.run --csv mundo_100k.csv --pais "Región 1"
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+
+
+# Textos de las columnas de transporte (SIR.mascara_transporte los reconoce igual que los del CSV real)
+PUERTO_SI: str = "Acceso a Océano/Mar"
+PUERTO_NO: str = "Sin acceso directo (Uso de puertos vecinos)"
+VUELO_SI: str = "Accesible (Rutas Internacionales)"
+VUELO_NO: str = "Sin aeropuerto internacional"
+SIN_VECINOS: str = "Ninguno (Isla/Aislado)"
+
+
+def _ruido(rng: np.random.Generator, alto: int, ancho: int, celdas: int) -> np.ndarray:
+    """Ruido suave: una rejilla gaussiana de `celdas` filas interpolada a (alto, ancho)"""
+    rejilla: np.ndarray = rng.standard_normal((celdas + 1, 2 * celdas + 1)).astype(np.float32)
+
+    y: np.ndarray = np.linspace(0, celdas, alto, endpoint=False, dtype=np.float32)
+    x: np.ndarray = np.linspace(0, 2 * celdas, ancho, endpoint=False, dtype=np.float32)
+    y0, x0 = y.astype(np.int64), x.astype(np.int64)
+    fy, fx = (y - y0)[:, None], (x - x0)[None, :]
+
+    arriba: np.ndarray = rejilla[y0][:, x0] * (1 - fx) + rejilla[y0][:, x0 + 1] * fx
+    abajo: np.ndarray = rejilla[y0 + 1][:, x0] * (1 - fx) + rejilla[y0 + 1][:, x0 + 1] * fx
+    return arriba * (1 - fy) + abajo * fy
+
+
+def _desplazar(matriz: np.ndarray, dy: int, dx: int, relleno) -> np.ndarray:
+    """Valor del vecino en la dirección (dy, dx) de cada píxel; fuera del mapa vale `relleno`"""
+    salida: np.ndarray = np.full_like(matriz, relleno)
+    alto, ancho = matriz.shape
+    salida[max(-dy, 0):alto - max(dy, 0), max(-dx, 0):ancho - max(dx, 0)] = \
+        matriz[max(dy, 0):alto + min(dy, 0), max(dx, 0):ancho + min(dx, 0)]
+    return salida
+
+
+_DIRECCIONES: List[Tuple[int, int]] = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def _crecer_regiones(tierra: np.ndarray, semillas: np.ndarray, velocidad: np.ndarray,
+                     rng: np.random.Generator) -> np.ndarray:
+    """
+    Reparte la tierra entre las regiones: en cada vuelta, cada píxel del borde de una región
+    intenta quedarse con cada vecino libre, con probabilidad igual a la velocidad de su región.
+    Solo se recorren los píxeles del frente de avance, no el mapa entero
+
+    Returns:
+        Matriz de etiquetas (-1 = mar o tierra que no alcanzó ninguna región)
+    """
+    alto, ancho = tierra.shape
+    # Marco de un píxel de mar alrededor: así los vecinos de cualquier píxel son índices válidos
+    libre: np.ndarray = np.pad(tierra, 1, constant_values=False).ravel()
+    etiquetas: np.ndarray = np.full(libre.shape, -1, dtype=np.int32)
+    saltos: np.ndarray = np.array([-1, 1, -(ancho + 2), ancho + 2])
+
+    frente: np.ndarray = (semillas // ancho + 1) * (ancho + 2) + semillas % ancho + 1
+    etiquetas[frente] = np.arange(len(semillas), dtype=np.int32)
+    libre[frente] = False
+
+    while len(frente):
+        nuevos: List[np.ndarray] = []
+        for salto in rng.permutation(saltos):
+            destino: np.ndarray = frente + salto
+            origen: np.ndarray = frente[libre[destino]]
+            destino = origen + salto
+            region: np.ndarray = etiquetas[origen]
+            ganan: np.ndarray = rng.random(len(origen)) < velocidad[region]
+            etiquetas[destino[ganan]] = region[ganan]
+            libre[destino[ganan]] = False
+            nuevos.append(destino[ganan])
+
+        # El frente son los píxeles que todavía tienen algún vecino libre (los nuevos
+        # estaban libres, así que no se repiten con el frente anterior)
+        frente = np.concatenate([frente] + nuevos)
+        frente = frente[np.any(libre[frente[:, None] + saltos], axis=1)]
+
+    return etiquetas.reshape(alto + 2, ancho + 2)[1:-1, 1:-1]
+
+
+def _fronteras(etiquetas: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pares (a, b) con a < b de regiones que comparten al menos un lado de píxel"""
+    pares: List[np.ndarray] = []
+    for a, b in ((etiquetas[:, :-1], etiquetas[:, 1:]), (etiquetas[:-1, :], etiquetas[1:, :])):
+        contacto: np.ndarray = (a >= 0) & (b >= 0) & (a != b)
+        a, b = a[contacto].astype(np.int64), b[contacto].astype(np.int64)
+        pares.append(np.minimum(a, b) * n + np.maximum(a, b))
+
+    claves: np.ndarray = np.unique(np.concatenate(pares))
+    return claves // n, claves % n
+
+
+def _elegir(rng: np.random.Generator, n: int, proporcion: float, prioridad: np.ndarray) -> np.ndarray:
+    """Máscara con round(proporcion * n) regiones, elegidas al azar pero favoreciendo `prioridad` alta"""
+    cantidad: int = int(round(np.clip(proporcion, 0.0, 1.0) * n))
+    mascara: np.ndarray = np.zeros(n, dtype=bool)
+    if cantidad == 0: return mascara
+    # Truco de Gumbel: muestreo ponderado sin reemplazo en una sola ordenación
+    claves: np.ndarray = prioridad + rng.gumbel(size=n)
+    mascara[np.argpartition(-claves, cantidad - 1)[:cantidad]] = True
+    return mascara
+
+
+def generar_mundo(regiones: int, semilla: Optional[int] = None, proporcion_aeropuertos: float = 0.3,
+                  proporcion_puertos: float = 0.3, proporcion_mar: float = 0.55, proporcion_islas: float = 0.05,
+                  poblacion_total: float = 8e9, pixeles_por_region: int = 16) -> pd.DataFrame:
+    """
+    Genera un mundo de `regiones` regiones con las columnas del CSV real
+
+    Args:
+        regiones: Cantidad de regiones (filas)
+        semilla: Semilla del generador (mismo valor = mismo mundo)
+        proporcion_aeropuertos: Fracción de regiones con aeropuerto (las más pobladas tienen más opciones)
+        proporcion_puertos: Fracción de regiones con puerto (primero las costeras)
+        proporcion_mar: Fracción del mapa cubierta por mar (más mar = más costas)
+        proporcion_islas: Fracción de regiones sin fronteras terrestres (el mundo real tiene ~33%
+            de países aislados; las regiones subnacionales, muchas menos)
+        poblacion_total: Suma de la población de todas las regiones
+        pixeles_por_region: Resolución del mapa; más píxeles = fronteras más detalladas
+
+    Returns:
+        DataFrame con Country Name, Country Code, poblacion, clima, vecinos, puerto, vuelo
+    """
+    if regiones < 1: raise ValueError("Se necesita al menos una región")
+    rng: np.random.Generator = np.random.default_rng(semilla)
+
+    # 1. TIERRA Y MAR (mapa el doble de ancho que de alto, como un planisferio)
+    alto: int = max(8, int(np.sqrt(regiones * pixeles_por_region / (2 * (1 - proporcion_mar)))))
+    ancho: int = 2 * alto
+    continentes: int = max(2, int(np.sqrt(regiones) / 40) + 2)
+    relieve: np.ndarray = (_ruido(rng, alto, ancho, continentes)
+                           + 0.35 * _ruido(rng, alto, ancho, 4 * continentes)
+                           + 0.25 * _ruido(rng, alto, ancho, max(4, alto // 12)))  # archipiélagos
+    tierra: np.ndarray = relieve > np.quantile(relieve, proporcion_mar)
+
+    pixeles_tierra: np.ndarray = np.flatnonzero(tierra)
+    if len(pixeles_tierra) < regiones:
+        raise ValueError(f"No hay tierra para {regiones} regiones: baja proporcion_mar o sube pixeles_por_region")
+
+    # 2. REGIONES (velocidades log-normales: tamaños muy distintos entre regiones)
+    semillas: np.ndarray = rng.choice(pixeles_tierra, size=regiones, replace=False)
+    velocidad: np.ndarray = rng.lognormal(0.0, 0.8, regiones)
+    velocidad = np.clip(velocidad / velocidad.max() * 4, 0.05, 1.0)
+    etiquetas: np.ndarray = _crecer_regiones(tierra, semillas, velocidad, rng)
+
+    # 3. FRONTERAS (las islas, sobre todo regiones pequeñas, pierden todas las suyas)
+    superficie: np.ndarray = np.bincount(etiquetas[etiquetas >= 0], minlength=regiones).astype(np.float64)
+    islas: np.ndarray = _elegir(rng, regiones, proporcion_islas, -np.log(superficie))
+    a, b = _fronteras(etiquetas, regiones)
+    tierra_firme: np.ndarray = ~islas[a] & ~islas[b]
+    a, b = a[tierra_firme], b[tierra_firme]
+    origen: np.ndarray = np.concatenate([a, b])
+    destino: np.ndarray = np.concatenate([b, a])
+    orden: np.ndarray = np.argsort(origen, kind="stable")
+    origen, destino = origen[orden], destino[orden]
+    indptr: np.ndarray = np.r_[0, np.cumsum(np.bincount(origen, minlength=regiones))]
+
+    # 4. COSTAS (regiones con algún píxel junto al mar o al borde del mapa)
+    costa_pixel: np.ndarray = np.zeros_like(tierra)
+    for dy, dx in _DIRECCIONES:
+        costa_pixel |= tierra & ~_desplazar(tierra, dy, dx, False)
+    costera: np.ndarray = np.zeros(regiones, dtype=bool)
+    etiquetas_costa: np.ndarray = etiquetas[costa_pixel]
+    costera[etiquetas_costa[etiquetas_costa >= 0]] = True
+    costera |= islas
+
+    # 5. POBLACIÓN (crece con la superficie, con mucha dispersión como en el mundo real)
+    peso: np.ndarray = superficie ** 0.7 * rng.lognormal(0.0, 1.2, regiones)
+    poblacion: np.ndarray = np.maximum(np.floor(peso / peso.sum() * poblacion_total), 1).astype(np.int64)
+
+    # 6. TRANSPORTE
+    puertos: np.ndarray = _elegir(rng, regiones, proporcion_puertos, np.where(costera, 10.0, 0.0))
+    aeropuertos: np.ndarray = _elegir(rng, regiones, proporcion_aeropuertos, np.log(poblacion))
+
+    # 7. CLIMA según la latitud de la semilla
+    latitud: np.ndarray = np.abs(semillas // ancho / alto - 0.5) * 2
+    clima: np.ndarray = np.select([latitud < 0.35, latitud < 0.7], ["Cálido", "Templado"], "Frío")
+
+    ancho_codigo: int = len(str(regiones))
+    nombres: List[str] = [f"Región {i + 1}" for i in range(regiones)]
+    vecinos: List[str] = [
+        ", ".join(nombres[j] for j in destino[indptr[i]:indptr[i + 1]]) if indptr[i + 1] > indptr[i] else SIN_VECINOS
+        for i in range(regiones)
+    ]
+
+    return pd.DataFrame({
+        "Country Name": nombres,
+        "Country Code": [f"R{i + 1:0{ancho_codigo}d}" for i in range(regiones)],
+        "poblacion": poblacion,
+        "clima": clima,
+        "vecinos": vecinos,
+        "puerto": np.where(puertos, PUERTO_SI, PUERTO_NO),
+        "vuelo": np.where(aeropuertos, VUELO_SI, VUELO_NO),
+    })
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera un mundo sintético con el esquema de poblacion.csv")
+    parser.add_argument("--regiones", type=int, default=10000)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--aeropuertos", type=float, default=0.3, help="Fracción de regiones con aeropuerto")
+    parser.add_argument("--puertos", type=float, default=0.3, help="Fracción de regiones con puerto")
+    parser.add_argument("--mar", type=float, default=0.55, help="Fracción del mapa cubierta por mar")
+    parser.add_argument("--islas", type=float, default=0.05, help="Fracción de regiones sin fronteras terrestres")
+    parser.add_argument("--poblacion", type=float, default=8e9, help="Población total del mundo")
+    parser.add_argument("--salida", default="mundo_sintetico.csv")
+    args = parser.parse_args(argv)
+
+    t0: float = time.perf_counter()
+    df: pd.DataFrame = generar_mundo(args.regiones, args.semilla, args.aeropuertos, args.puertos, args.mar, args.islas,
+                                      args.poblacion)
+    df.to_csv(args.salida, index=False)
+
+    grado: np.ndarray = np.array([0 if v == SIN_VECINOS else v.count(",") + 1 for v in df["vecinos"]])
+    print(f"🌍 {len(df)} regiones en {time.perf_counter() - t0:.1f} s → {args.salida}")
+    print(f"   Vecinos por región: media {grado.mean():.2f}, máximo {grado.max()}, aisladas {(grado == 0).mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()
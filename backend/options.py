@@ -1,41 +1,17 @@
-from path import rutas
 from PySide6.QtCore import QObject, Signal, Property
+from backend.options_base import OptionsBase
 import os
 import json
 from typing import Dict
 
-class Options(QObject):
+class Options(QObject, OptionsBase):
     """
     Esta Clase tiene como atributos todas las configuraciones y comportamiento del simulador SIRD
 
+    Las rutas y constantes vienen de OptionsBase (compartidas con HeadlessOptions); aquí solo
+    viven los valores que QML puede modificar.
     """
 
-    #--------------------------------------------------------------
-    # Rutas    
-    #--------------------------------------------------------------
-
-    _BACKEND_DIR: str = os.path.dirname(os.path.abspath(__file__))
-    RUTA_DB_CREADA: str = rutas(os.path.join("backend","data","mundo.db"))
-    RUTA_CSV: str = rutas(os.path.join("backend","data","poblacion.csv"))
-    
-    # Archivo para guardar preferencias
-    RUTA_CONFIG: str = os.path.join(_BACKEND_DIR, "data", "config.json")
-
-     
-    #-----------------------------------------------------
-    # Constantes usadas para el comportamiento del Programa
-    #-----------------------------------------------------
-    INFECTADOS_INICIALES: int = 2
-    INFECTADOS_INICIALES_VECINOS: int = 11
-    UMBRAL_INFECCION_EXTERNO: int = 500
-    UMBRAL_ERRADICACION: int = 10
-    MAX_NOTICIAS_HISTORIAL: int = 50 
-    UMBRAL_PCT_TRANSPORTE: float = 0.40 
-    DIAS_COOLDOWN_TRANSPORTE: int = 3
-    UMBRAL_PCT_FRONTERA: float = 0.05   
-    DIAS_COOLDOWN_FRONTERA: int = 2   
-    
-
     # ======================================================================================
     # 2. SEÑALES PARA COMUNICARSE CON QT Y QML, INDICAN A ESTOS CUANDO UNA VARIABLE CAMBIA
     # ======================================================================================
@@ -46,6 +22,9 @@ class Options(QObject):
     virusNombreChanged: Signal = Signal(str)
     paisInicioChanged: Signal = Signal(str)
 
+    # Con interfaz se graba cada día para poder volver atrás (ver OptionsBase)
+    GRABAR_REPETICION: bool = True
+
 
 
     def __init__(self, parent=None) -> None:
@@ -0,0 +1,112 @@
+from path import rutas
+import os
+from typing import Any
+
+
+class OptionsBase:
+    """
+    Constantes de configuración compartidas por todas las variantes de opciones del simulador.
+    No depende de Qt, así que el motor puede usarse sin PySide6.
+    """
+
+    #--------------------------------------------------------------
+    # Rutas
+    #--------------------------------------------------------------
+
+    _BACKEND_DIR: str = os.path.dirname(os.path.abspath(__file__))
+    RUTA_DB_CREADA: str = rutas(os.path.join("backend","data","mundo.db"))
+    RUTA_CSV: str = rutas(os.path.join("backend","data","poblacion.csv"))
+
+    # Archivo para guardar preferencias
+    RUTA_CONFIG: str = os.path.join(_BACKEND_DIR, "data", "config.json")
+
+
+    #-----------------------------------------------------
+    # Constantes usadas para el comportamiento del Programa
+    #-----------------------------------------------------
+    INFECTADOS_INICIALES: int = 2
+    INFECTADOS_INICIALES_VECINOS: int = 11
+    UMBRAL_INFECCION_EXTERNO: int = 500
+    UMBRAL_ERRADICACION: int = 10
+    MAX_NOTICIAS_HISTORIAL: int = 50
+    UMBRAL_PCT_TRANSPORTE: float = 0.40
+    DIAS_COOLDOWN_TRANSPORTE: int = 3
+    UMBRAL_PCT_FRONTERA: float = 0.05
+    DIAS_COOLDOWN_FRONTERA: int = 2
+
+    # Si es False el motor no toca SQLite: carga el CSV y no guarda nada por tick
+    PERSISTIR: bool = True
+
+    # Con GUARDADO_ASINCRONO el motor no espera al disco: un hilo escritor guarda los días
+    # en grupo cada GUARDAR_CADA_DIAS días o GUARDAR_CADA_S segundos (y siempre al pausar,
+    # reiniciar o salir). False guarda cada día dentro del tick, como antes
+    GUARDADO_ASINCRONO: bool = True
+    GUARDAR_CADA_DIAS: int = 10
+    GUARDAR_CADA_S: float = 2.0
+
+    # Series diarias S/I/R/M de cada país en archivos mapeados en memoria, en la carpeta
+    # <DB>_series junto a la DB (ver backend/series.py)
+    GUARDAR_SERIES: bool = True
+
+    # Grabación en memoria de cada día (keyframes cada REPETICION_CADA_KEYFRAME días más deltas)
+    # para revisar días pasados desde la interfaz. Sin interfaz no hace falta: Options la activa
+    GRABAR_REPETICION: bool = False
+    REPETICION_CADA_KEYFRAME: int = 30
+
+    # Semilla del generador aleatorio del motor. Misma semilla + mismos parámetros = misma
+    # epidemia, bit a bit. None = semilla nueva en cada partida
+    SEMILLA: int | None = None
+
+    # Si es True el paso SIRD reutiliza sus arrays de trabajo entre ticks (sin pedir memoria
+    # nueva cada día). False vuelve a crear los temporales en cada llamada
+    KERNEL_EN_SITIO: bool = True
+
+    # Integrador del paso SIRD diario: "euler" (original), "rk4" (SUBPASOS_RK4 pasos fijos
+    # por día), "rk45" (paso adaptativo por país con error relativo TOLERANCIA_RK45) o
+    # "binomial" (estocástico sobre personas enteras, sin barrido de UMBRAL_ERRADICACION)
+    INTEGRADOR: str = "euler"
+    SUBPASOS_RK4: int = 4
+    TOLERANCIA_RK45: float = 1e-6
+
+    # Dónde corre el motor cuando hay interfaz: "hilo" (QThread del mismo proceso) o
+    # "proceso" (backend/servidor.py en otro proceso, estado en memoria compartida)
+    MODO_SIMULACION: str = "hilo"
+
+    # Transporte entre países: "global" (original: emisores por encima de UMBRAL_PCT_TRANSPORTE
+    # contagian a un conectado al azar) o "gravedad" (matriz origen-destino fija, flujo
+    # proporcional a población origen x población destino, importaciones de Poisson cada día).
+    # VIAJEROS_DIARIOS_* es la fracción de la población que viaja al día y RUTAS_POR_* los
+    # destinos que se sortean para cada país conectado
+    MODO_LOGISTICA: str = "global"
+    VIAJEROS_DIARIOS_VUELO: float = 2e-4
+    VIAJEROS_DIARIOS_PUERTO: float = 2e-5
+    RUTAS_POR_AEROPUERTO: int = 30
+    RUTAS_POR_PUERTO: int = 10
+
+
+
+class HeadlessOptions(OptionsBase):
+    """
+    Opciones en Python puro para ejecutar el motor sin interfaz (servidores, scripts, lotes).
+    Tiene los mismos atributos que Options, pero no emite señales ni guarda config.json.
+
+    Cualquier atributo se puede sobrescribir por nombre:
+        HeadlessOptions(beta=0.3, PAIS_INICIO="China", PERSISTIR=False)
+    """
+
+    def __init__(self, **valores: Any) -> None:
+        # Valores por defecto (los mismos que Options)
+        self.beta: float = 0.5
+        self.gamma: float = 0.02
+        self.mu: float = 0.005
+        self.p_frontera: float = 1.0
+        self.NOMBRE_VIRUS: str = "Paper-20"
+        self.PAIS_INICIO: str = "Venezuela"
+
+        self.PROBABILIDAD_INFECTAR_VUELO: float = 1.0
+        self.PROBABILIDAD_INFECTAR_PUERTO: float = 1.0
+
+        for nombre, valor in valores.items():
+            if not hasattr(self, nombre):
+                raise AttributeError(f"Opción desconocida: {nombre}")
+            setattr(self, nombre, valor)
@@ -0,0 +1,156 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class RegistroContagios:
+    """
+    Registro columnar, solo de añadir, de las introducciones del virus en cada país
+
+    Cada evento es (día, país origen, país destino, canal) y se guarda en arrays de NumPy que
+    crecen al doble cuando se llenan. Solo se registran introducciones (el destino no tenía
+    infectados), así que el registro crece con los países alcanzados y no con los días.
+
+    Un solo hilo escribe (el del motor). Las filas por debajo de la longitud actual no cambian,
+    salvo después de truncar() (al volver a un estado anterior), y al crecer se copian antes
+    de cambiar de array, así que cualquier hilo puede leer las filas que ya existían cuando se
+    publicó una foto sin esperar al escritor. Cada truncado sube `version`, y
+    filas_intactas() dice cuántas de las filas leídas con una versión anterior siguen valiendo.
+    """
+
+    # Vía por la que llegó el virus. El paciente cero no tiene origen (origen = -1)
+    CANALES: Tuple[str, ...] = ("paciente_cero", "frontera", "vuelo", "puerto")
+
+    def __init__(self, capacidad: int = 1024) -> None:
+        self._n: int = 0
+        self.dia: np.ndarray = np.empty(capacidad, dtype=np.int32)
+        self.origen: np.ndarray = np.empty(capacidad, dtype=np.int32)
+        self.destino: np.ndarray = np.empty(capacidad, dtype=np.int32)
+        self.canal: np.ndarray = np.empty(capacidad, dtype=np.int8)
+        # Longitud a la que dejó el registro cada truncado (la versión es cuántos hubo)
+        self._truncados: List[int] = []
+
+
+    def __len__(self) -> int:
+        return self._n
+
+
+    def _asegurar(self, extra: int) -> None:
+        """Duplica la capacidad hasta que quepan `extra` eventos más"""
+        capacidad: int = len(self.dia)
+        if self._n + extra <= capacidad: return
+        while capacidad < self._n + extra: capacidad *= 2
+        for col in ("dia", "origen", "destino", "canal"):
+            viejo: np.ndarray = getattr(self, col)
+            nuevo: np.ndarray = np.empty(capacidad, dtype=viejo.dtype)
+            nuevo[:self._n] = viejo[:self._n]
+            setattr(self, col, nuevo)
+
+
+    def _anadir(self, dia, origen: np.ndarray, destino: np.ndarray, canal) -> None:
+        k: int = len(destino)
+        if k == 0: return
+        self._asegurar(k)
+        fin: int = self._n + k
+        self.dia[self._n:fin] = dia
+        self.origen[self._n:fin] = origen
+        self.destino[self._n:fin] = destino
+        self.canal[self._n:fin] = canal
+        # La longitud se publica al final: quien lea antes no ve filas a medio escribir
+        self._n = fin
+
+
+    def registrar(self, dia: int, origenes: np.ndarray, destinos: np.ndarray, canal: str) -> None:
+        """Añade un lote de introducciones del mismo día y canal"""
+        self._anadir(dia, origenes, destinos, self.CANALES.index(canal))
+
+
+    def extender(self, columnas: Dict[str, np.ndarray]) -> None:
+        """Añade eventos ya en columnas (por ejemplo los que llegan del proceso servidor)"""
+        self._anadir(columnas["dia"], columnas["origen"], columnas["destino"], columnas["canal"])
+
+
+    @property
+    def version(self) -> int:
+        return len(self._truncados)
+
+
+    def truncar(self, longitud: int) -> None:
+        """Descarta los eventos a partir de `longitud` (para volver a un estado anterior)"""
+        self._n = min(self._n, max(0, longitud))
+        self._truncados.append(self._n)
+
+
+    def filas_intactas(self, version: int, filas: int) -> int:
+        """De las `filas` primeras filas leídas con la versión `version`, cuántas siguen igual"""
+        return min([filas] + self._truncados[version:])
+
+
+    def columnas(self, desde: int = 0, hasta: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Vistas de solo lectura de los eventos [desde, hasta)
+
+        Returns:
+            {"dia": ..., "origen": ..., "destino": ..., "canal": ...}
+        """
+        hasta = self._n if hasta is None else min(hasta, self._n)
+        vistas: Dict[str, np.ndarray] = {}
+        for col in ("dia", "origen", "destino", "canal"):
+            vista: np.ndarray = getattr(self, col)[desde:hasta].view()
+            vista.flags.writeable = False
+            vistas[col] = vista
+        return vistas
+
+
+    # ----------------------------- Árbol de transmisión -----------------------------
+
+    def arbol(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Primera introducción de cada país: de quién, qué día y por qué vía
+
+        Args:
+            n: Cantidad de países
+
+        Returns:
+            {"padre", "dia", "canal"} de longitud n (-1 en los países nunca alcanzados;
+            el paciente cero tiene padre -1 y canal 0)
+        """
+        eventos: Dict[str, np.ndarray] = self.columnas()
+        destinos, primera = np.unique(eventos["destino"], return_index=True)
+        arbol: Dict[str, np.ndarray] = {
+            "padre": np.full(n, -1, dtype=np.int32),
+            "dia": np.full(n, -1, dtype=np.int32),
+            "canal": np.full(n, -1, dtype=np.int8),
+        }
+        for col, origen in (("padre", "origen"), ("dia", "dia"), ("canal", "canal")):
+            arbol[col][destinos] = eventos[origen][primera]
+        return arbol
+
+
+    def cadena(self, pais: int) -> List[Tuple[int, int, int, str]]:
+        """
+        Cadena de contagio desde el paciente cero hasta `pais` (por primeras introducciones)
+
+        Returns:
+            Lista de (dia, origen, destino, canal), de la raíz al país. Vacía si nunca llegó
+        """
+        eventos: Dict[str, np.ndarray] = self.columnas()
+        destinos, primera = np.unique(eventos["destino"], return_index=True)
+        cadena: List[Tuple[int, int, int, str]] = []
+        actual: int = pais
+        # Como mucho un salto por país: el padre siempre se infectó antes que el hijo
+        for _ in range(len(destinos)):
+            k: int = int(np.searchsorted(destinos, actual))
+            if k == len(destinos) or destinos[k] != actual: break
+            e: int = int(primera[k])
+            cadena.append((int(eventos["dia"][e]), int(eventos["origen"][e]), actual, self.CANALES[eventos["canal"][e]]))
+            actual = int(eventos["origen"][e])
+            if actual < 0: break
+        cadena.reverse()
+        return cadena
+
+
+    def contagiados_por(self, pais: int) -> np.ndarray:
+        """Países cuya primera introducción vino de `pais`"""
+        eventos: Dict[str, np.ndarray] = self.columnas()
+        destinos, primera = np.unique(eventos["destino"], return_index=True)
+        return destinos[eventos["origen"][primera] == pais]
@@ -0,0 +1,181 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class Repeticion:
+    """
+    Grabación en memoria de S, I, R y M de cada día para volver a cualquier día ya simulado
+
+    Cada día se guarda como un delta: los países que cambiaron respecto al día anterior y sus
+    cuatro valores nuevos. Cada `cada_keyframe` días se guarda además una foto completa
+    (keyframe). El índice día -> fila -> (desplazamiento en los deltas, keyframe anterior)
+    hace que ver el día d cueste copiar un keyframe y aplicar como mucho `cada_keyframe`
+    deltas, sin importar cuántos días lleve la partida.
+
+    El primer delta de la grabación trae todos los países, así que una copia en otro proceso
+    se reconstruye solo con los deltas (ver pendientes() y extender()).
+
+    Como RegistroContagios: un solo hilo escribe, las filas ya escritas no cambian y al
+    crecer se copian antes de cambiar de array, así que otro hilo puede leer los días ya
+    publicados sin esperar al escritor.
+    """
+
+    COLUMNAS: Tuple[str, ...] = ("S", "I", "R", "M")
+
+    def __init__(self, n: int, cada_keyframe: int = 30, capacidad: int = 256) -> None:
+        self.n: int = n
+        self.cada_keyframe: int = max(1, int(cada_keyframe))
+        self._filas: int = 0
+
+        # Índice por fila (día grabado): el día y dónde terminan sus deltas
+        self.dia: np.ndarray = np.empty(capacidad, dtype=np.int32)
+        self.fin: np.ndarray = np.empty(capacidad, dtype=np.int64)
+        # Deltas de todas las filas, uno tras otro
+        self.paises: np.ndarray = np.empty(capacidad * 4, dtype=np.int32)
+        self.valores: np.ndarray = np.empty((capacidad * 4, len(self.COLUMNAS)), dtype=np.float64)
+        # Filas con keyframe y su foto (4, países)
+        self._filas_keyframe: List[int] = []
+        self._keyframes: List[np.ndarray] = []
+
+        # Último día grabado (contra él se calcula el delta siguiente)
+        self._ultimo: Optional[np.ndarray] = None
+        # Primera fila que la copia remota todavía no tiene
+        self._sin_enviar: int = 0
+
+
+    def __len__(self) -> int:
+        return self._filas
+
+
+    @property
+    def primer_dia(self) -> Optional[int]:
+        return int(self.dia[0]) if self._filas else None
+
+
+    @property
+    def ultimo_dia(self) -> Optional[int]:
+        return int(self.dia[self._filas - 1]) if self._filas else None
+
+
+    # ----------------------------- Escritura -----------------------------
+
+    def _crecer(self, nombre: str, necesario: int) -> None:
+        """Duplica la capacidad del array `nombre` hasta que quepan `necesario` elementos"""
+        viejo: np.ndarray = getattr(self, nombre)
+        capacidad: int = len(viejo)
+        if necesario <= capacidad: return
+        while capacidad < necesario: capacidad *= 2
+        nuevo: np.ndarray = np.empty((capacidad,) + viejo.shape[1:], dtype=viejo.dtype)
+        usados: int = int(self.fin[self._filas - 1]) if nombre in ("paises", "valores") and self._filas else self._filas
+        nuevo[:usados] = viejo[:usados]
+        setattr(self, nombre, nuevo)
+
+
+    def grabar(self, dia: int, estado) -> None:
+        """
+        Graba el día `dia` a partir de un WorldState (o cualquier objeto con S, I, R y M).
+        Si el día no es posterior al último grabado, antes se descartan los días desde ese
+        """
+        actual: np.ndarray = np.stack([getattr(estado, col) for col in self.COLUMNAS])
+        if self._filas and dia <= self.ultimo_dia: self.truncar(dia)
+        if self._ultimo is None:
+            paises: np.ndarray = np.arange(self.n, dtype=np.int32)
+        else:
+            paises = np.flatnonzero((actual != self._ultimo).any(axis=0)).astype(np.int32)
+        self._anadir(dia, paises, actual[:, paises].T, actual)
+
+
+    def _anadir(self, dia: int, paises: np.ndarray, valores: np.ndarray, actual: Optional[np.ndarray] = None) -> None:
+        inicio: int = int(self.fin[self._filas - 1]) if self._filas else 0
+        fin: int = inicio + len(paises)
+        self._crecer("dia", self._filas + 1)
+        self._crecer("fin", self._filas + 1)
+        self._crecer("paises", fin)
+        self._crecer("valores", fin)
+
+        self.paises[inicio:fin] = paises
+        self.valores[inicio:fin] = valores
+        self.dia[self._filas] = dia
+        self.fin[self._filas] = fin
+
+        if actual is None:
+            actual = np.zeros((len(self.COLUMNAS), self.n)) if self._ultimo is None else self._ultimo
+            actual[:, paises] = valores.T
+        self._ultimo = actual
+
+        if not self._filas_keyframe or self._filas - self._filas_keyframe[-1] >= self.cada_keyframe:
+            self._keyframes.append(actual.copy())
+            self._filas_keyframe.append(self._filas)
+        # La fila se publica al final: quien lea antes no ve un día a medio escribir
+        self._filas += 1
+
+
+    def truncar(self, dia: int) -> None:
+        """Descarta los días desde `dia` (al volver a un estado anterior)"""
+        filas: int = int(np.searchsorted(self.dia[:self._filas], dia, side="left"))
+        if filas == self._filas: return
+        while self._filas_keyframe and self._filas_keyframe[-1] >= filas:
+            self._filas_keyframe.pop()
+            self._keyframes.pop()
+        self._ultimo = self._reconstruir(filas - 1) if filas else None
+        self._filas = filas
+        self._sin_enviar = min(self._sin_enviar, filas)
+
+
+    # ----------------------------- Copia en otro proceso -----------------------------
+
+    def pendientes(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Días grabados desde la última llamada, en columnas (copias) para enviarlos a una
+        copia remota, o None si no hay nada nuevo
+        """
+        desde: int = self._sin_enviar
+        if desde >= self._filas: return None
+        inicio: int = int(self.fin[desde - 1]) if desde else 0
+        fin: int = int(self.fin[self._filas - 1])
+        columnas: Dict[str, np.ndarray] = {
+            "dia": self.dia[desde:self._filas].copy(),
+            "largo": np.diff(self.fin[desde:self._filas], prepend=inicio),
+            "paises": self.paises[inicio:fin].copy(),
+            "valores": self.valores[inicio:fin].copy(),
+        }
+        self._sin_enviar = self._filas
+        return columnas
+
+
+    def extender(self, columnas: Dict[str, np.ndarray]) -> None:
+        """Aplica los días que envió pendientes() (desde el otro proceso)"""
+        inicio: int = 0
+        for dia, largo in zip(columnas["dia"].tolist(), columnas["largo"].tolist()):
+            if self._filas and dia <= self.ultimo_dia: self.truncar(dia)
+            fin: int = inicio + largo
+            self._anadir(dia, columnas["paises"][inicio:fin], columnas["valores"][inicio:fin])
+            inicio = fin
+
+
+    # ----------------------------- Lectura -----------------------------
+
+    def _reconstruir(self, fila: int) -> np.ndarray:
+        """Estado (4, países) de una fila: su keyframe más los deltas hasta ella"""
+        k: int = int(np.searchsorted(self._filas_keyframe, fila, side="right")) - 1
+        origen: int = self._filas_keyframe[k]
+        estado: np.ndarray = self._keyframes[k].copy()
+        for f in range(origen + 1, fila + 1):
+            inicio, fin = int(self.fin[f - 1]), int(self.fin[f])
+            estado[:, self.paises[inicio:fin]] = self.valores[inicio:fin].T
+        return estado
+
+
+    def estado_en(self, dia: int) -> Optional[Tuple[int, Dict[str, np.ndarray]]]:
+        """
+        S, I, R y M del día `dia` (o del día grabado más cercano dentro del rango)
+
+        Returns:
+            (día mostrado, {"S": ..., "I": ..., "R": ..., "M": ...}) o None si no hay nada grabado
+        """
+        filas: int = self._filas
+        if filas == 0: return None
+        fila: int = int(np.searchsorted(self.dia[:filas], dia, side="right")) - 1
+        fila = min(max(fila, 0), filas - 1)
+        estado: np.ndarray = self._reconstruir(fila)
+        return int(self.dia[fila]), {col: estado[k] for k, col in enumerate(self.COLUMNAS)}
@@ -0,0 +1,148 @@
+"""
+Ejecución de la simulación sin interfaz gráfica (no importa Qt)
+
+Uso:
+    python -m backend.run --dias 365 --pais China --salida resultados/
+    python -m backend.run --dias 100 --reanudar resultados/partida.ppck --checkpoint resultados/partida.ppck
+"""
+from backend.options_base import HeadlessOptions
+from backend.engine import Engine
+from backend.ensemble import Ensemble
+from backend.kernels import INTEGRADORES
+import argparse
+import json
+import os
+import time
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+def simular(opciones: HeadlessOptions, dias: int, cada: int = 1, reanudar: Optional[str] = None) -> Dict:
+    """
+    Corre el motor durante `dias` días o hasta que termine la partida
+
+    Args:
+        opciones: Configuración de la simulación
+        dias: Máximo de días a simular
+        cada: Cada cuántos días se registra una fila en el historial
+        reanudar: Checkpoint desde el que seguir (con sus propias opciones, sin CSV ni SQLite)
+
+    Returns:
+        Diccionario con el estado final, el historial de totales, el motor y los tiempos
+    """
+    t_inicio: float = time.perf_counter()
+    motor: Engine = Engine.desde_checkpoint(reanudar) if reanudar else Engine(opciones)
+    t_carga: float = time.perf_counter() - t_inicio
+
+    resultado: Dict = motor.avanzar_dias(dias, sample_every=cada)
+    muestras: Dict = resultado["muestras"]
+    historial: pd.DataFrame = pd.DataFrame({
+        "dia": muestras["dia"],
+        "total_S": muestras["S"], "total_I": muestras["I"],
+        "total_R": muestras["R"], "total_M": muestras["M"],
+        "Paises_Infectados": muestras["paises_infectados"],
+    })
+
+    tiempos: Dict[str, float] = {"carga": t_carga, **motor.tiempos}
+    tiempos["total"] = time.perf_counter() - t_inicio
+
+    return {
+        "status": resultado["status"],
+        "dia": motor.dia_simulacion,
+        "motor": motor,
+        "historial": historial,
+        "tiempos": tiempos,
+    }
+
+
+def simular_ensemble(opciones: HeadlessOptions, dias: int, corridas: int) -> Dict:
+    """
+    Corre `corridas` realizaciones a la vez y devuelve las bandas diarias de cada compartimento.
+    Sus números aleatorios salen del árbol de semillas del motor (opciones.SEMILLA)
+    """
+    t_inicio: float = time.perf_counter()
+    motor: Engine = Engine(opciones)
+    # En un mundo virgen el ensamble ya simula el día 1 al crearse (como el primer tick del motor)
+    virgen: bool = not motor.estado.I.any() and not (motor.estado.R.any() or motor.estado.M.any())
+    ensamble: Ensemble = Ensemble.desde_engine(motor, corridas)
+    t_carga: float = time.perf_counter() - t_inicio
+
+    ensamble.avanzar(dias - virgen)
+    bandas: pd.DataFrame = ensamble.resumen()
+
+    return {
+        "dia": ensamble.dia,
+        "bandas": bandas,
+        "tiempos": {"carga": t_carga, "total": time.perf_counter() - t_inicio},
+    }
+
+
+def guardar_resultados(resultado: Dict, carpeta: str) -> None:
+    """Escribe estado final, historial y tiempos en la carpeta indicada"""
+    os.makedirs(carpeta, exist_ok=True)
+    resultado["motor"].dataframe.to_csv(os.path.join(carpeta, "estado_final.csv"), index=False, encoding="utf-8-sig")
+    resultado["historial"].to_csv(os.path.join(carpeta, "historial.csv"), index=False, encoding="utf-8-sig")
+
+    with open(os.path.join(carpeta, "tiempos.json"), "w", encoding="utf-8") as f:
+        json.dump({"status": resultado["status"], "dia": resultado["dia"], "tiempos": resultado["tiempos"]}, f, indent=4)
+
+
+def imprimir_tiempos(tiempos: Dict[str, float], dias: int) -> None:
+    """Tabla de tiempos por fase (total y por día simulado)"""
+    dias = max(dias, 1)
+    print(f"{'fase':<12}{'total (s)':>12}{'ms/día':>12}")
+    for fase, segundos in tiempos.items():
+        print(f"{fase:<12}{segundos:>12.4f}{segundos * 1000 / dias:>12.3f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulación SIRD sin interfaz gráfica")
+    parser.add_argument("--dias", type=int, default=365, help="Máximo de días a simular")
+    parser.add_argument("--cada", type=int, default=1, help="Registrar los totales cada N días")
+    parser.add_argument("--salida", default="resultados", help="Carpeta donde se escriben los resultados")
+    parser.add_argument("--pais", default=None, help="País donde empieza el virus")
+    parser.add_argument("--beta", type=float, default=None)
+    parser.add_argument("--gamma", type=float, default=None)
+    parser.add_argument("--mu", type=float, default=None)
+    parser.add_argument("--csv", default=None, help="CSV del mundo (por defecto backend/data/poblacion.csv)")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla (misma semilla = mismos resultados)")
+    parser.add_argument("--db", action="store_true", help="Guardar el estado final en SQLite dentro de la carpeta de salida")
+    parser.add_argument("--corridas", type=int, default=1, help="Realizaciones estocásticas a simular en lote")
+    parser.add_argument("--integrador", choices=INTEGRADORES, default=None, help="Integrador del paso SIRD (por defecto euler)")
+    parser.add_argument("--logistica", choices=("global", "gravedad"), default=None, help="Transporte entre países (por defecto global)")
+    parser.add_argument("--reanudar", default=None, help="Seguir la partida de un checkpoint (.ppck) con sus opciones")
+    parser.add_argument("--checkpoint", default=None, help="Guardar un checkpoint (.ppck) del estado final")
+    args = parser.parse_args(argv)
+
+    valores: Dict = {"PERSISTIR": args.db, "SEMILLA": args.semilla}
+    if args.db: valores["RUTA_DB_CREADA"] = os.path.abspath(os.path.join(args.salida, "mundo.db"))
+    if args.pais: valores["PAIS_INICIO"] = args.pais
+    if args.csv: valores["RUTA_CSV"] = args.csv
+    if args.integrador: valores["INTEGRADOR"] = args.integrador
+    if args.logistica: valores["MODO_LOGISTICA"] = args.logistica
+    for tasa in ("beta", "gamma", "mu"):
+        if getattr(args, tasa) is not None: valores[tasa] = getattr(args, tasa)
+
+    if args.corridas > 1:
+        valores["PERSISTIR"] = False
+        resultado: Dict = simular_ensemble(HeadlessOptions(**valores), args.dias, args.corridas)
+        os.makedirs(args.salida, exist_ok=True)
+        resultado["bandas"].to_csv(os.path.join(args.salida, "bandas.csv"), index=False, encoding="utf-8-sig")
+
+        print(f"🏁 {args.corridas} corridas hasta el día {resultado['dia']}")
+        imprimir_tiempos(resultado["tiempos"], resultado["dia"])
+        print(f"💾 Resultados en {os.path.abspath(args.salida)}")
+        return
+
+    resultado: Dict = simular(HeadlessOptions(**valores), args.dias, args.cada, args.reanudar)
+    guardar_resultados(resultado, args.salida)
+    if args.checkpoint: resultado["motor"].guardar_checkpoint(args.checkpoint)
+    resultado["motor"].cerrar()
+
+    print(f"🏁 {resultado['status']} (día {resultado['dia']})")
+    imprimir_tiempos(resultado["tiempos"], resultado["dia"])
+    print(f"💾 Resultados en {os.path.abspath(args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Series diarias por país (S, I, R, M) en archivos mapeados en memoria
+
+La tabla historial de SQLite solo guarda totales mundiales y estado_actual se pisa cada
+día, así que aquí se guarda un día por fila, de solo añadir:
+
+    datos.bin  cabecera de 4 KiB + filas (columnas, países) de float32, una por día
+    dias.bin   índice: el día de cada fila (int32)
+
+La cabecera lleva un número mágico, la versión, la forma y cuántas filas están confirmadas.
+Las filas se escriben primero y el contador se actualiza después, así que quien lea (otro
+proceso incluido) nunca ve un día a medias. Los rangos de días se leen sin copias con
+np.memmap. float32 guarda 7 cifras significativas: de sobra para curvas y la mitad de disco.
+"""
+import os
+import shutil
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+
+class SeriesPaises:
+    """Almacén de solo añadir con una fila (columnas, países) por día simulado"""
+
+    MAGICO: bytes = b"PPSERIE\0"
+    VERSION: int = 1
+    COLUMNAS: Tuple[str, ...] = ("S", "I", "R", "M")
+    TIPO = np.float32
+    CABECERA: int = 4096
+    BLOQUE_DIAS: int = 256
+
+    # Posiciones (int64) dentro de la cabecera, detrás del número mágico
+    _VERSION, _PAISES, _COLUMNAS, _BYTES, _FILAS, _CAPACIDAD = range(6)
+
+    def __init__(self, carpeta: str, n: Optional[int] = None, solo_lectura: bool = False) -> None:
+        """
+        Args:
+            carpeta: Carpeta del almacén (se crea si no existe y se puede escribir)
+            n: Cantidad de países. Si el almacén existente es de otra forma se vacía
+            solo_lectura: Abrir sin permiso de escritura (análisis o la interfaz en otro proceso)
+        """
+        self.carpeta: str = carpeta
+        self.solo_lectura: bool = solo_lectura
+        self._ruta_datos: str = os.path.join(carpeta, "datos.bin")
+        self._ruta_dias: str = os.path.join(carpeta, "dias.bin")
+
+        if not solo_lectura:
+            os.makedirs(carpeta, exist_ok=True)
+            if not self._compatible(n): self._crear(n)
+        self._mapear()
+
+
+    # ----------------------------- Archivos -----------------------------
+
+    def _compatible(self, n: Optional[int]) -> bool:
+        """True si ya hay un almacén válido de esta versión y con n países"""
+        if not (os.path.exists(self._ruta_datos) and os.path.exists(self._ruta_dias)): return False
+        with open(self._ruta_datos, "rb") as f:
+            inicio: bytes = f.read(8 + 8 * 6)
+        if len(inicio) < 56 or inicio[:8] != self.MAGICO: return False
+        cabecera: np.ndarray = np.frombuffer(inicio[8:], dtype=np.int64)
+        return (int(cabecera[self._VERSION]) == self.VERSION and (n is None or int(cabecera[self._PAISES]) == n)
+                and int(cabecera[self._COLUMNAS]) == len(self.COLUMNAS)
+                and int(cabecera[self._BYTES]) == np.dtype(self.TIPO).itemsize)
+
+
+    def _crear(self, n: Optional[int]) -> None:
+        if n is None: raise ValueError(f"No hay series en {self.carpeta} y no se indicó la cantidad de países")
+        cabecera: np.ndarray = np.zeros(self.CABECERA // 8, dtype=np.int64)
+        cabecera[1 + self._VERSION] = self.VERSION
+        cabecera[1 + self._PAISES] = n
+        cabecera[1 + self._COLUMNAS] = len(self.COLUMNAS)
+        cabecera[1 + self._BYTES] = np.dtype(self.TIPO).itemsize
+        cabecera[1 + self._CAPACIDAD] = self.BLOQUE_DIAS
+        bruto: bytearray = bytearray(cabecera.tobytes())
+        bruto[:8] = self.MAGICO
+        with open(self._ruta_datos, "wb") as f:
+            f.write(bruto)
+            f.truncate(self.CABECERA + self.BLOQUE_DIAS * self._bytes_fila(n))
+        with open(self._ruta_dias, "wb") as f:
+            f.truncate(self.BLOQUE_DIAS * 4)
+
+
+    def _bytes_fila(self, n: int) -> int:
+        return len(self.COLUMNAS) * n * np.dtype(self.TIPO).itemsize
+
+
+    def _mapear(self) -> None:
+        """(Re)abre los memmap con la capacidad que diga la cabecera"""
+        modo: str = "r" if self.solo_lectura else "r+"
+        self._cabecera: np.memmap = np.memmap(self._ruta_datos, dtype=np.int64, mode=modo, offset=8, shape=(6,))
+        self.n: int = int(self._cabecera[self._PAISES])
+        self._capacidad: int = int(self._cabecera[self._CAPACIDAD])
+        self._datos: np.memmap = np.memmap(self._ruta_datos, dtype=self.TIPO, mode=modo, offset=self.CABECERA,
+                                           shape=(self._capacidad, len(self.COLUMNAS), self.n))
+        self._dias: np.memmap = np.memmap(self._ruta_dias, dtype=np.int32, mode=modo, shape=(self._capacidad,))
+        # Filas escritas (las confirmadas están en la cabecera)
+        self._filas: int = int(self._cabecera[self._FILAS])
+
+
+    def _crecer(self, filas: int) -> None:
+        """Agranda los archivos por bloques hasta que quepan `filas` días"""
+        capacidad: int = self._capacidad
+        while capacidad < filas: capacidad += self.BLOQUE_DIAS
+        self._datos.flush()
+        self._dias.flush()
+        with open(self._ruta_datos, "r+b") as f:
+            f.truncate(self.CABECERA + capacidad * self._bytes_fila(self.n))
+        with open(self._ruta_dias, "r+b") as f:
+            f.truncate(capacidad * 4)
+        self._cabecera[self._CAPACIDAD] = capacidad
+        filas_escritas: int = self._filas
+        self._mapear()
+        self._filas = filas_escritas
+
+
+    # ----------------------------- Escritura -----------------------------
+
+    def anadir(self, dia: int, columnas: Dict[str, np.ndarray]) -> None:
+        """
+        Escribe el día `dia` en la fila siguiente (sin confirmar: ver confirmar()). Si el día no
+        es posterior al último, primero se descartan las filas desde ese día (volver atrás)
+        """
+        if self._filas and dia <= int(self._dias[self._filas - 1]): self.rebobinar(dia)
+        if self._filas >= self._capacidad: self._crecer(self._filas + 1)
+        fila: np.ndarray = self._datos[self._filas]
+        for k, col in enumerate(self.COLUMNAS):
+            fila[k] = columnas[col]
+        self._dias[self._filas] = dia
+        self._filas += 1
+
+
+    def confirmar(self) -> None:
+        """Publica las filas escritas: primero los datos, después el contador de la cabecera"""
+        self._datos.flush()
+        self._dias.flush()
+        self._cabecera[self._FILAS] = self._filas
+        self._cabecera.flush()
+
+
+    def rebobinar(self, dia: int) -> None:
+        """Descarta (y confirma) las filas de `dia` en adelante"""
+        self._filas = int(np.searchsorted(self._dias[:self._filas], dia, side="left"))
+        self._cabecera[self._FILAS] = min(int(self._cabecera[self._FILAS]), self._filas)
+
+
+    # ----------------------------- Lectura -----------------------------
+
+    def refrescar(self) -> None:
+        """Lector de otro proceso: vuelve a leer la cabecera (y remapea si el archivo creció)"""
+        if int(self._cabecera[self._CAPACIDAD]) != self._capacidad: self._mapear()
+        self._filas = int(self._cabecera[self._FILAS])
+
+
+    def __len__(self) -> int:
+        """Días confirmados"""
+        return int(self._cabecera[self._FILAS])
+
+
+    @property
+    def dias(self) -> np.ndarray:
+        """Día de cada fila confirmada (vista sin copia)"""
+        return self._dias[:len(self)]
+
+
+    def leer(self, desde: Optional[int] = None, hasta: Optional[int] = None, paises=None,
+             columnas: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Días [desde, hasta] (ambos incluidos) de los países indicados
+
+        Args:
+            desde, hasta: Primer y último día (None = desde el principio / hasta el final)
+            paises: None (todos), un slice o una lista de índices. Con None o slice el
+                resultado es una vista del memmap, sin copias
+            columnas: Compartimentos a leer (por defecto los cuatro)
+
+        Returns:
+            (dias, datos) con datos de forma (días, columnas, países)
+        """
+        dias: np.ndarray = self.dias
+        inicio: int = 0 if desde is None else int(np.searchsorted(dias, desde, side="left"))
+        fin: int = len(dias) if hasta is None else int(np.searchsorted(dias, hasta, side="right"))
+
+        datos: np.ndarray = self._datos[inicio:fin]
+        if columnas is not None:
+            k: list = [self.COLUMNAS.index(c) for c in columnas]
+            datos = datos[:, k[0]:k[0] + 1] if len(k) == 1 else datos[:, k]
+        if paises is not None:
+            datos = datos[:, :, paises]
+        return dias[inicio:fin], datos
+
+
+    def serie(self, pais: int, columna: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Curva completa de un compartimento de un país: (dias, valores)"""
+        dias, datos = self.leer(paises=slice(pais, pais + 1), columnas=[columna])
+        return dias, datos[:, 0, 0]
+
+
+    def cerrar(self) -> None:
+        if not self.solo_lectura: self.confirmar()
+        del self._datos, self._dias, self._cabecera
+
+
+    @staticmethod
+    def borrar(carpeta: str) -> None:
+        shutil.rmtree(carpeta, ignore_errors=True)
@@ -0,0 +1,267 @@
+"""
+Servidor de simulación en un proceso aparte (no importa Qt)
+
+El motor corre en su propio proceso y escribe S, I, R y M en un bloque de memoria
+compartida con dos ranuras y un contador de secuencia. La interfaz lee la ranura publicada
+sin copiarla; el servidor escribe siempre en la otra y no vuelve a tocar una ranura hasta
+que la interfaz ha adoptado la más reciente, así nunca se lee un día a medias.
+
+Las órdenes (marcha, intervalo, opciones, reinicio, cheat, salir) llegan por una Pipe de
+multiprocessing, por la que vuelven también los eventos nuevos del registro de contagios
+y los deltas de la grabación de días. Lo arranca controllers/proceso_simulacion.py con OptionsBase.MODO_SIMULACION = "proceso".
+"""
+from backend.options_base import HeadlessOptions
+from backend.engine import Engine
+from backend.world_state import WorldState
+from multiprocessing import shared_memory
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class EstadoCompartido:
+    """
+    Bloque de memoria compartida con la cabecera y dos ranuras (4, países) de float64
+
+    Cabecera (int64): publicado, leido, y por ranura el día, el estado de la partida y la
+    generación (cambia con cada reinicio). "publicado" es la secuencia de la última foto
+    completa y vive en la ranura publicado % 2; "leido" es la que tiene adoptada la interfaz.
+    """
+
+    COLUMNAS: List[str] = WorldState.COLUMNAS_COMPARTIMENTOS
+    ESTADOS: Tuple[str, ...] = ("PLAYING", "Extinción Total", "Virus Erradicado")
+
+    _PUBLICADO, _LEIDO, _DIA, _STATUS, _GENERACION = 0, 1, 2, 4, 6
+    _CABECERA: int = 8
+
+    def __init__(self, bloque: shared_memory.SharedMemory, n: int, propietario: bool) -> None:
+        self.n: int = n
+        self._bloque: shared_memory.SharedMemory = bloque
+        self._propietario: bool = propietario
+        self.cabecera: np.ndarray = np.ndarray((self._CABECERA,), dtype=np.int64, buffer=bloque.buf)
+        self.ranuras: np.ndarray = np.ndarray((2, len(self.COLUMNAS), n), dtype=np.float64,
+                                              buffer=bloque.buf, offset=self.cabecera.nbytes)
+
+
+    @classmethod
+    def tamano(cls, n: int) -> int:
+        return cls._CABECERA * 8 + 2 * len(cls.COLUMNAS) * n * 8
+
+
+    @classmethod
+    def crear(cls, n: int) -> "EstadoCompartido":
+        estado = cls(shared_memory.SharedMemory(create=True, size=cls.tamano(n)), n, propietario=True)
+        estado.cabecera[:] = 0
+        estado.cabecera[cls._LEIDO] = -1
+        return estado
+
+
+    @classmethod
+    def adjuntar(cls, nombre: str, n: int) -> "EstadoCompartido":
+        try:
+            bloque = shared_memory.SharedMemory(name=nombre, track=False)
+        except TypeError:
+            # Python < 3.13 no tiene track=False
+            bloque = shared_memory.SharedMemory(name=nombre)
+        return cls(bloque, n, propietario=False)
+
+
+    @property
+    def nombre(self) -> str:
+        return self._bloque.name
+
+
+    # ----------------------------- Escritor (servidor) -----------------------------
+
+    def puede_escribir(self) -> bool:
+        """True si la interfaz ya adoptó la última foto (la otra ranura está libre)"""
+        publicado: int = int(self.cabecera[self._PUBLICADO])
+        return publicado == 0 or int(self.cabecera[self._LEIDO]) == publicado
+
+
+    def publicar(self, estado: WorldState, dia: int, status: str, generacion: int) -> None:
+        """Escribe el estado en la ranura libre y después avanza la secuencia"""
+        secuencia: int = int(self.cabecera[self._PUBLICADO]) + 1
+        ranura: int = secuencia % 2
+        for k, col in enumerate(self.COLUMNAS):
+            np.copyto(self.ranuras[ranura, k], getattr(estado, col))
+        self.cabecera[self._DIA + ranura] = dia
+        self.cabecera[self._STATUS + ranura] = self.ESTADOS.index(status) if status in self.ESTADOS else 0
+        self.cabecera[self._GENERACION + ranura] = generacion
+        self.cabecera[self._PUBLICADO] = secuencia
+
+
+    # ------------------------------ Lector (interfaz) ------------------------------
+
+    def secuencia(self) -> int:
+        return int(self.cabecera[self._PUBLICADO])
+
+
+    def generacion(self) -> int:
+        """Generación (partida) de la última foto publicada"""
+        return int(self.cabecera[self._GENERACION + int(self.cabecera[self._PUBLICADO]) % 2])
+
+
+    def adoptar(self) -> Tuple[int, Dict[str, np.ndarray], int, str, int]:
+        """
+        Marca la última foto como leída y devuelve vistas de solo lectura sobre su ranura
+        (válidas hasta la siguiente llamada: el servidor no la reescribe antes)
+
+        Returns:
+            (secuencia, {"S": ..., "I": ..., "R": ..., "M": ...}, dia, status, generacion)
+        """
+        secuencia: int = int(self.cabecera[self._PUBLICADO])
+        self.cabecera[self._LEIDO] = secuencia
+        ranura: int = secuencia % 2
+
+        arrays: Dict[str, np.ndarray] = {}
+        for k, col in enumerate(self.COLUMNAS):
+            vista: np.ndarray = self.ranuras[ranura, k].view()
+            vista.flags.writeable = False
+            arrays[col] = vista
+        return (secuencia, arrays, int(self.cabecera[self._DIA + ranura]),
+                self.ESTADOS[int(self.cabecera[self._STATUS + ranura])], int(self.cabecera[self._GENERACION + ranura]))
+
+
+    def cerrar(self) -> None:
+        """Suelta el bloque; el proceso que lo creó además lo elimina"""
+        del self.cabecera, self.ranuras
+        try:
+            self._bloque.close()
+        except BufferError:
+            # Alguien sigue con vistas abiertas (la última foto de la interfaz); el SO lo
+            # libera al terminar el proceso
+            pass
+        if self._propietario: self._bloque.unlink()
+
+
+
+def _esperar_lector(estado: EstadoCompartido, maximo_s: float = 1.0) -> bool:
+    """Espera (con tope) a que la interfaz adopte la última foto"""
+    limite: float = time.monotonic() + maximo_s
+    while not estado.puede_escribir():
+        if time.monotonic() > limite: return False
+        time.sleep(0.002)
+    return True
+
+
+def _bienvenida(motor: Engine, estado: EstadoCompartido, generacion: int) -> Dict:
+    """Lo que la interfaz necesita una vez por partida: el bloque y las columnas estáticas"""
+    estaticas: List[str] = [c for c in motor.dataframe.columns
+                            if c not in WorldState.COLUMNAS_COMPARTIMENTOS + WorldState.COLUMNAS_COOLDOWN + WorldState.COLUMNAS_TASAS]
+    return {
+        "bloque": estado.nombre,
+        "n": estado.n,
+        "base": motor.dataframe[estaticas].copy(),
+        "primer_pais": motor.primer_pais,
+        "generacion": generacion,
+    }
+
+
+def servir(conexion, valores: Dict) -> None:
+    """
+    Bucle principal del proceso servidor
+
+    Args:
+        conexion: Extremo de una multiprocessing.Pipe. Recibe tuplas (orden, *argumentos)
+            y envía ("inicio", bienvenida) al arrancar o reiniciar, ("primer_pais", nombre),
+            ("eventos", columnas) con las introducciones nuevas de cada tick, ("totales",
+            columnas) con los totales mundiales de los días nuevos (ver TotalesDiarios.pendientes)
+            y ("repeticion", columnas) con los días grabados nuevos (ver Repeticion.pendientes)
+        valores: Opciones a sobrescribir en HeadlessOptions (tasas, país de inicio, ...)
+    """
+    opciones: HeadlessOptions = HeadlessOptions(**valores)
+    motor: Engine = Engine(opciones)
+    generacion: int = 0
+    estado: EstadoCompartido = EstadoCompartido.crear(motor.estado.n)
+    estado.publicar(motor.estado, motor.dia_simulacion, "PLAYING", generacion)
+    conexion.send(("inicio", _bienvenida(motor, estado, generacion)))
+
+    en_marcha: bool = False
+    intervalo_s: float = 1.0
+    proximo: float = time.monotonic()
+    primer_pais: Optional[str] = motor.primer_pais
+    eventos_enviados: int = 0
+    # Partida reiniciada cuya primera foto espera a que la interfaz suelte la ranura
+    por_publicar: bool = False
+
+    def enviar_dias() -> None:
+        totales: Optional[Dict] = motor.totales.pendientes()
+        if totales is not None: conexion.send(("totales", totales))
+        dias: Optional[Dict] = motor.repeticion.pendientes() if motor.repeticion is not None else None
+        if dias is not None: conexion.send(("repeticion", dias))
+
+    def avanzar() -> None:
+        nonlocal en_marcha, primer_pais, eventos_enviados
+        resultado: Dict = motor.avanzar_dias(1, incluir_datos=False)
+        if resultado["status"] != "PLAYING": en_marcha = False
+        # Los eventos, los totales y los días grabados van antes que la foto, así la interfaz ya los tiene al adoptarla
+        if len(motor.registro) > eventos_enviados:
+            conexion.send(("eventos", {col: valores.copy() for col, valores in motor.registro.columnas(eventos_enviados).items()}))
+            eventos_enviados = len(motor.registro)
+        enviar_dias()
+        estado.publicar(motor.estado, motor.dia_simulacion, resultado["status"], generacion)
+        if motor.primer_pais != primer_pais:
+            primer_pais = motor.primer_pais
+            conexion.send(("primer_pais", primer_pais))
+
+    def publicar_partida() -> None:
+        nonlocal por_publicar
+        estado.publicar(motor.estado, motor.dia_simulacion, "PLAYING", generacion)
+        conexion.send(("inicio", _bienvenida(motor, estado, generacion)))
+        enviar_dias()
+        por_publicar = False
+
+    try:
+        enviar_dias()
+        while True:
+            if por_publicar and estado.puede_escribir(): publicar_partida()
+            # Con una partida por publicar se vuelve a mirar pronto si la interfaz ya soltó la ranura
+            espera: Optional[float] = 0.01 if por_publicar else (max(0.0, proximo - time.monotonic()) if en_marcha else None)
+            if conexion.poll(espera):
+                orden, *argumentos = conexion.recv()
+                if orden == "salir": break
+                elif orden == "marcha":
+                    en_marcha = bool(argumentos[0])
+                    proximo = time.monotonic() + intervalo_s
+                    if not en_marcha: motor.vaciar_guardado()
+                elif orden == "intervalo":
+                    intervalo_s = argumentos[0] / 1000
+                elif orden == "opcion":
+                    setattr(opciones, argumentos[0], argumentos[1])
+                elif orden == "reiniciar":
+                    en_marcha = False
+                    try:
+                        motor.cerrar()
+                        motor.csv.limpiar_db()
+                    except: pass
+                    motor = Engine(opciones)
+                    generacion = argumentos[0]
+                    primer_pais = motor.primer_pais
+                    eventos_enviados = 0
+                    if motor.estado.n != estado.n:
+                        estado.cerrar()
+                        estado = EstadoCompartido.crear(motor.estado.n)
+                    # Si la interfaz sigue leyendo la última foto, la primera de la partida nueva
+                    # se publica en una vuelta siguiente, cuando la adopte
+                    por_publicar = True
+                    if estado.puede_escribir(): publicar_partida()
+                elif orden == "cheat":
+                    en_marcha = False
+                    if not por_publicar and _esperar_lector(estado):
+                        motor.cheat_fin_rapido()
+                        avanzar()
+                continue
+
+            # Sin la primera foto de la partida nueva no hay ticks
+            if por_publicar: continue
+
+            # Toca un tick. Si la interfaz aún no adoptó la última foto, se espera al siguiente
+            proximo = time.monotonic() + intervalo_s
+            if estado.puede_escribir(): avanzar()
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        # La interfaz se cerró sin avisar
+        pass
+    finally:
+        motor.cerrar()
+        estado.cerrar()
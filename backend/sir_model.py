@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
+from backend.world_state import WorldState
+from backend.grafo_vecinos import GrafoVecinos
+from backend.movilidad import MatrizMovilidad, matrices_gravedad
+from backend.registro_contagios import RegistroContagios
+from backend import kernels
 
 
 class SIR:
@@ -9,16 +14,61 @@ class SIR:
     esta clase contiene toda la lógica matemática para que este modelo sea altamente realista
     """
 
-    def __init__(self, mapa_mundo, df, opt) -> None:
-        self.mapa_mundo: pd.Dataframe = mapa_mundo
-        self.df: pd.Dataframe = df
+    def __init__(self, mapa_mundo, df, opt, grafo: Optional[GrafoVecinos] = None, mascaras: Optional[tuple] = None,
+                 rng: Optional[np.random.Generator] = None,
+                 movilidad: Optional[Dict[str, MatrizMovilidad]] = None) -> None:
+        """
+        Args:
+            mapa_mundo: Diccionario nombre -> índice
+            df: DataFrame del mundo
+            opt: Opciones de la simulación
+            grafo, mascaras: Grafo de fronteras y máscaras (vuelos, puertos) ya calculados.
+                Si no se indican se construyen a partir del DataFrame
+            rng: Generador aleatorio del que salen todas las tiradas del modelo
+            movilidad: Matrices {"vuelo", "puerto"} ya calculadas para MODO_LOGISTICA = "gravedad".
+                Si no se indican se construyen a partir de la población y las máscaras
+        """
+        self.mapa_mundo: pd.DataFrame = mapa_mundo
+        self.df: pd.DataFrame = df
         self.opt = opt         
+        self.rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
+        if mascaras is None:
+            mascaras = (self.mascara_transporte(self.df, "vuelo"), self.mascara_transporte(self.df, "puerto"))
+        self._mascara_vuelos, self._mascara_puertos = mascaras
+
+        # Estado numérico sobre el que trabaja todo el modelo. El DataFrame solo se
+        # actualiza desde aquí en las fronteras (guardado, exportación e interfaz)
+        self.estado: WorldState = WorldState.desde_df(self.df)
+        self.grafo: GrafoVecinos = grafo if grafo is not None else GrafoVecinos.desde_df(self.df, self.mapa_mundo)
+
+        # Matrices origen-destino (solo en modo gravedad)
+        self.movilidad: Optional[Dict[str, MatrizMovilidad]] = None
+        if self.opt.MODO_LOGISTICA == "gravedad":
+            self.movilidad = movilidad if movilidad is not None else matrices_gravedad(
+                self.estado.poblacion, self._mascara_vuelos, self._mascara_puertos, self.opt)
+        elif self.opt.MODO_LOGISTICA != "global":
+            raise ValueError(f"MODO_LOGISTICA desconocido: {self.opt.MODO_LOGISTICA}")
+
+        # Introducciones del virus en cada país (quién contagió a quién, qué día y por dónde)
+        self.registro: RegistroContagios = RegistroContagios()
+
+        # Arrays de trabajo del paso SIRD, vivos durante toda la partida
+        self._buferes: Optional[kernels.BuferesSIRD] = (
+            kernels.BuferesSIRD(self.estado.S.shape) if self.opt.KERNEL_EN_SITIO else None
+        )
+        # Últimas tasas escritas en el estado (solo se reescriben si cambian)
+        self._tasas: Optional[tuple] = None
+
+
+    @staticmethod
+    def mascara_transporte(df: pd.DataFrame, columna: str) -> np.ndarray:
+        """Países con acceso a vuelos/puertos según el texto de la columna indicada"""
+        if columna not in df.columns: return np.zeros(len(df), dtype=bool)
         filtro = "accesible|océano|mar|rutas internacionales"
-        self._mascara_vuelos: pd.Series = self.df["vuelo"].astype(str).str.lower().str.contains(filtro)
-        self._mascara_puertos: pd.Series = self.df["puerto"].astype(str).str.lower().str.contains(filtro)
+        return df[columna].astype(str).str.lower().str.contains(filtro).to_numpy(dtype=bool)
 
 
-    def infectar_primera_vez(self):
+    def infectar_primera_vez(self, dia_actual: int = 1):
         """Inicia la infección del virus """
         
         infectados_iniciales: str = self.opt.INFECTADOS_INICIALES
@@ -35,180 +85,107 @@ class SIR:
             # Actualiza el nombre en opciones para que la UI lo sepa
             self.opt.PAIS_INICIO: str = self.df.at[paciente_cero_index, "Country Name"]
         
-        poblacion_pais: float = self.df.loc[paciente_cero_index, "poblacion"]
+        poblacion_pais: float = self.estado.poblacion[paciente_cero_index]
         infectados_reales: float = min(infectados_iniciales, poblacion_pais)
         
-        self.df.loc[paciente_cero_index,"S"] -= infectados_reales
-        self.df.loc[paciente_cero_index,"I"] += infectados_reales
+        self.registro.registrar(dia_actual, np.array([-1]), np.array([paciente_cero_index]), "paciente_cero")
+        self.estado.S[paciente_cero_index] -= infectados_reales
+        self.estado.I[paciente_cero_index] += infectados_reales
         
 
 
 
+    def _registrar_introducciones(self, dia_actual: int, emisores: np.ndarray, victimas: np.ndarray, canal: str) -> None:
+        """
+        Anota en el registro los contagios cuya víctima aún no tenía infectados (si dos
+        emisores eligen el mismo país el mismo día, cuenta el primero). Va antes de infectar
+        """
+        nuevas: np.ndarray = self.estado.I[victimas] == 0
+        if not nuevas.any(): return
+        victimas, primera = np.unique(victimas[nuevas], return_index=True)
+        self.registro.registrar(dia_actual, emisores[nuevas][primera], victimas, canal)
+
+
+    def _lote(self, array: np.ndarray) -> np.ndarray:
+        """Vista (1, N) de un array del estado, para usar los núcleos por lotes de kernels.py"""
+        return array.reshape(1, -1)
+
+
     def actualizar_cooldowns(self):
         """Resta 1 día al contador de espera de todos los países para evitar que un país contagie
             demasiado rápido
         """
         
-        # Uso de vectorización para restar 1, pero sin bajar de 0
-        self.df["cooldown_vuelo"]: pd.Series = np.maximum(0, self.df["cooldown_vuelo"] - 1)
-        self.df["cooldown_puerto"]: pd.Series = np.maximum(0, self.df["cooldown_puerto"] - 1)
-        self.df["cooldown_frontera"]: pd.Series = np.maximum(0, self.df["cooldown_frontera"] - 1)
+        kernels.actualizar_cooldowns(self.estado.cooldown_vuelo, self.estado.cooldown_puerto, self.estado.cooldown_frontera)
 
 
         
-    def procesar_fronteras_inteligente(self) -> None:
+    def procesar_fronteras_inteligente(self, dia_actual: int = 0) -> None:
         """
         Lógica de contagio vecinal:
         1. Emisor > 20% Infectados.
         2. Cooldown Frontera == 0.
         3. Elige 1 vecino aleatorio disponible.
-        """
-        
-        # 1. Filtra países peligrosos (Emisores)
-        poblacion_minima: int = 1
-        pct_infectados: pd.Series = self.df["I"] / np.maximum(self.df["poblacion"], poblacion_minima)
 
-        condicion_infeccion = (pct_infectados >= self.opt.UMBRAL_PCT_FRONTERA) | \
-                              (self.df["I"] > self.opt.UMBRAL_INFECCION_EXTERNO)
+        Se resuelve en una sola pasada vectorizada sobre las aristas del grafo, así que el
+        coste no depende de cuántos países estén emitiendo.
+        """
         
-        mask_emisores: pd.Series = (
-            (pct_infectados >= self.opt.UMBRAL_PCT_FRONTERA) &
-            (self.df["cooldown_frontera"] == 0) &
-            (self.df["vecinos"] != "No") # Que tenga vecinos
+        estado: WorldState = self.estado
+        _, emisores, victimas = kernels.contagio_fronteras(
+            self._lote(estado.S), self._lote(estado.I), estado.poblacion, self._lote(estado.cooldown_frontera),
+            self.grafo, self.opt.UMBRAL_PCT_FRONTERA, self.opt.DIAS_COOLDOWN_FRONTERA, self.rng
         )
-        
-        indices_emisores: List[int]|None = self.df[mask_emisores].index.tolist()
-        
-        if not indices_emisores: return # Nadie puede infectar hoy
-
-        infectados_nuevos: List = []
-
-        # 2. Itera solo sobre los países peligrosos
-        for emisor_idx in indices_emisores:
-            # Obteniene la cadena de vecinos "China, Russia, Mongolia"
-            vecinos_str: str = self.df.at[emisor_idx, "vecinos"]
-            if not vecinos_str or vecinos_str == "No": continue
-
-            lista_vecinos_nombres: List[str] = [v.strip() for v in vecinos_str.split(",")]
-            
-            # Convertimos nombres a índices numéricos usando self.mapa_mundo
-            vecinos_indices: List[int] = []
-            
-            for nombre in lista_vecinos_nombres:
-            
-                 # Ignorar si dice "Ninguno" o "No"
-                 if "Ninguno" in nombre or nombre == "No": continue
-                 
-                 idx: int|None = self.mapa_mundo.get(nombre)
-                 if idx is None:
-                    continue
-                 
-                 vecinos_indices.append(idx)
-            
-            if not vecinos_indices: continue
-
-            # Filtra Solo vecinos que estén SANOS
-            vecinos_validos = [idx for idx in vecinos_indices if self.df.at[idx, "S"] > 0]
-            
-            if vecinos_validos:
-                # 4. DADO: Elegir UNO al azar
-                victima_idx: int = np.random.choice(vecinos_validos)
-                
-                # Infectamos a la víctima
-                infectados_nuevos.append(victima_idx)
-                
-                # Cooldown al emisor
-                self.df.at[emisor_idx, "cooldown_frontera"] = self.opt.DIAS_COOLDOWN_FRONTERA
-                
+        self._registrar_introducciones(dia_actual, emisores, victimas, "frontera")
 
         # Aplicar infecciones en lote
-        if infectados_nuevos:
-            self.infectar_multiples(np.array(infectados_nuevos))
+        self.infectar_multiples(victimas)
 
             
 
-    def procesar_logistica(self, tipo_transporte: str = "vuelo" ) -> None :
+    def procesar_logistica(self, tipo_transporte: str = "vuelo", dia_actual: int = 0) -> None :
         """
         Lógica avanzada:
         1. Emisor debe tener > 40% infectados.
         2. Emisor debe tener cooldown == 0.
         3. Elige 1 víctima al azar.
         4. Aplica cooldown al emisor.
+
+        Con MODO_LOGISTICA = "gravedad" se usa en cambio la matriz origen-destino del transporte
+        (ver kernels.contagio_movilidad): sin umbral ni cooldown.
         """
         
         # Seleccionar columna y cooldown correcto
-        col_cooldown:str = "cooldown_vuelo" if tipo_transporte == "vuelo" else "cooldown_puerto"
-        mascara_conexion:str = self._mascara_vuelos if tipo_transporte == "vuelo" else self._mascara_puertos
-        
-        # IDENTIFICAR EMISORES (Países peligrosos)
-        # Regla: Tienen conexión + Infectados > 40% + Cooldown en 0
-        poblacion_minima: int = 1 # Evitar división por cero
-        pct_infectados: pd.Series = self.df["I"] / np.maximum(self.df["poblacion"], poblacion_minima)
-        
-        # Filtro booleano vectorizado
-        emisores_validos: pd.Dataframe = (
-            mascara_conexion & 
-            (pct_infectados >= self.opt.UMBRAL_PCT_TRANSPORTE) & 
-            (self.df[col_cooldown] == 0) &
-            (self.df["I"] > 0)
-        )
-        
-        indices_emisores: List[int]|None = self.df[emisores_validos].index.tolist()
-        
-        if not indices_emisores:
-            return # Nadie cumple los requisitos para atacar hoy
-
-        # IDENTIFICAR VÍCTIMAS POTENCIALES (Cualquiera con conexión y Sano)
-        # Asume "Global Connection": Si tienes aeropuerto, puedes ir a cualquier aeropuerto
-        victimas_validas: pd.Series = (
-            mascara_conexion & 
-            (self.df["I"] == 0) & 
-            (self.df["S"] > 0)
+        estado: WorldState = self.estado
+        if self.movilidad is not None:
+            corridas, emisores, victimas, cantidades = kernels.contagio_movilidad(
+                self._lote(estado.S), self._lote(estado.I), estado.poblacion, self.movilidad[tipo_transporte], self.rng
+            )
+            self._registrar_introducciones(dia_actual, emisores, victimas, tipo_transporte)
+            kernels.infectar(self._lote(estado.S), self._lote(estado.I), corridas, victimas, cantidades)
+            return
+
+        cooldown: np.ndarray = estado.cooldown_vuelo if tipo_transporte == "vuelo" else estado.cooldown_puerto
+        mascara_conexion: np.ndarray = self._mascara_vuelos if tipo_transporte == "vuelo" else self._mascara_puertos
+
+        _, emisores, victimas = kernels.contagio_logistica(
+            self._lote(estado.S), self._lote(estado.I), estado.poblacion, self._lote(cooldown),
+            mascara_conexion, self.opt.UMBRAL_PCT_TRANSPORTE, self.opt.PROBABILIDAD_INFECTAR_VUELO,
+            self.opt.DIAS_COOLDOWN_TRANSPORTE, self.rng
         )
-        
-        indices_victimas: List[int]|None = self.df[victimas_validas].index.tolist()
-
-        if not indices_victimas:
-            return # Ya no queda nadie sano con aeropuerto/puerto
-
-        # LANZAR LOS DADOS 
-        # Solo iteramos sobre los emisores, que serán pocos al inicio.
-        nuevos_infectados: List[int] = []
-        
-        # Baraja víctimas para evitar sesgos
-        np.random.shuffle(indices_victimas)
-        
-        for emisor_idx in indices_emisores:
-            if not indices_victimas: break # Se acabaron las víctimas
-            
-            # Probabilidad de éxito del viaje
-            if np.random.random() < self.opt.PROBABILIDAD_INFECTAR_VUELO:
-                # Tomamos una víctima y la sacamos de la lista para que no la infecten 2 veces en un día
-                victima: int = indices_victimas.pop() 
-                nuevos_infectados.append(victima)
-                
-                # Cooldown de 3 días
-                self.df.at[emisor_idx, col_cooldown] = self.opt.DIAS_COOLDOWN_TRANSPORTE
-                
-
-                nombre_emisor: str = self.df.at[emisor_idx, "Country Name"]
-                nombre_victima: str = self.df.at[victima, "Country Name"]
+        self._registrar_introducciones(dia_actual, emisores, victimas, tipo_transporte)
 
         # APLICAR INFECCIÓN
-        if nuevos_infectados:
-            self.infectar_multiples(np.array(nuevos_infectados))
+        self.infectar_multiples(victimas)
 
             
 
-    def infectar_multiples(self, indices: np.NDArray) -> None:
+    def infectar_multiples(self, indices: np.ndarray) -> None:
         """
             Infectar a múltiples países a la vez usando numpy para que sea instantáneo
         """
-        if len(indices) == 0: return
-        sanos_disponibles: pd.Series = self.df.loc[indices, "S"]
-        infectados_reales: np.NDArray = np.minimum(self.opt.INFECTADOS_INICIALES_VECINOS, sanos_disponibles)
-        self.df.loc[indices, "S"] -= infectados_reales
-        self.df.loc[indices, "I"] += infectados_reales
+        kernels.infectar(self._lote(self.estado.S), self._lote(self.estado.I), np.zeros_like(indices), indices,
+                         self.opt.INFECTADOS_INICIALES_VECINOS)
 
         
 
@@ -220,92 +197,38 @@ class SIR:
                 pais_infectado: Nombre del país infectado
         """
         
-        lista_paises: pd.Series = self.df[self.df["Country Name"] == pais_infectado]
-        if lista_paises.empty: return None
-        vecinos: List[str]|None = list(lista_paises["vecinos"])
-        if not vecinos: return None
-        paises: List[str]|None = vecinos[0].split(",")
-        indexses: List[int]|None = []
-        for i in paises:
-            index = self.mapa_mundo.get(i.strip())
-            if index is not None: indexses.append(index)
-        if not indexses: return None
-        else:
-            infectados: pd.Dataframe = self.df.loc[indexses]
-            return infectados[infectados["I"] == 0].index.tolist()
+        idx: int|None = self.mapa_mundo.get(pais_infectado)
+        if idx is None: return None
+        vecinos: np.ndarray = self.grafo.vecinos_de(idx)
+        if len(vecinos) == 0: return None
+        return vecinos[self.estado.I[vecinos] == 0].tolist()
 
 
-    def ejecutar(self, dia_actual: str) -> pd.Dataframe:
+    def ejecutar(self, dia_actual: int) -> WorldState:
         """
             Método Principal de la clase, realiza toda la lógica matemática para la infección
         """
         
-        # Carga tasas base
-        self.df["beta"]: pd.Series = self.opt.beta
-        
+        estado: WorldState = self.estado
+
+        # Carga tasas base (se rellenan en el mismo array, y solo cuando cambian)
         if dia_actual <= 4:
-            self.df["gamma"]: pd.Series = 0.0
-            self.df["mu"]: pd.Series = 0.0
+            tasas: tuple = (self.opt.beta, 0.0, 0.0)
         else:
             # A partir del día 16, usamos los valores de los sliders para evitar que la infección
             # se extinga antes de tiempo
-            self.df["gamma"]: pd.Series = self.opt.gamma
-            self.df["mu"] :pd.Series = self.opt.mu
+            tasas: tuple = (self.opt.beta, self.opt.gamma, self.opt.mu)
 
-        # ----------------------------------------------------
+        if tasas != self._tasas:
+            for columna, valor in zip((estado.beta, estado.gamma, estado.mu), tasas):
+                columna.fill(valor)
+            self._tasas = tasas
 
-        # Cálculos SIRD Vectorizados
-        sano_a_infectado: pd.Series = self.df["beta"] * self.df["S"] * self.df["I"] / (self.df["poblacion"] + 1)
-        sano_a_infectado: pd.Series = sano_a_infectado.clip(upper=self.df["S"])
-
-        infectado_a_recuperado: pd.Series = self.df["I"] * self.df["gamma"]
-        infectado_a_muerto: pd.Series = self.df["I"] * self.df["mu"]
-
-        total_salidas: pd.Series = infectado_a_recuperado + infectado_a_muerto
-        factor: np.NDArray = np.ones_like(self.df["I"])
-        mask_exceso: pd.Series = total_salidas > self.df["I"]
-        if mask_exceso.any():
-            factor[mask_exceso]: pd.Series = self.df.loc[mask_exceso, "I"] / (total_salidas[mask_exceso] + 1e-9)
+        # ----------------------------------------------------
 
-        infectado_a_recuperado *= factor
-        infectado_a_muerto *= factor
-        
-        self.df["S"] -= sano_a_infectado
-        self.df["I"] += (sano_a_infectado - infectado_a_recuperado - infectado_a_muerto)
-        self.df["R"] += infectado_a_recuperado
-        self.df["M"] += infectado_a_muerto
-
-        # =============================================================
-        # LIMPIEZA AUTOMÁTICA (Solo aplica DESPUÉS del día 15)
-        # =============================================================
-        if dia_actual > 15:
-            tasa_salida_total: pd.Series = self.df["gamma"] + self.df["mu"]
-            
-            # Solo limpia si hay MENOS de 1 infectado (residuos decimales 0.005, etc)
-            erradicacion: pd.Series = (self.df["I"] > 0) & \
-                           (self.df["I"] < self.opt.UMBRAL_ERRADICACION) & \
-                           (tasa_salida_total > 0)
-
-            if erradicacion.any():
-                infectados_restantes: pd.Series|pd.Dataframe = self.df.loc[erradicacion, "I"].copy()
-                
-                gamma_vec: pd.Series = self.df.loc[erradicacion, "gamma"]
-                total_vec: pd.Series = tasa_salida_total[erradicacion]
-                
-                # Evitar división por cero
-                prop_recuperacion: np.NDArray = np.zeros_like(gamma_vec)
-                mask_total_pos: pd.Series = total_vec > 0
-                prop_recuperacion[mask_total_pos]: pd.Series = gamma_vec[mask_total_pos] / total_vec[mask_total_pos]
-                
-                recuperados_finales: pd.Series = (infectados_restantes * prop_recuperacion).round(0)
-                muertes_finales: pd.Series = infectados_restantes - recuperados_finales
-
-                self.df.loc[erradicacion, "M"] += muertes_finales
-                self.df.loc[erradicacion, "R"] += recuperados_finales
-                self.df.loc[erradicacion, "I"]: pd.Series = 0
-
-        # Redondeo seguro para visualización
-        cols_a_redondear: List[str] = ["S", "I", "R", "M"]
-        self.df[cols_a_redondear]: pd.Dataframe = self.df[cols_a_redondear].clip(lower=0)        
+        kernels.paso_sird(estado.S, estado.I, estado.R, estado.M, estado.poblacion,
+                          estado.beta, estado.gamma, estado.mu,
+                          dia_actual, self.opt.UMBRAL_ERRADICACION, self._buferes,
+                          self.opt.INTEGRADOR, self.opt.SUBPASOS_RK4, self.opt.TOLERANCIA_RK45, self.rng)
         
-        return self.df
+        return estado
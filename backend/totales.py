@@ -0,0 +1,198 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class TotalesDiarios:
+    """
+    Totales mundiales de S, I, R y M de cada día simulado, en arrays de NumPy en memoria
+
+    El motor añade un día por tick (cuatro sumas) y la gráfica pide solo los días que aún no
+    tiene (ver columnas()), así que ni se vuelve a leer la tabla historial de SQLite ni se
+    convierte la partida entera a listas en cada refresco. En partidas largas pide un resumen
+    de a lo sumo dos puntos por píxel (ver resumen()).
+
+    Como RegistroContagios: un solo hilo escribe, las filas ya escritas no cambian y al crecer
+    se copian antes de cambiar de array, así que otro hilo puede leer los días ya publicados
+    sin esperar al escritor. Volver a un día anterior (truncar) sube `version`, para que quien
+    tenga una copia sepa que debe pedirla entera otra vez.
+    """
+
+    COLUMNAS: Tuple[str, ...] = ("S", "I", "R", "M")
+
+    def __init__(self, capacidad: int = 512) -> None:
+        self._filas: int = 0
+        self.version: int = 0
+        self.dia: np.ndarray = np.empty(capacidad, dtype=np.int32)
+        self.valores: np.ndarray = np.empty((capacidad, len(self.COLUMNAS)), dtype=np.float64)
+        # Primera fila que la copia remota todavía no tiene
+        self._sin_enviar: int = 0
+        # Resúmenes por nivel de zoom: nivel -> (versión, días (cubos, 2), valores (cubos, 2, 4)).
+        # Solo los toca quien lee (la interfaz), así que no compiten con el escritor
+        self._resumenes: Dict[int, Tuple[int, np.ndarray, np.ndarray]] = {}
+
+
+    def __len__(self) -> int:
+        return self._filas
+
+
+    @property
+    def ultimo_dia(self) -> Optional[int]:
+        return int(self.dia[self._filas - 1]) if self._filas else None
+
+
+    # ----------------------------- Escritura -----------------------------
+
+    def _asegurar(self, extra: int) -> None:
+        """Duplica la capacidad hasta que quepan `extra` días más"""
+        capacidad: int = len(self.dia)
+        if self._filas + extra <= capacidad: return
+        while capacidad < self._filas + extra: capacidad *= 2
+        for nombre in ("dia", "valores"):
+            viejo: np.ndarray = getattr(self, nombre)
+            nuevo: np.ndarray = np.empty((capacidad,) + viejo.shape[1:], dtype=viejo.dtype)
+            nuevo[:self._filas] = viejo[:self._filas]
+            setattr(self, nombre, nuevo)
+
+
+    def _anadir(self, dias: np.ndarray, valores: np.ndarray) -> None:
+        if len(dias) == 0: return
+        # Un día igual o anterior al último reemplaza lo grabado desde ese día
+        if self._filas and int(dias[0]) <= self.ultimo_dia: self.truncar(int(dias[0]))
+        self._asegurar(len(dias))
+        fin: int = self._filas + len(dias)
+        self.dia[self._filas:fin] = dias
+        self.valores[self._filas:fin] = valores
+        # La fila se publica al final: quien lea antes no ve un día a medio escribir
+        self._filas = fin
+
+
+    def registrar(self, dia: int, estado) -> None:
+        """Añade el día `dia` sumando S, I, R y M de un WorldState (o cualquier objeto con esos arrays)"""
+        fila: np.ndarray = np.array([[getattr(estado, col).sum() for col in self.COLUMNAS]])
+        self._anadir(np.array([dia]), fila)
+
+
+    def cargar(self, historial) -> None:
+        """Añade los días de la tabla historial de SQLite (al abrir una partida guardada)"""
+        if historial.empty: return
+        dias: np.ndarray = historial["dia"].to_numpy(dtype=np.int64)
+        valores: np.ndarray = historial[[f"total_{col}" for col in self.COLUMNAS]].to_numpy(dtype=np.float64)
+        # Ordenados y sin repetir: si un día se guardó dos veces vale la última
+        dias, inverso = np.unique(dias[::-1], return_index=True)
+        self._anadir(dias, valores[::-1][inverso])
+
+
+    def truncar(self, dia: int) -> None:
+        """Descarta los días desde `dia` (al volver a un estado anterior)"""
+        filas: int = int(np.searchsorted(self.dia[:self._filas], dia, side="left"))
+        if filas == self._filas: return
+        self._filas = filas
+        self._sin_enviar = min(self._sin_enviar, filas)
+        self.version += 1
+
+
+    # ----------------------------- Copia en otro proceso -----------------------------
+
+    def pendientes(self) -> Optional[Dict[str, np.ndarray]]:
+        """Días añadidos desde la última llamada (copias), o None si no hay nada nuevo"""
+        desde: int = self._sin_enviar
+        if desde >= self._filas: return None
+        self._sin_enviar = self._filas
+        return {"dia": self.dia[desde:self._filas].copy(), "valores": self.valores[desde:self._filas].copy()}
+
+
+    def extender(self, columnas: Dict[str, np.ndarray]) -> None:
+        """Aplica los días que envió pendientes() (desde el otro proceso)"""
+        self._anadir(columnas["dia"], columnas["valores"])
+
+
+    # ----------------------------- Lectura -----------------------------
+
+    def columnas(self, desde: Optional[int] = None, hasta: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Días en (desde, hasta]: posteriores a `desde` y hasta `hasta` incluido
+
+        Returns:
+            (dias, valores) con valores de forma (días, 4) en el orden de COLUMNAS (vistas sin copia)
+        """
+        filas: int = self._filas
+        dias: np.ndarray = self.dia[:filas]
+        inicio: int = 0 if desde is None else int(np.searchsorted(dias, desde, side="right"))
+        fin: int = filas if hasta is None else int(np.searchsorted(dias, hasta, side="right"))
+        return dias[inicio:fin], self.valores[inicio:fin]
+
+
+    def _cubos(self, nivel: int, cubos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mínimo y máximo de cada columna en los `cubos` primeros cubos completos de 2**nivel
+        filas. Los cubos completos no cambian al añadir días: se guardan y solo se calculan
+        los nuevos (con otra versión, es decir tras truncar, se empieza de cero)
+        """
+        # La versión se toma antes de leer: si el escritor trunca mientras tanto, la próxima
+        # llamada ve otra versión y descarta lo calculado
+        actual: int = self.version
+        version, dias, valores = self._resumenes.get(nivel, (-1, None, None))
+        if version != actual:
+            dias, valores = np.empty((0, 2), np.int32), np.empty((0, 2, len(self.COLUMNAS)))
+        hechos: int = len(dias)
+        if cubos > hechos:
+            nuevos_dias, nuevos_valores = self._minmax(hechos << nivel, cubos << nivel, 1 << nivel)
+            dias = np.concatenate([dias, nuevos_dias])
+            valores = np.concatenate([valores, nuevos_valores])
+            self._resumenes[nivel] = (actual, dias, valores)
+        return dias[:cubos], valores[:cubos]
+
+
+    def _minmax(self, inicio: int, fin: int, tamano: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dos puntos por cubo de `tamano` filas en [inicio, fin): el mínimo y el máximo de cada
+        columna en el orden en que ocurren (así se conservan picos y valles), con el primer y
+        el último día del cubo como eje X
+        """
+        filas: int = fin - inicio
+        cubos: int = -(-filas // tamano)
+        bloque: np.ndarray = self.valores[inicio:fin]
+        if filas % tamano:
+            # Cubo incompleto: se rellena repitiendo su última fila (no cambia mínimo ni máximo)
+            bloque = np.concatenate([bloque, np.repeat(bloque[-1:], cubos * tamano - filas, axis=0)])
+        bloque = bloque.reshape(cubos, tamano, len(self.COLUMNAS))
+
+        posicion_min: np.ndarray = bloque.argmin(axis=1)
+        posicion_max: np.ndarray = bloque.argmax(axis=1)
+        minimo: np.ndarray = np.take_along_axis(bloque, posicion_min[:, None], axis=1)[:, 0]
+        maximo: np.ndarray = np.take_along_axis(bloque, posicion_max[:, None], axis=1)[:, 0]
+        primero_min: np.ndarray = posicion_min <= posicion_max
+        valores: np.ndarray = np.stack([np.where(primero_min, minimo, maximo), np.where(primero_min, maximo, minimo)], axis=1)
+
+        primeros: np.ndarray = np.arange(inicio, fin, tamano)
+        ultimos: np.ndarray = np.minimum(primeros + tamano, fin) - 1
+        dias: np.ndarray = np.stack([self.dia[primeros], self.dia[ultimos]], axis=1)
+        return dias, valores
+
+
+    def resumen(self, ancho: int, hasta: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Curva hasta el día `hasta` reducida para dibujarla en `ancho` píxeles
+
+        Se agrupan los días en cubos de 2**nivel filas, con el nivel más bajo que deja a lo
+        sumo `ancho` cubos, y de cada cubo quedan su mínimo y su máximo (dos puntos). Los cubos
+        completos de cada nivel quedan en caché, así que cada llamada cuesta O(ancho) más los
+        días nuevos, sin importar cuánto dure la partida. Con nivel 0 la curva va entera.
+
+        Returns:
+            (dias, valores, nivel) con valores de forma (puntos, 4) en el orden de COLUMNAS
+        """
+        filas: int = self._filas
+        if hasta is not None: filas = int(np.searchsorted(self.dia[:filas], hasta, side="right"))
+        ancho = max(1, int(ancho))
+        if filas <= ancho:
+            return self.dia[:filas], self.valores[:filas], 0
+
+        nivel: int = int(np.ceil(np.log2(filas / ancho)))
+        completos: int = filas >> nivel
+        dias, valores = self._cubos(nivel, completos)
+        if filas > completos << nivel:
+            resto_dias, resto_valores = self._minmax(completos << nivel, filas, 1 << nivel)
+            dias = np.concatenate([dias, resto_dias])
+            valores = np.concatenate([valores, resto_valores])
+        return dias.reshape(-1), valores.reshape(-1, len(self.COLUMNAS)), nivel
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+
+class WorldState:
+    """
+    Estado del mundo en formato struct-of-arrays (un array contiguo de NumPy por columna)
+
+    El modelo SIRD trabaja directamente sobre estos arrays en cada tick, sin pasar por la
+    indexación de pandas. La posición de cada país en los arrays coincide con su posición
+    (y su índice) en el DataFrame del que se construyó.
+    """
+
+    # Columnas que cambian durante la simulación y se vuelcan al DataFrame
+    COLUMNAS_COMPARTIMENTOS: List[str] = ["S", "I", "R", "M"]
+    COLUMNAS_COOLDOWN: List[str] = ["cooldown_vuelo", "cooldown_puerto", "cooldown_frontera"]
+    COLUMNAS_TASAS: List[str] = ["beta", "gamma", "mu"]
+
+    def __init__(self, n: int) -> None:
+        self.n: int = n
+
+        # Compartimentos SIRD (float64: el modelo trabaja con personas fraccionarias)
+        self.S: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.I: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.R: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.M: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.poblacion: np.ndarray = np.zeros(n, dtype=np.float64)
+
+        # Días de espera antes de que un país vuelva a contagiar por cada vía
+        self.cooldown_vuelo: np.ndarray = np.zeros(n, dtype=np.int64)
+        self.cooldown_puerto: np.ndarray = np.zeros(n, dtype=np.int64)
+        self.cooldown_frontera: np.ndarray = np.zeros(n, dtype=np.int64)
+
+        # Tasas por país
+        self.beta: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.gamma: np.ndarray = np.zeros(n, dtype=np.float64)
+        self.mu: np.ndarray = np.zeros(n, dtype=np.float64)
+
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame) -> "WorldState":
+        """Construye el estado copiando las columnas numéricas del DataFrame cargado"""
+        estado = cls(len(df))
+        estado.poblacion[:] = df["poblacion"].to_numpy(dtype=np.float64)
+
+        for col in cls.COLUMNAS_COMPARTIMENTOS + cls.COLUMNAS_TASAS:
+            if col in df.columns:
+                getattr(estado, col)[:] = df[col].to_numpy(dtype=np.float64)
+
+        for col in cls.COLUMNAS_COOLDOWN:
+            if col in df.columns:
+                getattr(estado, col)[:] = df[col].to_numpy(dtype=np.int64)
+
+        return estado
+
+
+    def volcar_en_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Copia el estado dinámico de vuelta al DataFrame. Solo se usa en las fronteras
+        con el resto del programa (guardado, exportación e interfaz)
+        """
+        for col in self.COLUMNAS_COMPARTIMENTOS + self.COLUMNAS_COOLDOWN + self.COLUMNAS_TASAS:
+            df[col] = getattr(self, col)
+        return df
+
+
+    def totales(self) -> dict:
+        """Suma de cada compartimento en todo el mundo"""
+        return {col: float(getattr(self, col).sum()) for col in self.COLUMNAS_COMPARTIMENTOS}
@@ -0,0 +1 @@
+"""Benchmarks de rendimiento del simulador (ver benchmarks/suite.py)"""
@@ -0,0 +1,525 @@
+"""
+Suite de benchmarks sin interfaz: mide por separado cada ruta caliente del simulador
+
+Cada caso se mide en tres momentos de la epidemia (temprana, media y tardía) sobre el
+mundo real y sobre mundos sintéticos del tamaño que se pida. Los resultados se guardan
+en JSON y se comparan contra una línea base para detectar regresiones.
+
+Uso:
+    python -m benchmarks.suite run --mundos real,10000,100000 --salida benchmarks/resultados/base.json
+    python -m benchmarks.suite compare benchmarks/resultados/base.json nuevo.json --tolerancia 0.15
+    python -m benchmarks.suite memoria --mundos real,100000 --limite-kb 4 --limite-neto-b 64
+    python -m benchmarks.suite integradores --mundos real --beta 3
+"""
+from backend.options_base import OptionsBase, HeadlessOptions
+from backend.engine import Engine
+from backend.mundo_sintetico import generar_mundo
+from backend import kernels
+from types import SimpleNamespace
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+FASES: Tuple[str, ...] = ("temprana", "media", "tardia")
+
+# Columnas del estado que se guardan en cada instantánea
+_COLUMNAS_ESTADO: List[str] = ["S", "I", "R", "M", "cooldown_vuelo", "cooldown_puerto", "cooldown_frontera"]
+
+
+class Escenario:
+    """
+    Un mundo cargado en un Engine sin persistencia, con una instantánea del estado en cada fase
+
+    Las fases se eligen con una corrida previa (misma semilla, así que la segunda corrida
+    pasa exactamente por los mismos estados):
+        temprana: primer día con al menos el 2% de las regiones infectadas
+        media: pico mundial de infectados
+        tardia: primer día tras el pico con menos del 1% de los infectados del pico
+    """
+
+    def __init__(self, nombre: str, ruta_csv: str, pais: str, carpeta: str, semilla: int, max_dias: int) -> None:
+        self.nombre: str = nombre
+        self.opt: HeadlessOptions = HeadlessOptions(
+            PERSISTIR=False, SEMILLA=semilla, RUTA_CSV=ruta_csv, PAIS_INICIO=pais,
+            RUTA_DB_CREADA=os.path.join(carpeta, f"mundo_{nombre}.db"),
+        )
+        self.dias_fase: Dict[str, int] = self._buscar_fases(max_dias)
+
+        self.motor: Engine = Engine(self.opt)
+        self.regiones: int = self.motor.estado.n
+        self.instantaneas: Dict[str, Dict] = {}
+
+        self.motor.avanzar_dias(1, incluir_datos=False)  # Paciente Cero (día 1)
+        for fase in FASES:
+            # También el día anterior, para medir el guardado de un día real (solo sus cambios)
+            self.motor.avanzar_dias(self.dias_fase[fase] - 1 - self.motor.dia_simulacion, incluir_datos=False)
+            previo: Dict = self._capturar()
+            self.motor.avanzar_dias(self.dias_fase[fase] - self.motor.dia_simulacion, incluir_datos=False)
+            self.instantaneas[fase] = self._capturar()
+            self.instantaneas[fase]["previo"] = previo
+
+        self._db_lista: bool = False
+        self._modelo_mapa = None
+
+
+    def _buscar_fases(self, max_dias: int) -> Dict[str, int]:
+        motor: Engine = Engine(self.opt)
+        muestras: Dict = motor.avanzar_dias(max_dias, incluir_datos=False)["muestras"]
+        dias, infectados, n_paises = muestras["dia"], muestras["I"], muestras["paises_infectados"]
+
+        pico: int = int(np.argmax(infectados))
+        extendidos: np.ndarray = np.flatnonzero(n_paises[:pico + 1] >= max(2, 0.02 * motor.estado.n))
+        temprana: int = int(extendidos[0]) if len(extendidos) else pico // 2
+
+        bajada: np.ndarray = np.flatnonzero(infectados[pico:] < 0.01 * infectados[pico])
+        tardia: int = pico + int(bajada[0]) if len(bajada) else len(dias) - 1
+
+        return {"temprana": int(dias[temprana]), "media": int(dias[pico]), "tardia": int(dias[tardia])}
+
+
+    def _capturar(self) -> Dict:
+        instantanea: Dict = {col: getattr(self.motor.estado, col).copy() for col in _COLUMNAS_ESTADO}
+        instantanea["dia"] = self.motor.dia_simulacion
+        instantanea["dias_consecutivos_cero"] = self.motor.dias_consecutivos_cero
+        instantanea["eventos"] = len(self.motor.registro)
+        return instantanea
+
+
+    def restaurar(self, fase: str, previo: bool = False) -> None:
+        """Vuelve el motor (arrays y DataFrame) al estado guardado de la fase (o al del día anterior)"""
+        instantanea: Dict = self.instantaneas[fase]
+        if previo: instantanea = instantanea["previo"]
+        for col in _COLUMNAS_ESTADO:
+            np.copyto(getattr(self.motor.estado, col), instantanea[col])
+        self.motor.dia_simulacion = instantanea["dia"]
+        self.motor.dias_consecutivos_cero = instantanea["dias_consecutivos_cero"]
+        self.motor.registro.truncar(instantanea["eventos"])
+        self.motor.estado.volcar_en_df(self.motor.dataframe)
+
+
+    def preparar_db(self, fase: str, previo: bool = False) -> None:
+        """Crea la base de datos del escenario (una vez) y guarda en ella el estado de la fase"""
+        if not self._db_lista:
+            self.motor.csv.crear_db()
+            self._db_lista = True
+        self.restaurar(fase, previo)
+        self.motor.csv.guardar_estados(self.motor.dataframe, self.motor.primer_pais, dia=self.motor.dia_simulacion)
+
+
+    def modelo_mapa(self):
+        if self._modelo_mapa is None:
+            from controllers.mapa_modelo import MapaModeloSIRD
+            self._modelo_mapa = MapaModeloSIRD()
+        return self._modelo_mapa
+
+
+#--------------------------------------------------------------
+# Casos: cada uno devuelve (función a medir, preparación sin medir antes de cada repetición)
+#--------------------------------------------------------------
+
+def _avanzar_dia(esc: Escenario, fase: str):
+    return esc.motor.avanzar_dia, lambda: esc.restaurar(fase)
+
+
+def _fronteras(esc: Escenario, fase: str):
+    return esc.motor.sir.procesar_fronteras_inteligente, lambda: esc.restaurar(fase)
+
+
+def _logistica(esc: Escenario, fase: str):
+    def logistica() -> None:
+        esc.motor.sir.procesar_logistica(tipo_transporte="vuelo")
+        esc.motor.sir.procesar_logistica(tipo_transporte="puerto")
+    return logistica, lambda: esc.restaurar(fase)
+
+
+def _ejecutar(esc: Escenario, fase: str):
+    return lambda: esc.motor.sir.ejecutar(dia_actual=esc.motor.dia_simulacion), lambda: esc.restaurar(fase)
+
+
+def _guardar_estados(esc: Escenario, fase: str):
+    motor: Engine = esc.motor
+
+    def preparar() -> None:
+        # La DB queda con el día anterior y se mide guardar el de la fase
+        esc.preparar_db(fase, previo=True)
+        esc.restaurar(fase)
+
+    return lambda: motor.csv.guardar_estados(motor.dataframe, motor.primer_pais, dia=motor.dia_simulacion), preparar
+
+
+def _cargar_db(esc: Escenario, fase: str):
+    esc.preparar_db(fase)
+    return esc.motor.csv.cargar_db, None
+
+
+def _cargar_df(esc: Escenario, fase: str):
+    return esc.motor.csv.cargar_df, None
+
+
+def _actualizar_mapa(esc: Escenario, fase: str):
+    modelo = esc.modelo_mapa()
+    esc.restaurar(fase)
+    registros: List[Dict] = esc.motor.dataframe.to_dict(orient="records")
+    return lambda: modelo.actualizar_datos(registros), None
+
+
+def _actualizar_mapa_arrays(esc: Escenario, fase: str):
+    from controllers.hilo_simulacion import Instantanea
+    modelo = esc.modelo_mapa()
+    esc.restaurar(fase)
+    instantanea = Instantanea.desde_motor(esc.motor)
+    return lambda: modelo.actualizar_arrays(instantanea.base, instantanea.arrays), None
+
+
+def _ranking_global(esc: Escenario, fase: str):
+    from controllers.sird_controller import ControladorSIRD
+    from controllers.hilo_simulacion import Instantanea
+    esc.restaurar(fase)
+    # El slot solo lee la foto actual del mundo, así que no hace falta levantar el controlador completo
+    controlador = SimpleNamespace(_instantanea=Instantanea.desde_motor(esc.motor))
+    return lambda: ControladorSIRD.obtener_ranking_global(controlador, "I"), None
+
+
+# (nombre, constructor, depende de la fase, necesita Qt)
+CASOS: List[Tuple[str, Callable, bool, bool]] = [
+    ("Engine.avanzar_dia", _avanzar_dia, True, False),
+    ("SIR.procesar_fronteras_inteligente", _fronteras, True, False),
+    ("SIR.procesar_logistica", _logistica, True, False),
+    ("SIR.ejecutar", _ejecutar, True, False),
+    ("Loader.guardar_estados", _guardar_estados, True, False),
+    ("Loader.cargar_db", _cargar_db, True, False),
+    # El CSV no cambia con la epidemia: se mide una sola vez por mundo
+    ("Loader.cargar_df", _cargar_df, False, False),
+    ("MapaModeloSIRD.actualizar_datos", _actualizar_mapa, True, True),
+    ("MapaModeloSIRD.actualizar_arrays", _actualizar_mapa_arrays, True, True),
+    ("ControladorSIRD.obtener_ranking_global", _ranking_global, True, True),
+]
+
+
+def medir(funcion: Callable, preparar: Optional[Callable] = None, repeticiones: int = 5,
+          minimo_s: float = 0.2, maximo: int = 1000) -> Dict[str, float]:
+    """
+    Mide `funcion` al menos `repeticiones` veces (y más si es tan rápida que no llega a
+    `minimo_s` en total). `preparar` se llama antes de cada repetición, fuera del tiempo.
+    """
+    if preparar: preparar()
+    funcion()  # Calentamiento (cachés, primera asignación de memoria)
+
+    tiempos: List[float] = []
+    while len(tiempos) < repeticiones or (sum(tiempos) < minimo_s and len(tiempos) < maximo):
+        if preparar: preparar()
+        t0: float = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    ms: np.ndarray = np.asarray(tiempos) * 1000
+    return {
+        "mediana_ms": float(np.median(ms)),
+        "min_ms": float(ms.min()),
+        "media_ms": float(ms.mean()),
+        "repeticiones": len(ms),
+    }
+
+
+def _hay_qt() -> bool:
+    try:
+        import PySide6  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _preparar_csv(mundo: str, carpeta: str, semilla: int) -> Tuple[str, str]:
+    """
+    CSV y país de inicio del mundo: el real, o uno sintético de N regiones (ver
+    backend/mundo_sintetico.py) escrito en `carpeta`
+    """
+    if mundo == "real": return OptionsBase.RUTA_CSV, HeadlessOptions().PAIS_INICIO
+    ruta: str = os.path.join(carpeta, f"mundo_{mundo}.csv")
+    generar_mundo(int(mundo), semilla=semilla).to_csv(ruta, index=False)
+    return ruta, "Región 1"
+
+
+def _entorno() -> Dict[str, str]:
+    try:
+        commit: str = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                     cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "nucleos": str(os.cpu_count()),
+        "commit": commit,
+    }
+
+
+def ejecutar_suite(mundos: List[str], repeticiones: int = 5, semilla: int = 2024, max_dias: int = 1500,
+                   filtro: Optional[List[str]] = None) -> Dict:
+    """
+    Corre todos los casos en todos los mundos y fases
+
+    Args:
+        mundos: "real" o cantidades de regiones de mundos sintéticos ("10000")
+        repeticiones: Mínimo de repeticiones por medición
+        semilla: Semilla del motor y de los mundos sintéticos (las fases y los estados son siempre los mismos)
+        max_dias: Tope de días de la corrida que ubica las fases
+        filtro: Si se indica, solo los casos cuyo nombre contenga alguno de estos textos
+
+    Returns:
+        Diccionario listo para guardar en JSON
+    """
+    qt: bool = _hay_qt()
+    if not qt:
+        print("⚠️ PySide6 no está instalado: se omiten los casos del mapa y del controlador")
+
+    resultados: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="paperpandemic_bench_") as carpeta:
+        for mundo in mundos:
+            t0: float = time.perf_counter()
+            ruta_csv, pais = _preparar_csv(mundo, carpeta, semilla)
+            esc: Escenario = Escenario(mundo, ruta_csv, pais, carpeta, semilla, max_dias)
+            print(f"🌍 Mundo {mundo}: {esc.regiones} regiones, fases {esc.dias_fase} "
+                  f"(preparado en {time.perf_counter() - t0:.1f} s)")
+
+            for caso, constructor, por_fase, necesita_qt in CASOS:
+                if necesita_qt and not qt: continue
+                if filtro and not any(f in caso for f in filtro): continue
+
+                for fase in (FASES if por_fase else ("inicio",)):
+                    funcion, preparar = constructor(esc, fase if por_fase else FASES[0])
+                    medida: Dict = medir(funcion, preparar, repeticiones)
+                    resultados.append({
+                        "caso": caso, "mundo": mundo, "regiones": esc.regiones, "fase": fase,
+                        "dia": esc.dias_fase.get(fase, 1), **medida,
+                    })
+                    print(f"   {caso:<42} {fase:<9} {medida['mediana_ms']:>11.3f} ms")
+
+    return {
+        "version": 1,
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "entorno": _entorno(),
+        "parametros": {"repeticiones": repeticiones, "semilla": semilla, "max_dias": max_dias},
+        "resultados": resultados,
+    }
+
+
+def memoria_sird(esc: Escenario, fase: str, en_sitio: bool, ticks: int = 50) -> Dict[str, int]:
+    """
+    Memoria que pide SIR.ejecutar en régimen estable, medida con tracemalloc
+
+    Returns:
+        {"pico_por_tick": máximo de bytes temporales pedidos en un tick,
+         "neto": bytes que quedaron retenidos tras todos los ticks,
+         "neto_por_tick": neto / ticks, lo que crece la memoria en cada tick}
+    """
+    sir = esc.motor.sir
+    sir._buferes = kernels.BuferesSIRD(esc.motor.estado.S.shape) if en_sitio else None
+    esc.restaurar(fase)
+    dia: int = esc.motor.dia_simulacion
+
+    for _ in range(3): sir.ejecutar(dia_actual=dia)  # Calentamiento
+
+    pico: int = 0
+    tracemalloc.start()
+    try:
+        inicio, _ = tracemalloc.get_traced_memory()
+        for _ in range(ticks):
+            antes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            sir.ejecutar(dia_actual=dia)
+            pico = max(pico, tracemalloc.get_traced_memory()[1] - antes)
+        final, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"pico_por_tick": pico, "neto": final - inicio, "neto_por_tick": (final - inicio) / ticks}
+
+
+def comparar_integradores(esc: Escenario, fase: str = "media", dias: int = 30,
+                          beta: Optional[float] = None) -> List[Dict]:
+    """
+    Integra solo el modelo SIRD (sin fronteras ni viajes) durante `dias` días desde la fase
+    indicada con cada integrador, y mide el error contra una referencia RK4 de 200 subpasos
+
+    Returns:
+        Una fila por configuración: error relativo máximo, evaluaciones de las derivadas
+        por país y día, y milisegundos por día
+    """
+    esc.restaurar(fase)
+    inicial: Dict[str, np.ndarray] = {c: getattr(esc.motor.estado, c).copy() for c in "SIRM"}
+    poblacion: np.ndarray = esc.motor.estado.poblacion
+    opt = esc.opt
+    beta = opt.beta if beta is None else beta
+
+    def integrar(integrador: str, subpasos: int = 4, tolerancia: float = 1e-6) -> Tuple[Dict, float, float]:
+        estado: Dict[str, np.ndarray] = {c: v.copy() for c, v in inicial.items()}
+        buferes = kernels.BuferesSIRD(poblacion.shape)
+        t0: float = time.perf_counter()
+        for _ in range(dias):
+            # dia_actual 5: tasas completas pero sin el barrido de erradicación
+            kernels.paso_sird(estado["S"], estado["I"], estado["R"], estado["M"], poblacion, beta, opt.gamma,
+                              opt.mu, 5, opt.UMBRAL_ERRADICACION, buferes, integrador, subpasos, tolerancia)
+        return estado, buferes.evaluaciones / poblacion.size / dias, (time.perf_counter() - t0) * 1000 / dias
+
+    referencia, _, _ = integrar("rk4", subpasos=200)
+    filas: List[Dict] = []
+    for nombre, integrador, kwargs in [
+        ("euler", "euler", {}), ("rk4 x1", "rk4", {"subpasos": 1}), ("rk4 x4", "rk4", {"subpasos": 4}),
+        ("rk45 1e-3", "rk45", {"tolerancia": 1e-3}), ("rk45 1e-6", "rk45", {"tolerancia": 1e-6}),
+    ]:
+        estado, evaluaciones, ms = integrar(integrador, **kwargs)
+        error: float = max(float(np.max(np.abs(estado[c] - referencia[c]) / (1 + np.abs(referencia[c])))) for c in "SIRM")
+        filas.append({"integrador": nombre, "error_relativo": error, "evaluaciones": evaluaciones, "ms_por_dia": ms})
+    return filas
+
+
+def comparar(base: Dict, nuevo: Dict, tolerancia: float = 0.10, piso_ms: float = 0.05) -> List[Dict]:
+    """
+    Compara dos ejecuciones de la suite por (caso, mundo, fase)
+
+    Una medición es regresión si su mediana crece más que `tolerancia` (0.10 = 10%) y además
+    más de `piso_ms` en valor absoluto (para no marcar ruido en funciones de microsegundos).
+
+    Returns:
+        Una fila por medición presente en ambos archivos, con "ratio" y "estado"
+        ("regresion", "mejora" o "igual")
+    """
+    clave = lambda r: (r["caso"], r["mundo"], r["fase"])
+    previos: Dict[Tuple, Dict] = {clave(r): r for r in base["resultados"]}
+
+    filas: List[Dict] = []
+    for r in nuevo["resultados"]:
+        anterior: Optional[Dict] = previos.get(clave(r))
+        if anterior is None: continue
+        antes, ahora = anterior["mediana_ms"], r["mediana_ms"]
+        ratio: float = ahora / antes if antes > 0 else float("inf")
+
+        estado: str = "igual"
+        if ratio > 1 + tolerancia and ahora - antes > piso_ms: estado = "regresion"
+        elif ratio < 1 / (1 + tolerancia) and antes - ahora > piso_ms: estado = "mejora"
+
+        filas.append({"caso": r["caso"], "mundo": r["mundo"], "fase": r["fase"],
+                      "base_ms": antes, "nuevo_ms": ahora, "ratio": ratio, "estado": estado})
+    return filas
+
+
+def _imprimir_comparacion(filas: List[Dict]) -> None:
+    iconos: Dict[str, str] = {"regresion": "⚠️ REGRESIÓN", "mejora": "✅ mejora", "igual": ""}
+    print(f"{'caso':<42} {'mundo':>7} {'fase':<9} {'base ms':>11} {'nuevo ms':>11} {'x':>7}")
+    for f in filas:
+        print(f"{f['caso']:<42} {f['mundo']:>7} {f['fase']:<9} {f['base_ms']:>11.3f} {f['nuevo_ms']:>11.3f} "
+              f"{f['ratio']:>7.2f} {iconos[f['estado']]}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento de PaperPandemic")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    run = sub.add_parser("run", help="Ejecuta la suite y guarda el resultado en JSON")
+    run.add_argument("--mundos", default="real,10000,100000", help="'real' y/o tamaños de mundos sintéticos")
+    run.add_argument("--repeticiones", type=int, default=5)
+    run.add_argument("--semilla", type=int, default=2024)
+    run.add_argument("--max-dias", type=int, default=1500)
+    run.add_argument("--casos", default=None, help="Solo los casos que contengan estos textos (separados por coma)")
+    run.add_argument("--salida", default=os.path.join("benchmarks", "resultados", "ultimo.json"))
+
+    compare = sub.add_parser("compare", help="Compara un resultado contra una línea base")
+    compare.add_argument("base")
+    compare.add_argument("nuevo")
+    compare.add_argument("--tolerancia", type=float, default=0.10, help="Crecimiento relativo permitido (0.10 = 10%%)")
+    compare.add_argument("--piso-ms", type=float, default=0.05, help="Diferencias absolutas menores se ignoran")
+
+    memoria = sub.add_parser("memoria", help="Comprueba que SIR.ejecutar no pide memoria en régimen estable")
+    memoria.add_argument("--mundos", default="real,100000")
+    memoria.add_argument("--semilla", type=int, default=2024)
+    memoria.add_argument("--max-dias", type=int, default=1500)
+    memoria.add_argument("--limite-kb", type=float, default=4.0,
+                         help="Máximo por tick con KERNEL_EN_SITIO (lo que queda son objetos Python, no arrays)")
+    memoria.add_argument("--limite-neto-b", type=float, default=64.0,
+                         help="Máximo de bytes retenidos por tick (más indica una fuga)")
+    memoria.add_argument("--ticks", type=int, default=50)
+
+    integradores = sub.add_parser("integradores", help="Error y coste de cada integrador del paso SIRD")
+    integradores.add_argument("--mundos", default="real,10000")
+    integradores.add_argument("--semilla", type=int, default=2024)
+    integradores.add_argument("--max-dias", type=int, default=1500)
+    integradores.add_argument("--beta", type=float, default=None, help="Beta a probar (por defecto el de las opciones)")
+    integradores.add_argument("--dias", type=int, default=30)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "integradores":
+        with tempfile.TemporaryDirectory(prefix="paperpandemic_bench_") as carpeta:
+            for mundo in [m.strip() for m in args.mundos.split(",") if m.strip()]:
+                ruta_csv, pais = _preparar_csv(mundo, carpeta, args.semilla)
+                esc: Escenario = Escenario(mundo, ruta_csv, pais, carpeta, args.semilla, args.max_dias)
+                print(f"🌍 Mundo {mundo}: {esc.regiones} regiones, {args.dias} días desde el pico")
+                print(f"   {'integrador':<10} {'error rel.':>10} {'eval/país/día':>14} {'ms/día':>9}")
+                for f in comparar_integradores(esc, dias=args.dias, beta=args.beta):
+                    print(f"   {f['integrador']:<10} {f['error_relativo']:>10.2e} {f['evaluaciones']:>14.1f} {f['ms_por_dia']:>9.2f}")
+        return
+
+    if args.comando == "memoria":
+        excedidos: int = 0
+        with tempfile.TemporaryDirectory(prefix="paperpandemic_bench_") as carpeta:
+            for mundo in [m.strip() for m in args.mundos.split(",") if m.strip()]:
+                ruta_csv, pais = _preparar_csv(mundo, carpeta, args.semilla)
+                esc: Escenario = Escenario(mundo, ruta_csv, pais, carpeta, args.semilla, args.max_dias)
+                print(f"🌍 Mundo {mundo}: {esc.regiones} regiones")
+                for fase in FASES:
+                    clasico: Dict = memoria_sird(esc, fase, en_sitio=False, ticks=args.ticks)
+                    en_sitio: Dict = memoria_sird(esc, fase, en_sitio=True, ticks=args.ticks)
+                    excedido: bool = (en_sitio["pico_por_tick"] > args.limite_kb * 1024
+                                      or en_sitio["neto_por_tick"] > args.limite_neto_b)
+                    excedidos += excedido
+                    print(f"   {fase:<9} temporales por tick: {clasico['pico_por_tick'] / 1024:>10.1f} KiB → "
+                          f"{en_sitio['pico_por_tick'] / 1024:>8.2f} KiB en sitio "
+                          f"(retenidos {en_sitio['neto_por_tick']:.1f} B/tick){' ⚠️' if excedido else ''}")
+        if excedidos:
+            print(f"⚠️ {excedidos} mediciones superan {args.limite_kb} KiB temporales "
+                  f"o {args.limite_neto_b} B retenidos por tick")
+            sys.exit(1)
+        print("✅ El paso SIRD en sitio no pide memoria en régimen estable")
+        return
+
+    if args.comando == "run":
+        mundos: List[str] = [m.strip() for m in args.mundos.split(",") if m.strip()]
+        filtro: Optional[List[str]] = args.casos.split(",") if args.casos else None
+        resultado: Dict = ejecutar_suite(mundos, args.repeticiones, args.semilla, args.max_dias, filtro)
+
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados en {os.path.abspath(args.salida)}")
+        return
+
+    with open(args.base, encoding="utf-8") as f: base: Dict = json.load(f)
+    with open(args.nuevo, encoding="utf-8") as f: nuevo: Dict = json.load(f)
+
+    filas: List[Dict] = comparar(base, nuevo, args.tolerancia, args.piso_ms)
+    _imprimir_comparacion(filas)
+
+    regresiones: int = sum(f["estado"] == "regresion" for f in filas)
+    if regresiones:
+        print(f"⚠️ {regresiones} regresiones (tolerancia {args.tolerancia:.0%})")
+        sys.exit(1)
+    print("✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
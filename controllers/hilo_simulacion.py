@@ -0,0 +1,211 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from backend.engine import Engine
+from backend.world_state import WorldState
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+class Instantanea:
+    """
+    Foto inmutable del mundo al terminar un tick
+
+    Sus arrays son de solo lectura y viven en uno de los dos búferes del trabajador, que no
+    vuelve a escribir en ese búfer hasta que el controlador lo suelta. Así la interfaz lee
+    siempre un día completo y coherente sin esperar nunca al motor.
+    """
+
+    # Columnas del estado que cambian con cada tick (el resto del DataFrame es estático)
+    COLUMNAS: List[str] = WorldState.COLUMNAS_COMPARTIMENTOS + WorldState.COLUMNAS_COOLDOWN + WorldState.COLUMNAS_TASAS
+
+    __slots__ = ("motor", "base", "arrays", "resultado", "indice", "generacion", "reinicio", "eventos")
+
+    def __init__(self, motor: Engine, base: pd.DataFrame, arrays: Dict[str, np.ndarray], resultado: Dict,
+                 indice: int = -1, generacion: int = 0, reinicio: bool = False, eventos: int = 0) -> None:
+        """
+        Args:
+            motor: Motor que produjo la foto (la interfaz solo lee de él lo que no cambia por tick)
+            base: Columnas estáticas del mundo (nombres, códigos, población, ...)
+            arrays: Columnas dinámicas, de solo lectura
+            resultado: Lo que devolvió Engine.avanzar_dias (status, dia, totales)
+            indice: Búfer del trabajador en el que viven los arrays (-1 si son copias propias)
+            generacion: Partida a la que pertenece (cambia con cada reinicio)
+            reinicio: True si es la primera foto de una partida nueva
+            eventos: Eventos del registro de contagios del motor que ya existían al tomar la
+                foto (las filas anteriores no cambian, se pueden leer sin esperar al motor)
+        """
+        self.motor: Engine = motor
+        self.base: pd.DataFrame = base
+        self.arrays: Dict[str, np.ndarray] = arrays
+        self.resultado: Dict = resultado
+        self.indice: int = indice
+        self.generacion: int = generacion
+        self.reinicio: bool = reinicio
+        self.eventos: int = eventos
+
+
+    @classmethod
+    def desde_motor(cls, motor: Engine, resultado: Optional[Dict] = None) -> "Instantanea":
+        """
+        Foto suelta (con copias propias) del estado actual de un motor que nadie más está
+        avanzando, por ejemplo antes de arrancar el hilo
+        """
+        if resultado is None: resultado = cls.resultado_inicial(motor)
+        arrays: Dict[str, np.ndarray] = {}
+        for col in cls.COLUMNAS:
+            arrays[col] = getattr(motor.estado, col).copy()
+            arrays[col].flags.writeable = False
+        return cls(motor, cls.columnas_estaticas(motor), arrays, resultado, eventos=len(motor.registro))
+
+
+    @classmethod
+    def columnas_estaticas(cls, motor: Engine) -> pd.DataFrame:
+        """Copia de las columnas del DataFrame del motor que no cambian durante la partida"""
+        return motor.dataframe.drop(columns=[c for c in cls.COLUMNAS if c in motor.dataframe.columns]).copy()
+
+
+    @staticmethod
+    def resultado_inicial(motor: Engine) -> Dict:
+        """Mismo formato que Engine.avanzar_dias, pero sin avanzar el día (para pintar la partida recién cargada)"""
+        return {
+            "status": "Jugando",
+            "dia": str(motor.dia_simulacion),
+            "totales": motor._totales_enteros(),
+        }
+
+
+    @property
+    def nombres(self) -> np.ndarray:
+        return self.base["Country Name"].to_numpy()
+
+
+    def dataframe(self) -> pd.DataFrame:
+        """DataFrame nuevo con las columnas estáticas y el estado de esta foto"""
+        df: pd.DataFrame = self.base.copy()
+        for col, valores in self.arrays.items():
+            df[col] = valores
+        return df
+
+
+
+class TrabajadorSimulacion(QObject):
+    """
+    Dueño del Engine una vez arrancado el hilo: avanza los días con su propio QTimer (fuera
+    del hilo de la interfaz), incluido el guardado en SQLite, y publica una Instantanea por
+    tick con la señal instantaneaLista. El mapa lee los arrays de la foto, así que no hace
+    falta construir un registro por país en cada tick.
+
+    Las órdenes llegan por señales encoladas (marcha, intervalo, reinicio, cheat); el
+    controlador nunca llama a sus métodos directamente salvo liberar().
+    """
+
+    instantaneaLista = Signal(object)
+
+    def __init__(self, motor: Engine, opciones, intervalo_ms: int = 1000) -> None:
+        super().__init__()
+        self.motor: Engine = motor
+        self.opciones = opciones
+        self.generacion: int = 0
+
+        # Hijo del trabajador: se muda de hilo con él
+        self.timer: QTimer = QTimer(self)
+        self.timer.setInterval(intervalo_ms)
+        self.timer.timeout.connect(self.tick)
+
+        # Doble búfer: mientras la interfaz lee uno, el motor escribe en el otro
+        self._base: pd.DataFrame = Instantanea.columnas_estaticas(motor)
+        self._buferes: List[Dict[str, np.ndarray]] = [self._crear_bufer(), self._crear_bufer()]
+        self._libres: List[threading.Event] = [threading.Event(), threading.Event()]
+        for libre in self._libres: libre.set()
+        self._siguiente: int = 0
+
+
+    def _crear_bufer(self) -> Dict[str, np.ndarray]:
+        return {col: np.empty_like(getattr(self.motor.estado, col)) for col in Instantanea.COLUMNAS}
+
+
+    def liberar(self, instantanea: Instantanea) -> None:
+        """El controlador ya no lee de esa foto (se puede llamar desde cualquier hilo)"""
+        # Las fotos sueltas o de una partida anterior no ocupan ninguno de los búferes actuales
+        if instantanea.indice < 0 or instantanea.generacion != self.generacion: return
+        self._libres[instantanea.indice].set()
+
+
+    def publicar(self, resultado: Dict, reinicio: bool = False) -> bool:
+        """
+        Copia el estado del motor al búfer libre y emite la foto.
+
+        Returns:
+            False si la interfaz todavía no soltó ese búfer (el tick se salta, nunca se pisa
+            una foto que la interfaz pueda estar leyendo)
+        """
+        indice: int = self._siguiente
+        if not self._libres[indice].is_set(): return False
+        self._libres[indice].clear()
+
+        bufer: Dict[str, np.ndarray] = self._buferes[indice]
+        for col, destino in bufer.items():
+            destino.flags.writeable = True
+            np.copyto(destino, getattr(self.motor.estado, col))
+            destino.flags.writeable = False
+
+        self._siguiente = 1 - indice
+        self.instantaneaLista.emit(Instantanea(self.motor, self._base, bufer, resultado,
+                                               indice, self.generacion, reinicio, len(self.motor.registro)))
+        return True
+
+
+    @Slot()
+    def tick(self) -> None:
+        """Avanza un día y publica el resultado"""
+        # Si la interfaz va un tick por detrás, se espera al siguiente timeout en vez de pisarla
+        if not self._libres[self._siguiente].is_set(): return
+
+        resultado: Dict = self.motor.avanzar_dias(1, incluir_datos=False)
+        if resultado["status"] != "PLAYING": self.timer.stop()
+        self.publicar(resultado)
+
+
+    @Slot(bool)
+    def cambiar_marcha(self, encendido: bool) -> None:
+        if encendido: self.timer.start()
+        else:
+            self.timer.stop()
+            # En pausa la DB queda al día (se espera aquí, en el hilo de simulación)
+            self.motor.vaciar_guardado()
+
+
+    @Slot(int)
+    def cambiar_intervalo(self, intervalo_ms: int) -> None:
+        self.timer.setInterval(intervalo_ms)
+
+
+    @Slot(int)
+    def reiniciar(self, generacion: int) -> None:
+        """Borra la partida guardada y arranca un motor nuevo (todo fuera del hilo de la interfaz)"""
+        self.timer.stop()
+        try:
+            self.motor.cerrar()
+            self.motor.csv.limpiar_db()
+        except: pass
+
+        self.motor = Engine(self.opciones)
+        self._base = Instantanea.columnas_estaticas(self.motor)
+        # Búferes nuevos: los de la partida anterior pueden seguir en manos de la interfaz
+        self._buferes = [self._crear_bufer(), self._crear_bufer()]
+        for libre in self._libres: libre.set()
+        self._siguiente = 0
+        self.generacion = generacion
+        self.publicar(Instantanea.resultado_inicial(self.motor), reinicio=True)
+
+
+    @Slot()
+    def cheat_fin(self) -> None:
+        """Apocalipsis instantáneo y un día más para que el motor detecte el fin"""
+        self.timer.stop()
+        # Aquí sí se espera a que la interfaz suelte el búfer (la tecla no debe perderse),
+        # pero con tope para no bloquear el cierre del hilo
+        if not self._libres[self._siguiente].wait(timeout=1.0): return
+        self.motor.cheat_fin_rapido()
+        self.publicar(self.motor.avanzar_dias(1, incluir_datos=False))
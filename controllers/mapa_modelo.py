@@ -2,7 +2,8 @@ from path import rutas
 from PySide6.QtCore import QAbstractListModel, Qt, Slot
 import json
 import os
-from typing import List,Dict,Tuple
+import numpy as np
+from typing import List,Dict,Optional,Tuple
 
 class MapaModeloSIRD(QAbstractListModel):
     """Esta clase es la encargada de enviarles los datos a QML para dibujar el Mapa"""
@@ -21,6 +22,8 @@ class MapaModeloSIRD(QAbstractListModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.paises: List = []
+        # Correspondencia mapa -> filas del estado para actualizar_arrays (se calcula con el primer mundo)
+        self._base_arrays = None
         
         # 1. CARGA DE GEOMETRÍA
         try:
@@ -169,8 +172,7 @@ class MapaModeloSIRD(QAbstractListModel):
         
         datos_dict: Dict = { fila["Country Code"]: fila for fila in lista_paises if "Country Code" in fila }
         
-        hay_cambios : bool= False
-        idx_min, idx_max = len(self.paises), 0
+        cambiados: List[int] = []
 
         for i, pais in enumerate(self.paises):
             codigo_mapa: str  = pais["codigo"]
@@ -180,34 +182,74 @@ class MapaModeloSIRD(QAbstractListModel):
             
             if codigo_busqueda in datos_dict:
                 dato:str = datos_dict[codigo_busqueda]
-                
-                i_val:int = int(dato.get("I", 0))
-                r_val:int = int(dato.get("R", 0))
-                m_val:int = int(dato.get("M", 0))
-                pob:int = int(dato.get("S", 0)) + i_val + r_val + m_val
-                
-                if pob <= 0: pob:int = 1
-                pais["poblacion"]:int = pob
-                pais["infectado"]:int = i_val
-                pais["recuperado"]:int = r_val
-                pais["muerto"]:int = m_val
-                
-                if "Country Name" in dato:
-                    pais["nombre"]: str = dato["Country Name"]
-                
-                # Color
-                pct:float = (i_val + r_val + m_val) / pob
-                nuevo_color: str = self.calcular_color_hex(pct)
-                
-                if pais["color"] != nuevo_color:
-                    pais["color"]: str = nuevo_color
-                    hay_cambios: bool = True
-                    idx_min: int = min(idx_min, i)
-                    idx_max: int = max(idx_max, i)
-
-        if hay_cambios:
-            top: int = self.index(idx_min, 0)
-            bot: int = self.index(idx_max, 0)
+                if self._aplicar(pais, int(dato.get("S", 0)), int(dato.get("I", 0)), int(dato.get("R", 0)),
+                                 int(dato.get("M", 0)), dato.get("Country Name")):
+                    cambiados.append(i)
+
+        self._avisar_cambios(cambiados)
+
+
+    def actualizar_arrays(self, base, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Igual que actualizar_datos, pero leyendo directamente de los arrays del estado (por
+        ejemplo las vistas sobre memoria compartida de una Instantanea), sin registros por país.
+        Solo se tocan los países que tienen polígono en el mapa.
+
+        Args:
+            base: DataFrame con las columnas estáticas ("Country Code", "Country Name")
+            arrays: {"S": ..., "I": ..., "R": ..., "M": ...} en el orden de filas de `base`
+        """
+        if not self.paises or "Country Code" not in base.columns: return
+
+        # Fila del estado que corresponde a cada país del mapa (se recalcula si cambia el mundo)
+        if self._base_arrays is not base:
+            posicion: Dict[str, int] = {codigo: k for k, codigo in enumerate(base["Country Code"].astype(str))}
+            filas: List[int] = [posicion.get(self.alias_map.get(p["codigo"], p["codigo"]), -1) for p in self.paises]
+            self._filas_arrays: np.ndarray = np.asarray(filas, dtype=np.int64)
+            self._nombres_arrays: List[str] = base["Country Name"].astype(str).tolist()
+            self._base_arrays = base
+
+        en_mapa: np.ndarray = np.flatnonzero(self._filas_arrays >= 0)
+        filas: np.ndarray = self._filas_arrays[en_mapa]
+        # Misma conversión que int() por país, pero de una vez
+        s, i, r, m = (arrays[col][filas].astype(np.int64).tolist() for col in ("S", "I", "R", "M"))
+
+        cambiados: List[int] = []
+        for k, idx in enumerate(en_mapa.tolist()):
+            if self._aplicar(self.paises[idx], s[k], i[k], r[k], m[k], self._nombres_arrays[filas[k]]):
+                cambiados.append(idx)
+
+        self._avisar_cambios(cambiados)
+
+
+    def _aplicar(self, pais: Dict, s_val: int, i_val: int, r_val: int, m_val: int, nombre: Optional[str]) -> bool:
+        """Copia los valores de un país y recalcula su color. Devuelve True si el color cambió"""
+        pob:int = s_val + i_val + r_val + m_val
+        
+        if pob <= 0: pob:int = 1
+        pais["poblacion"]:int = pob
+        pais["infectado"]:int = i_val
+        pais["recuperado"]:int = r_val
+        pais["muerto"]:int = m_val
+        
+        if nombre is not None:
+            pais["nombre"]: str = nombre
+        
+        # Color
+        pct:float = (i_val + r_val + m_val) / pob
+        nuevo_color: str = self.calcular_color_hex(pct)
+        
+        if pais["color"] != nuevo_color:
+            pais["color"]: str = nuevo_color
+            return True
+        return False
+
+
+    def _avisar_cambios(self, cambiados: List[int]) -> None:
+        """Un solo dataChanged que cubre todas las filas cuyo color cambió"""
+        if cambiados:
+            top: int = self.index(min(cambiados), 0)
+            bot: int = self.index(max(cambiados), 0)
             self.dataChanged.emit(top, bot, [self.ColorRole, self.InfectadoRole, self.RecuperadoRole])
 
             
@@ -0,0 +1,191 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from backend.loader import Loader
+from backend.registro_contagios import RegistroContagios
+from backend.repeticion import Repeticion
+from backend.totales import TotalesDiarios
+from backend.servidor import EstadoCompartido, servir
+from controllers.hilo_simulacion import Instantanea
+import multiprocessing
+import numpy as np
+from typing import Dict, Optional
+
+
+# Opciones que la interfaz puede cambiar en marcha y se reenvían al servidor
+OPCIONES_REMOTAS: Dict[str, str] = {
+    "beta": "betaChanged", "gamma": "gammaChanged", "mu": "muChanged",
+    "p_frontera": "pFronteraChanged", "NOMBRE_VIRUS": "virusNombreChanged", "PAIS_INICIO": "paisInicioChanged",
+}
+
+
+class MotorRemoto:
+    """
+    Lo poco del Engine que la interfaz consulta directamente (país de origen, noticias,
+    registro de contagios, totales de cada día, días grabados e historial en SQLite). El
+    motor de verdad vive en el proceso servidor.
+    """
+
+    def __init__(self, opciones, primer_pais: Optional[str], n: int) -> None:
+        self.opt = opciones
+        self.csv: Loader = Loader(opciones)
+        self.primer_pais: Optional[str] = primer_pais
+        # Copia local del registro del servidor (le llegan los eventos nuevos de cada tick)
+        self.registro: RegistroContagios = RegistroContagios()
+        # Copia local de los totales de cada día (para la gráfica)
+        self.totales: TotalesDiarios = TotalesDiarios()
+        # Copia local de la grabación de días (se reconstruye con los deltas del servidor)
+        self.repeticion: Optional[Repeticion] = (
+            Repeticion(n, opciones.REPETICION_CADA_KEYFRAME) if opciones.GRABAR_REPETICION else None
+        )
+
+        # Mismo árbol de semillas que Engine: las noticias salen igual que con el motor local
+        semilla = opciones.SEMILLA
+        semillas = semilla if isinstance(semilla, np.random.SeedSequence) else np.random.SeedSequence(semilla)
+        self.rng_noticias: np.random.Generator = np.random.default_rng(semillas.spawn(2)[1])
+
+
+
+class ClienteProceso(QObject):
+    """
+    Misma interfaz que TrabajadorSimulacion, pero el motor corre en otro proceso
+    (backend/servidor.py). Las órdenes viajan por una Pipe y el estado llega por memoria
+    compartida: un QTimer de la interfaz mira el contador de secuencia y, cuando hay una foto
+    nueva, la publica como Instantanea con vistas de solo lectura sobre el bloque, sin copias.
+    """
+
+    instantaneaLista = Signal(object)
+
+    def __init__(self, opciones, intervalo_ms: int = 1000, sondeo_ms: int = 16) -> None:
+        super().__init__()
+        self.opciones = opciones
+        self._estado: Optional[EstadoCompartido] = None
+        self._bienvenida: Dict = {}
+        self._ultima: int = 0
+        self._generacion_pedida: int = 0
+        self._generacion_mostrada: int = 0
+        self.motor: Optional[MotorRemoto] = None
+
+        # "spawn": el proceso hijo no hereda nada de Qt
+        contexto = multiprocessing.get_context("spawn")
+        self._conexion, extremo_servidor = contexto.Pipe()
+        valores: Dict = {nombre: getattr(opciones, nombre) for nombre in OPCIONES_REMOTAS}
+        valores.update(PROBABILIDAD_INFECTAR_VUELO=opciones.PROBABILIDAD_INFECTAR_VUELO,
+                       PROBABILIDAD_INFECTAR_PUERTO=opciones.PROBABILIDAD_INFECTAR_PUERTO,
+                       GRABAR_REPETICION=opciones.GRABAR_REPETICION,
+                       REPETICION_CADA_KEYFRAME=opciones.REPETICION_CADA_KEYFRAME)
+        self.proceso = contexto.Process(target=servir, args=(extremo_servidor, valores), daemon=True)
+        self.proceso.start()
+        extremo_servidor.close()
+
+        for nombre, senal in OPCIONES_REMOTAS.items():
+            getattr(opciones, senal).connect(lambda valor, nombre=nombre: self._enviar("opcion", nombre, valor))
+
+        # La primera carga sí se espera: sin mundo no hay nada que pintar
+        self._recibir(bloquear=True)
+        self._enviar("intervalo", intervalo_ms)
+
+        self.timer: QTimer = QTimer(self)
+        self.timer.timeout.connect(self.sondear)
+        self.timer.start(sondeo_ms)
+
+
+    def _enviar(self, *mensaje) -> None:
+        try:
+            self._conexion.send(mensaje)
+        except (BrokenPipeError, OSError) as e:
+            print(f"⚠️ El servidor de simulación no responde: {e}")
+
+
+    def _recibir(self, bloquear: bool = False) -> None:
+        """Atiende los mensajes pendientes del servidor (bienvenida de cada partida, país de origen, eventos, totales y días grabados)"""
+        while bloquear or self._conexion.poll():
+            bloquear = False
+            tipo, contenido = self._conexion.recv()
+            if tipo == "inicio":
+                if self._estado is None or self._estado.nombre != contenido["bloque"]:
+                    if self._estado is not None: self._estado.cerrar()
+                    self._estado = EstadoCompartido.adjuntar(contenido["bloque"], contenido["n"])
+                    self._ultima = 0
+                self._bienvenida = contenido
+                # La partida anterior pudo borrarse: su conexión de lectura ya no sirve
+                if self.motor is not None: self.motor.csv.cerrar()
+                self.motor = MotorRemoto(self.opciones, contenido["primer_pais"], contenido["n"])
+            elif tipo == "primer_pais" and self.motor is not None:
+                self.motor.primer_pais = contenido
+            elif tipo == "eventos" and self.motor is not None:
+                self.motor.registro.extender(contenido)
+            elif tipo == "totales" and self.motor is not None:
+                self.motor.totales.extender(contenido)
+            elif tipo == "repeticion" and self.motor is not None and self.motor.repeticion is not None:
+                self.motor.repeticion.extender(contenido)
+
+
+    def leer(self) -> Instantanea:
+        """Adopta la última foto publicada y la envuelve en una Instantanea (sin copiar los arrays)"""
+        secuencia, arrays, dia, status, generacion = self._estado.adoptar()
+        self._ultima = secuencia
+        reinicio: bool = generacion != self._generacion_mostrada
+        self._generacion_mostrada = generacion
+
+        resultado: Dict = {
+            "status": status,
+            "dia": str(dia),
+            "totales": {col: int(valores.sum()) for col, valores in arrays.items()},
+        }
+        return Instantanea(self.motor, self._bienvenida["base"], arrays, resultado,
+                           generacion=generacion, reinicio=reinicio, eventos=len(self.motor.registro))
+
+
+    @Slot()
+    def sondear(self) -> None:
+        """Publica la foto nueva, si la hay (si no, solo cuesta leer la cabecera)"""
+        try:
+            self._recibir()
+        except (EOFError, OSError):
+            self.timer.stop()
+            print("⚠️ El servidor de simulación terminó.")
+            return
+
+        if self._estado is None or self._estado.secuencia() == self._ultima: return
+        generacion: int = self._estado.generacion()
+        # Foto de una partida nueva cuya bienvenida (columnas estáticas) aún no llegó: no se adopta
+        if generacion > self._bienvenida["generacion"]: return
+
+        instantanea: Instantanea = self.leer()
+        # Ticks de una partida ya reiniciada: se adoptan (el servidor sigue) pero no se muestran
+        if generacion < self._generacion_pedida: return
+        self.instantaneaLista.emit(instantanea)
+
+
+    def liberar(self, instantanea: Instantanea) -> None:
+        """La ranura se suelta sola al adoptar la siguiente foto (ver EstadoCompartido.adoptar)"""
+
+
+    @Slot(bool)
+    def cambiar_marcha(self, encendido: bool) -> None:
+        self._enviar("marcha", encendido)
+
+
+    @Slot(int)
+    def cambiar_intervalo(self, intervalo_ms: int) -> None:
+        self._enviar("intervalo", intervalo_ms)
+
+
+    @Slot(int)
+    def reiniciar(self, generacion: int) -> None:
+        self._generacion_pedida = generacion
+        self._enviar("reiniciar", generacion)
+
+
+    @Slot()
+    def cheat_fin(self) -> None:
+        self._enviar("cheat")
+
+
+    def cerrar(self) -> None:
+        """Pide al servidor que termine y suelta la memoria compartida"""
+        self.timer.stop()
+        self._enviar("salir")
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive(): self.proceso.terminate()
+        if self._estado is not None: self._estado.cerrar()
+        if self.motor is not None: self.motor.csv.cerrar()
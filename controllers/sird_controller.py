@@ -1,12 +1,15 @@
-from PySide6.QtCore import QObject, Slot, Signal, Property, QTimer, QUrl
+from PySide6.QtCore import QObject, Slot, Signal, Property, QThread, QUrl
 from backend.engine import Engine
+from backend.registro_contagios import RegistroContagios
 from controllers.mapa_modelo import MapaModeloSIRD
+from controllers.hilo_simulacion import Instantanea, TrabajadorSimulacion
+from controllers.proceso_simulacion import ClienteProceso
 from backend.options import Options
 from collections import deque
-import random
 import os
 import datetime
 import pandas as pd
+from typing import Dict, List, Optional
 
 
 
@@ -18,6 +21,13 @@ class ControladorSIRD(QObject):
     diaChanged = Signal(str)
     gameOver = Signal('QVariantMap')
     noticiasActualizadas = Signal() 
+    repeticionCambio = Signal()
+
+    # Órdenes al hilo de simulación (conexiones encoladas: la interfaz nunca espera al motor)
+    _ordenMarcha = Signal(bool)
+    _ordenIntervalo = Signal(int)
+    _ordenReinicio = Signal(int)
+    _ordenCheat = Signal()
 
     def __init__(self) -> None:
         super().__init__()
@@ -25,7 +35,6 @@ class ControladorSIRD(QObject):
         # 1. Inicializar objetos
         self.opciones: Options = Options()
         self.mapa_modelo: MapaModeloSIRD = MapaModeloSIRD()
-        self.motor: Engine = Engine(self.opciones) # Pasamos opciones al motor
 
         # 2. Variables de estado
         self._dia: str = "1"
@@ -37,19 +46,49 @@ class ControladorSIRD(QObject):
         self._primerPais: str = "Esperando..."
         self._noticia: str = "Preparado. Pulsa Play."
         
-        self.timer: QTimer = QTimer()
-        self.timer.timeout.connect(self.tick_simulacion)
         self.isPlaying: bool = False
         self._intervalo_ms: int = 1000
-
-        # 3. ¡IMPORTANTE! Cargar datos iniciales para no ver ceros
+        # Día pasado que se está mostrando (-1 = en vivo)
+        self._dia_repeticion: int = -1
+        # Totales que ya tiene la gráfica: (TotalesDiarios, versión) de la última entrega
+        self._historial_enviado: Optional[tuple] = None
+
+        # 3. Simulación fuera del hilo de la interfaz: en un QThread (dueño del motor) o en
+        # otro proceso que publica el estado en memoria compartida (OptionsBase.MODO_SIMULACION).
+        # La foto del mundo que muestra la interfaz llega siempre por instantaneaLista
+        self._generacion: int = 0
+        self.hilo: Optional[QThread] = None
+        if self.opciones.MODO_SIMULACION == "proceso":
+            self.trabajador: ClienteProceso = ClienteProceso(self.opciones, self._intervalo_ms)
+            self.motor = self.trabajador.motor
+            self._instantanea: Instantanea = self.trabajador.leer()
+        else:
+            self.motor: Engine = Engine(self.opciones) # Pasamos opciones al motor
+            # La primera foto se toma aquí, antes de que el motor pase al hilo de simulación
+            self._instantanea: Instantanea = Instantanea.desde_motor(self.motor)
+            self.hilo = QThread()
+            self.trabajador: TrabajadorSimulacion = TrabajadorSimulacion(self.motor, self.opciones, self._intervalo_ms)
+            self.trabajador.moveToThread(self.hilo)
+            self.hilo.finished.connect(self.trabajador.deleteLater)
+
+        self.trabajador.instantaneaLista.connect(self.recibir_instantanea)
+        self._ordenMarcha.connect(self.trabajador.cambiar_marcha)
+        self._ordenIntervalo.connect(self.trabajador.cambiar_intervalo)
+        self._ordenReinicio.connect(self.trabajador.reiniciar)
+        self._ordenCheat.connect(self.trabajador.cheat_fin)
+        if self.hilo is not None: self.hilo.start()
+        self._nombres_paises: List[str] = sorted(self._instantanea.base["Country Name"].unique().tolist())
+
+        # 4. ¡IMPORTANTE! Cargar datos iniciales para no ver ceros
         # Esto ejecuta una actualización manual sin avanzar el tiempo
         self.actualizar_interfaz_desde_motor()
 
         self.noticias_data = deque(maxlen=self.opciones.MAX_NOTICIAS_HISTORIAL)
         
-        # Países infectados (Se borra y actualiza cada tick)
-        self.paises_infectados_set: set = set() 
+        # Eventos del registro de contagios del motor que ya se convirtieron en noticia, y la
+        # versión del registro con la que se leyeron (cambia si el motor lo trunca)
+        self._eventos_leidos: int = 0
+        self._version_eventos: int = 0
         
         #  Hitos/Logros 
         self.hitos_reportados: set = set()
@@ -83,14 +122,23 @@ class ControladorSIRD(QObject):
     @Property(str, notify=noticiaCambio)
     def noticia(self): return self._noticia
 
+    @Property(int, notify=repeticionCambio)
+    def diaRepeticion(self): return self._dia_repeticion
+
+    @Property(int, notify=statsChanged)
+    def primerDiaGrabado(self):
+        repeticion = getattr(self.motor, "repeticion", None)
+        return repeticion.primer_dia if repeticion is not None and len(repeticion) else 0
+
+    @Property(int, notify=statsChanged)
+    def ultimoDiaGrabado(self):
+        repeticion = getattr(self.motor, "repeticion", None)
+        return repeticion.ultimo_dia if repeticion is not None and len(repeticion) else 0
+
     @Property(list, constant=True)
     def listaNombresPaises(self)-> List[str]| str:
         """Devuelve la lista alfabética de países para el ComboBox de Configuración"""
-        if hasattr(self.motor, 'dataframe') and not self.motor.dataframe.empty:
-            # Obtenemos nombres únicos y los ordenamos
-            lista: List[str] = sorted(self.motor.dataframe["Country Name"].unique().tolist())
-            return lista
-        return ["Cargando..."]
+        return self._nombres_paises or ["Cargando..."]
 
 
     @Slot(float)
@@ -120,9 +168,8 @@ class ControladorSIRD(QObject):
         
         self._intervalo_ms: int = nuevo_intervalo
         
-        # Aplicar inmediatamente si está corriendo
-        if self.isPlaying:
-            self.timer.setInterval(self._intervalo_ms)
+        # El hilo lo aplica en su timer (si está corriendo, desde el próximo tick)
+        self._ordenIntervalo.emit(self._intervalo_ms)
 
 
 
@@ -133,10 +180,9 @@ class ControladorSIRD(QObject):
         self.isPlaying = encendido
         if encendido:
             print("▶️ Iniciando Timer...")
-            self.timer.start(self._intervalo_ms)
         else:
             print("⏸️ Pausando Timer...")
-            self.timer.stop()
+        self._ordenMarcha.emit(encendido)
 
 
     @Slot()
@@ -152,43 +198,68 @@ class ControladorSIRD(QObject):
     @Slot()
     def reiniciar(self)->None:
         print("⟲ Reiniciando...")
-        self.timer.stop()
         self.isPlaying:bool = False
 
-        # Limpiar
-        if hasattr(self, 'motor'):
-            try: self.motor.csv.limpiar_db()
-            except: pass
-
+        # Limpiar. Las fotos que sigan en camino de la partida anterior se descartan al llegar;
+        # borrar la DB y crear el motor nuevo lo hace el hilo de simulación
+        self._generacion += 1
+        self._ordenReinicio.emit(self._generacion)
         self.mapa_modelo._inicializar_vacio()
-        self.motor:Engine = Engine(self.opciones) # Motor nuevo con opciones
 
-        self.paises_infectados_set:set = set()
+        self._eventos_leidos = 0
+        self._version_eventos = 0
         self.hitos_reportados:set = set()      
         self.noticias_data.clear()
+        self._dia_repeticion = -1
+        self.repeticionCambio.emit()
 
         self._noticia:str = "Simulación Reiniciada."
-        
-        # Cargar estado inicial limpio
-        self.actualizar_interfaz_desde_motor()
+        self.noticiaCambio.emit(self._noticia)
+        self.noticiasActualizadas.emit()
 
 
 
-    def tick_simulacion(self)->None:
-        """Avanza la lógica de la simulación un día en un tiempo determinado"""
-        if not self.isPlaying: return
-        
-        # Avanzar lógica
-        resultado: pd.Dataframe = self.motor.avanzar_dia()
-        self.procesar_resultado(resultado)
+    @Slot(object)
+    def recibir_instantanea(self, instantanea: Instantanea)->None:
+        """Cambia la foto que muestra la interfaz por la recién publicada y suelta la anterior"""
+        anterior: Instantanea = self._instantanea
+        if instantanea.generacion != self._generacion:
+            # Tick de una partida ya reiniciada
+            self.trabajador.liberar(instantanea)
+            return
+
+        self._instantanea = instantanea
+        self.motor = instantanea.motor
+        self.trabajador.liberar(anterior)
+
+        if instantanea.reinicio:
+            # Cargar estado inicial limpio
+            self._eventos_leidos = 0
+            self._version_eventos = 0
+            self._dia_repeticion = -1
+            self.repeticionCambio.emit()
+            self.actualizar_interfaz_desde_motor()
+        else:
+            self.procesar_resultado(instantanea.resultado)
+
+
+    def cerrar(self)->None:
+        """Detiene el hilo o el proceso de simulación (al salir de la aplicación)"""
+        self._ordenMarcha.emit(False)
+        if self.hilo is not None:
+            self.hilo.quit()
+            self.hilo.wait()
+            # Con el hilo parado: guarda lo pendiente y cierra la conexión (checkpoint del WAL)
+            self.motor.cerrar()
+        else:
+            self.trabajador.cerrar()
         
 
     def actualizar_interfaz_desde_motor(self)->None:
-        """Lee el estado actual del motor SIN avanzar el día"""
-        # Fuerza una lectura del estado actual del dataframe
-        if hasattr(self.motor, 'dataframe'):
+        """Lee la foto actual del mundo SIN avanzar el día"""
+        if self._instantanea is not None:
              # Construye un 'resultado' falso solo para actualizar la UI
-             df:pd.Dataframe = self.motor.dataframe
+             df:pd.DataFrame = self._instantanea.dataframe()
              nombre:str = getattr(self.motor, 'primer_pais', "Desconocido")
 
              
@@ -215,52 +286,63 @@ class ControladorSIRD(QObject):
              self._infectados: pd.Series = totales["I"]
              self._recuperados: pd.Series = totales["R"]
              self._muertos:pd.Series = totales["M"]
-             self._dia:str = "1"
+             self._dia:str = str(self._instantanea.resultado.get("dia", "1"))
              self.statsChanged.emit()
              self.diaChanged.emit(self._dia)
              self.noticiaCambio.emit(self._noticia)
              
              # Actualizar colores iniciales
-             self.mapa_modelo.actualizar_datos(df.to_dict(orient="records"))
+             self.mapa_modelo.actualizar_arrays(self._instantanea.base, self._instantanea.arrays)
 
     def procesar_resultado(self, resultado) -> None:
         status = resultado.get("status", "Jugando")
-        datos:pd.Dataframe = resultado.get("datos", [])
+        # El fin de partida siempre se muestra en vivo
+        if self._dia_repeticion >= 0 and status not in ("PLAYING", "Jugando"):
+            self.volver_al_presente()
                 
         # --- LÓGICA DE NOTICIAS BLINDADA ---
         try:
-            df: pd.Dataframe = self.motor.dataframe
+            instantanea: Instantanea = self._instantanea
             virus:str = getattr(self.opciones, "NOMBRE_VIRUS", "Virus-X") 
             
-            # DETECTA NUEVOS PAÍSES INFECTADOS
-            infectados_ahora:set = set(df[df["I"] > 0]["Country Name"].tolist())
-            nuevos: set = infectados_ahora - self.paises_infectados_set
-            
-            for pais_nombre in nuevos:
-                culpable:str = "Desconocido"
-                        
-                # Solo busca culpable si YA había infectados antes
-                # Y usa la lista LIMPIA (solo países reales)
-                if len(self.paises_infectados_set) > 0:
-                    lista_previos : list = list(self.paises_infectados_set)
-                    if lista_previos:
-                        culpable = random.choice(lista_previos)
-                        frases:List[str] = [
-                            f"¡{virus} llegó a {pais_nombre} desde {culpable}!",
-                            f"Frontera rota: {culpable} contagió a {pais_nombre}.",
-                            f"Turistas de {culpable} llevan el virus a {pais_nombre}.",
-                            f"Detectado caso en {pais_nombre}. Origen: {culpable}."
-                        ]
-                        msg: str = random.choice(frases)
-                    else:
-                            msg: str = f"¡{virus} aparece en {pais_nombre}!"
+            # NUEVOS PAÍSES INFECTADOS: salen del registro de contagios del motor, que sabe
+            # quién contagió a quién y por dónde (solo se leen los eventos nuevos de esta foto)
+            # Si el motor truncó el registro (volvió atrás), lo leído después del corte ya no son
+            # las mismas filas y se vuelve a leer desde ahí
+            registro = self.motor.registro
+            self._eventos_leidos = registro.filas_intactas(self._version_eventos, self._eventos_leidos)
+            self._version_eventos = registro.version
+            hasta: int = instantanea.eventos
+            desde: int = max(self._eventos_leidos, hasta - self.opciones.MAX_NOTICIAS_HISTORIAL)
+            eventos: Dict = registro.columnas(desde, hasta)
+            self._eventos_leidos = hasta
+            nombres = instantanea.nombres
+
+            for origen, destino, canal in zip(eventos["origen"].tolist(), eventos["destino"].tolist(), eventos["canal"].tolist()):
+                pais_nombre: str = nombres[destino]
+                if origen < 0:
+                    self.generar_noticia(f"☣️ ¡PACIENTE CERO detectado en {pais_nombre}!", "INFECT")
+                    continue
+
+                culpable: str = nombres[origen]
+                via: str = RegistroContagios.CANALES[canal]
+                if via == "frontera":
+                    frases: List[str] = [
+                        f"Frontera rota: {culpable} contagió a {pais_nombre}.",
+                        f"¡{virus} cruza la frontera de {culpable} a {pais_nombre}!",
+                    ]
+                elif via == "vuelo":
+                    frases: List[str] = [
+                        f"Turistas de {culpable} llevan el virus a {pais_nombre}.",
+                        f"¡{virus} llegó a {pais_nombre} en un vuelo desde {culpable}!",
+                    ]
                 else:
-                    msg: str = f"☣️ ¡PACIENTE CERO detectado en {pais_nombre}!"
-            
+                    frases: List[str] = [
+                        f"Un barco de {culpable} lleva el virus a {pais_nombre}.",
+                        f"Detectado caso en {pais_nombre}. Origen: puerto de {culpable}.",
+                    ]
+                msg: str = frases[int(self.motor.rng_noticias.integers(len(frases)))]
                 self.generar_noticia(msg, "INFECT")
-            
-            # Actualizamos la lista de países (Esto borraba el 1M_INF antes)
-            self.paises_infectados_set = infectados_ahora
                     
             # 2. HITOS GLOBALES (Usamos la NUEVA memoria separada)
             # Hito: 1 Millón
@@ -283,8 +365,14 @@ class ControladorSIRD(QObject):
                     
                         
         # --- FIN LÓGICA NOTICIAS ---
+
+        # Revisando un día pasado: la partida sigue, pero el mapa y los totales no se tocan
+        if self._dia_repeticion >= 0:
+            self.statsChanged.emit()
+            return
                 
-        if datos: self.mapa_modelo.actualizar_datos(datos)
+        # El mapa lee directamente los arrays de la foto (sin un registro por país)
+        self.mapa_modelo.actualizar_arrays(self._instantanea.base, self._instantanea.arrays)
                 
         totales: Dict = resultado.get("totales", {})
         if totales:
@@ -294,7 +382,7 @@ class ControladorSIRD(QObject):
             self._muertos:int = int(totales.get("M", 0))
                 
             self._dia:str = str(resultado.get("dia", self._dia))
-            self._paisesInfectados:int|float = sum(1 for p in datos if p.get("I", 0) > 0)
+            self._paisesInfectados:int|float = int((self._instantanea.arrays["I"] > 0).sum())
                 
             self.statsChanged.emit()
             self.diaChanged.emit(self._dia)
@@ -314,35 +402,98 @@ class ControladorSIRD(QObject):
                 })
 
 
+    def _mostrar_estado(self, arrays: Dict, dia) -> None:
+        """Pinta en el mapa y en los totales el estado indicado (en vivo o de la grabación)"""
+        self.mapa_modelo.actualizar_arrays(self._instantanea.base, arrays)
+        self._sanos = int(arrays["S"].sum())
+        self._infectados = int(arrays["I"].sum())
+        self._recuperados = int(arrays["R"].sum())
+        self._muertos = int(arrays["M"].sum())
+        self._paisesInfectados = int((arrays["I"] > 0).sum())
+        self._dia = str(dia)
+        self.statsChanged.emit()
+        self.diaChanged.emit(self._dia)
+
+
+    @Slot(int)
+    def buscar_dia(self, dia: int) -> None:
+        """
+        Muestra un día ya simulado (keyframe más deltas de la grabación, sin volver a simular).
+        La partida sigue corriendo detrás; un día igual o posterior al último vuelve al presente
+        """
+        repeticion = getattr(self.motor, "repeticion", None)
+        if repeticion is None or len(repeticion) == 0 or self._instantanea is None: return
+        if dia >= int(self._instantanea.resultado.get("dia", 0)):
+            self.volver_al_presente()
+            return
+
+        dia_mostrado, arrays = repeticion.estado_en(dia)
+        self._dia_repeticion = dia_mostrado
+        self._mostrar_estado(arrays, dia_mostrado)
+        self.repeticionCambio.emit()
+
+
+    @Slot()
+    def volver_al_presente(self) -> None:
+        """Deja de revisar días pasados y vuelve a la última foto de la partida"""
+        if self._dia_repeticion < 0: return
+        self._dia_repeticion = -1
+        if self._instantanea is not None:
+            self._mostrar_estado(self._instantanea.arrays, self._instantanea.resultado.get("dia", self._dia))
+        self.repeticionCambio.emit()
+
+
     @Slot(result=list)
     def obtener_datos_historial(self)->List:
         """
         Devuelve una lista de 5 listas: [Dias, S, I, R, M]
         Optimizado para graficar rápido.
         """
-        if not hasattr(self.motor, 'historial'): return []
-        
-        # Obtiene el DataFrame del historial
-        # Si está vacío, intenta recargar de la DB
-        df:pd.Dataframe = self.motor.historial
-        if df.empty:
-             df:pd.Dataframe = self.motor.csv.historial()
-        
-        if df.empty: return []
+        return self.obtener_historial_desde(-1)
 
-        # Extrae columnas como listas simples de Python (JSON compatible)
-        try:
-            # Convertir a numérico por seguridad
-            dias: List[int] = df["dia"].astype(int).tolist()
-            s: List[float] = df["total_S"].astype(float).tolist()
-            i:List[float] = df["total_I"].astype(float).tolist()
-            r:List[float] = df["total_R"].astype(float).tolist()
-            m:List[float] = df["total_M"].astype(float).tolist()
-            
-            return [dias, s, i, r, m]
-        except Exception as e:
-            print(f"Error extrayendo historial: {e}")
-            return []
+
+    @Slot(int, result=list)
+    def obtener_historial_desde(self, dia: int) -> List:
+        """
+        Totales [Dias, S, I, R, M] de los días posteriores a `dia` (el último que ya tiene la
+        gráfica; -1 = todos), leídos de los arrays del motor sin tocar SQLite.
+
+        Si lo que tiene la gráfica ya no vale (partida nueva o el motor volvió a un día
+        anterior) se devuelve la curva entera: su primer día no es posterior a `dia`, así que
+        la gráfica sabe que debe reemplazar en vez de añadir.
+        """
+        totales = getattr(self.motor, "totales", None)
+        if totales is None or self._instantanea is None: return []
+
+        if self._historial_enviado is None or self._historial_enviado[0] is not totales or self._historial_enviado[1] != totales.version:
+            dia = -1
+        self._historial_enviado = (totales, totales.version)
+
+        dias, valores = totales.columnas(dia if dia >= 0 else None, self._dia_visible())
+        return [dias.tolist()] + [valores[:, k].tolist() for k in range(valores.shape[1])]
+
+
+    @Slot(int, int, result=list)
+    def obtener_historial_resumido(self, ancho: int, dia: int) -> List:
+        """
+        Como obtener_historial_desde, pero para dibujar en `ancho` píxeles. Mientras la curva
+        cabe se mandan solo los días nuevos; cuando no, el resumen entero con a lo sumo dos
+        puntos por píxel (ver TotalesDiarios.resumen), que la gráfica reemplaza. Así cada
+        refresco cuesta lo mismo aunque la partida lleve miles de días.
+        """
+        totales = getattr(self.motor, "totales", None)
+        if totales is None or self._instantanea is None: return []
+
+        dias, valores, nivel = totales.resumen(ancho, self._dia_visible())
+        if nivel == 0: return self.obtener_historial_desde(dia)
+        # La gráfica se queda con un resumen: si la curva vuelve a caber, se le manda entera
+        self._historial_enviado = None
+        return [dias.tolist()] + [valores[:, k].tolist() for k in range(valores.shape[1])]
+
+
+    def _dia_visible(self) -> int:
+        """Último día que debe mostrar la gráfica: el revisado o el de la foto (el motor puede ir uno por delante)"""
+        return self._dia_repeticion if self._dia_repeticion >= 0 else int(self._instantanea.resultado.get("dia", 0))
 
     @Slot(str, result=list)
     def obtener_ranking_global(self, criterio:str="I")->List:
@@ -350,9 +501,9 @@ class ControladorSIRD(QObject):
         Devuelve el ranking ordenado según el criterio:
         'I': Infectados, 'M': Muertos, 'R': Recuperados, 'S': Sanos
         """
-        if not hasattr(self.motor, 'dataframe'): return []
+        if self._instantanea is None: return []
         
-        df:pd.Dataframe = self.motor.dataframe.copy()
+        df:pd.DataFrame = self._instantanea.dataframe()
         
         # Evitar división por cero
         df["poblacion"]:pd.Series = df["poblacion"].replace(0, 1)
@@ -367,7 +518,7 @@ class ControladorSIRD(QObject):
         df["ratio"]:pd.Series = df[col_sort] / df["poblacion"]
         
         # Ordenamos de Mayor a Menor
-        df_sorted:pd.Dataframe = df.sort_values(by=col_sort, ascending=False)
+        df_sorted:pd.DataFrame = df.sort_values(by=col_sort, ascending=False)
         
         # Extraemos Top 200
         resultado: List = [str,str|int|float]
@@ -425,19 +576,33 @@ class ControladorSIRD(QObject):
         }
 
 
+    @Slot(str, result=list)
+    def obtener_cadena_contagio(self, codigo_pais: str) -> List:
+        """
+        Camino del virus desde el paciente cero hasta un país, según el registro de contagios.
+        Lista de {"dia", "origen", "destino", "canal"} (vacía si el virus no llegó)
+        """
+        if self._instantanea is None: return []
+        base: pd.DataFrame = self._instantanea.base
+        if "Country Code" not in base.columns: return []
+        filas = (base["Country Code"] == codigo_pais).to_numpy().nonzero()[0]
+        if len(filas) == 0: return []
+
+        nombres = self._instantanea.nombres
+        return [
+            {"dia": dia, "origen": str(nombres[origen]) if origen >= 0 else "", "destino": str(nombres[destino]), "canal": canal}
+            for dia, origen, destino, canal in self.motor.registro.cadena(int(filas[0]))
+        ]
+
+
     @Slot()
     def activar_cheat_fin(self):
         """Función de debugging, presiona la tecla K y se termina la simulación automaticamente"""
         print("😈 CHEAT ACTIVADO: Apocalipsis instantáneo")
-        self.motor.cheat_fin_rapido()
-        
-        # Actualiza los números visuales
-        self.actualizar_interfaz_desde_motor()
         
-        #Fuerza un avance de día MANUAL para que el motor detecte el fin
-        # Así no se tiene que esperar al Timer ni darle a Play
-        resultado:pd.Dataframe = self.motor.avanzar_dia()
-        self.procesar_resultado(resultado)
+        # El hilo de simulación aplica el cheat y fuerza un avance de día MANUAL para que el
+        # motor detecte el fin. Así no se tiene que esperar al Timer ni darle a Play
+        self._ordenCheat.emit()
 
 
     @Slot(result=list)
@@ -473,7 +638,7 @@ class ControladorSIRD(QObject):
         2. [Nombre]_Historial_Global.csv (Datos temporales de la DB)
         """
         try:
-            if not hasattr(self.motor, 'dataframe'): return
+            if self._instantanea is None: return
             
             # 1. LIMPIEZA DE RUTA (Cross-Platform)
             ruta_limpia = QUrl(file_url).toLocalFile()
@@ -487,7 +652,7 @@ class ControladorSIRD(QObject):
             # ARCHIVO 1: ESTADO ACTUAL (Tabla de Países)
             # ---------------------------------------------------------
             ruta_estado:str = f"{base}_Estado_Actual{ext}"
-            self.motor.dataframe.to_csv(ruta_estado, index=False, encoding='utf-8-sig')
+            self._instantanea.dataframe().to_csv(ruta_estado, index=False, encoding='utf-8-sig')
             
             # ---------------------------------------------------------
             # ARCHIVO 2: HISTORIAL (Tabla de Tiempo)
@@ -497,7 +662,7 @@ class ControladorSIRD(QObject):
             # Intenta obtener el historial fresco desde la base de datos
             df_historial:pd.DataFrame = pd.DataFrame()
             try:
-                df_historial:pd.Dataframe = self.motor.csv.historial()
+                df_historial:pd.DataFrame = self.motor.csv.historial()
             except Exception as e:
                 print(f"⚠️ Error leyendo historial DB: {e}")
 
@@ -24,6 +24,8 @@ if __name__ == "__main__":
     
     # Instanciar el Controlador
     controlador = ControladorSIRD()
+    # Al salir, parar el hilo de simulación antes de que se destruya el controlador
+    app.aboutToQuit.connect(controlador.cerrar)
 
     # Exponer a QML
     engine.rootContext().setContextProperty("backend", controlador)
@@ -0,0 +1,15 @@
+from backend.options_base import HeadlessOptions
+from backend.engine import Engine
+
+
+def test_repeticion_empieza_en_el_dia_restaurado(tmp_path):
+    """Tras desde_checkpoint la grabación arranca en el día guardado, no en el día 1 del constructor"""
+    motor: Engine = Engine(HeadlessOptions(PERSISTIR=False, GRABAR_REPETICION=True), semilla=3)
+    for _ in range(40): motor._paso()
+    motor.guardar_checkpoint(tmp_path / "partida.ppck")
+
+    reanudado: Engine = Engine.desde_checkpoint(tmp_path / "partida.ppck")
+    assert reanudado.repeticion.primer_dia == 40
+    dia, estado = reanudado.repeticion.estado_en(5)
+    assert dia == 40
+    assert (estado["I"] == motor.estado.I).all()
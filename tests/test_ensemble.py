@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from backend.options_base import HeadlessOptions
+from backend.engine import Engine
+from backend.ensemble import Ensemble
+
+
+@pytest.mark.parametrize("integrador", ["euler", "binomial", "rk45"])
+def test_una_corrida_igual_que_engine(integrador):
+    """Un ensamble de una corrida con la semilla del motor reproduce Engine día a día, bit a bit"""
+    opciones = HeadlessOptions(PERSISTIR=False, INTEGRADOR=integrador)
+    motor: Engine = Engine(opciones, semilla=7)
+    ensamble: Ensemble = Ensemble(Engine(opciones, semilla=0).sir, opciones, 1, semilla=[np.random.SeedSequence(7)])
+
+    infectados = []
+    for _ in range(40):
+        motor._paso()
+        infectados.append(motor.estado.I.sum())
+    ensamble.avanzar(39)
+
+    assert ensamble.muestras["dia"] == list(range(1, 41))
+    assert [float(I[0]) for I in ensamble.muestras["I"]] == infectados
+    for col in Ensemble.COMPARTIMENTOS:
+        assert np.array_equal(getattr(ensamble, col)[0], getattr(motor.estado, col))
@@ -0,0 +1,17 @@
+import numpy as np
+from backend.registro_contagios import RegistroContagios
+
+
+def test_filas_intactas_tras_truncar():
+    """Lo leído antes de truncar solo sigue valiendo hasta el corte más bajo desde esa lectura"""
+    registro: RegistroContagios = RegistroContagios()
+    registro.registrar(1, np.array([-1]), np.array([0]), "paciente_cero")
+    registro.registrar(2, np.array([0, 0]), np.array([1, 2]), "frontera")
+    version, leidas = registro.version, len(registro)
+    assert registro.filas_intactas(version, leidas) == 3
+
+    registro.truncar(1)
+    registro.registrar(2, np.array([0, 0, 0]), np.array([3, 4, 5]), "vuelo")
+    assert registro.version == version + 1
+    assert registro.filas_intactas(version, leidas) == 1
+    assert registro.columnas(1)["destino"].tolist() == [3, 4, 5]
@@ -0,0 +1,18 @@
+import json
+import os
+import subprocess
+import sys
+
+RAIZ: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_run_sin_interfaz(tmp_path):
+    """`python -m backend.run` importa sin Qt, simula 5 días y escribe los resultados"""
+    proceso = subprocess.run([sys.executable, "-m", "backend.run", "--dias", "5", "--semilla", "1", "--salida", str(tmp_path)],
+                             cwd=RAIZ, capture_output=True, text=True, timeout=300)
+    assert proceso.returncode == 0, proceso.stderr
+
+    for archivo in ("estado_final.csv", "historial.csv", "tiempos.json"):
+        assert (tmp_path / archivo).exists()
+    with open(tmp_path / "tiempos.json", encoding="utf-8") as f:
+        assert json.load(f)["dia"] == 5
@@ -0,0 +1,13 @@
+from backend.options_base import HeadlessOptions
+from backend.engine import Engine
+
+
+def test_partida_nueva_registra_el_dia_1_una_vez():
+    """El primer tick registra el día 1 sin truncar: la gráfica no tiene que pedir la curva entera"""
+    motor: Engine = Engine(HeadlessOptions(PERSISTIR=False, GRABAR_REPETICION=True), semilla=1)
+    for _ in range(3): motor._paso()
+
+    dias, _ = motor.totales.columnas()
+    assert dias.tolist() == [1, 2, 3]
+    assert motor.totales.version == 0
+    assert motor.repeticion.primer_dia == 1
@@ -234,6 +234,57 @@ Item {
             onClicked: mapRoot.setZoomManual(0.6)
         }
     }
+    // =========================================================
+    // 6. REPETICIÓN (volver a cualquier día ya simulado)
+    // =========================================================
+    Rectangle {
+        id: barraRepeticion
+        anchors.bottom: parent.bottom
+        anchors.horizontalCenter: parent.horizontalCenter
+        anchors.bottomMargin: 20
+        width: Math.min(parent.width * 0.6, 600)
+        height: 44
+        radius: 8
+        color: "#cc1e1e2e"
+        border.color: backend && backend.diaRepeticion >= 0 ? "#ffb74d" : "#555"
+        visible: backend ? backend.ultimoDiaGrabado > backend.primerDiaGrabado : false
+
+        Row {
+            anchors.fill: parent
+            anchors.margins: 8
+            spacing: 10
+
+            Text {
+                anchors.verticalCenter: parent.verticalCenter
+                text: backend && backend.diaRepeticion >= 0 ? "⏪ Día " + backend.diaRepeticion : "🔴 En vivo"
+                color: "white"
+                font.pixelSize: 13
+                font.bold: true
+                width: 90
+            }
+
+            Slider {
+                id: sliderRepeticion
+                anchors.verticalCenter: parent.verticalCenter
+                width: parent.width - 90 - botonVivo.width - 20
+                from: backend ? backend.primerDiaGrabado : 0
+                to: backend ? backend.ultimoDiaGrabado : 1
+                stepSize: 1
+                // Sin repetición el cursor sigue al último día
+                value: backend ? (backend.diaRepeticion >= 0 ? backend.diaRepeticion : backend.ultimoDiaGrabado) : 0
+                onMoved: if (backend) backend.buscar_dia(Math.round(value))
+            }
+
+            Button {
+                id: botonVivo
+                anchors.verticalCenter: parent.verticalCenter
+                text: "En vivo"
+                enabled: backend ? backend.diaRepeticion >= 0 : false
+                onClicked: if (backend) backend.volver_al_presente()
+            }
+        }
+    }
+
     PieChartPopup {
         id: infoPaisPopup
         // Se asegura de estar encima del mapa
@@ -29,17 +29,45 @@ Item {
     // Escala dinámica del eje Y
     property real maxY: 1.0
 
-    // Carga inicial de datos
+    // Último día que ya tiene la gráfica (-1 = ninguno)
+    property int ultimoDia: -1
+
+    // Carga completa (al abrir la vista, al reiniciar o al revisar un día pasado)
     function cargarDatos() {
-        if(backend) {
-            var raw = backend.obtener_datos_historial()
-            if(raw && raw.length === 5 && raw[0].length > 0) {
-                rawData = raw
-                maxDias = raw[0][raw[0].length - 1]
-                calcularMaxY()
-                canvas.requestPaint()
-            }
+        ultimoDia = -1
+        actualizarDatos()
+    }
+
+    // Pide solo los días nuevos y los añade; si el backend manda la curva entera (o resumida
+    // al ancho de la gráfica en partidas largas), la reemplaza
+    function actualizarDatos() {
+        if(!backend) return
+        var raw = backend.obtener_historial_resumido(Math.max(1, Math.round(canvas.width - 120)), ultimoDia)
+        if(!raw || raw.length !== 5 || raw[0].length === 0) {
+            if(ultimoDia < 0) { rawData = []; canvas.requestPaint() }
+            return
         }
+
+        if(ultimoDia < 0 || raw[0][0] <= ultimoDia || rawData.length !== 5) {
+            rawData = raw
+            calcularMaxY()
+        } else {
+            for(var k = 0; k < 5; k++) Array.prototype.push.apply(rawData[k], raw[k])
+            ampliarMaxY(raw)
+        }
+        ultimoDia = raw[0][raw[0].length - 1]
+        maxDias = ultimoDia
+        canvas.requestPaint()
+    }
+
+    // Sube la escala vertical si los días nuevos la superan (sin recorrer toda la curva)
+    function ampliarMaxY(nuevos) {
+        let maxVal = 0;
+        if (showS) maxVal = Math.max(maxVal, Math.max(...nuevos[1]));
+        if (showI) maxVal = Math.max(maxVal, Math.max(...nuevos[2]));
+        if (showR) maxVal = Math.max(maxVal, Math.max(...nuevos[3]));
+        if (showM) maxVal = Math.max(maxVal, Math.max(...nuevos[4]));
+        if (maxVal * 1.1 > root.maxY) root.maxY = maxVal * 1.1;
     }
 
     // Calcula el "Zoom" vertical automáticamente según qué líneas están visibles
@@ -64,6 +92,14 @@ Item {
 
     Component.onCompleted: cargarDatos()
 
+    // Al revisar un día pasado (o volver al presente) la gráfica llega hasta ese día
+    Connections {
+        target: backend
+        function onRepeticionCambio() { cargarDatos() }
+        // Cada tick mostrado: solo los días nuevos
+        function onStatsChanged() { actualizarDatos() }
+    }
+
     // Fondo
     Rectangle {
         anchors.fill: parent
@@ -155,7 +191,8 @@ Item {
                 renderStrategy: Canvas.Immediate 
                 renderTarget: Canvas.Image
 
-                onWidthChanged: requestPaint()
+                // Otro ancho puede pedir otro nivel de resumen
+                onWidthChanged: root.cargarDatos()
                 onHeightChanged: requestPaint()
 
                 onPaint: {
@@ -276,10 +313,15 @@ Item {
                     if(cursorLine.visible && root.rawData.length > 0) {
                         var plotW = width - 120; // width - padL - padR
                         var pct = (mouse.x - 50) / plotW;
-                        var diaIdx = Math.round(pct * (root.rawData[0].length - 1));
-                        
-                        if(diaIdx < 0) diaIdx = 0;
-                        if(diaIdx >= root.rawData[0].length) diaIdx = root.rawData[0].length - 1;
+                        // Punto más cercano al día bajo el cursor (los días pueden no ser seguidos si la curva viene resumida)
+                        var dias = root.rawData[0];
+                        var buscado = pct * root.maxDias;
+                        var lo = 0, hi = dias.length - 1;
+                        while(lo < hi) {
+                            var mid = (lo + hi) >> 1;
+                            if(dias[mid] < buscado) lo = mid + 1; else hi = mid;
+                        }
+                        var diaIdx = (lo > 0 && buscado - dias[lo - 1] < dias[lo] - buscado) ? lo - 1 : lo;
 
                         tooltip.dia = root.rawData[0][diaIdx];
                         tooltip.s = root.rawData[1][diaIdx];